@@ -11,12 +11,15 @@ Based on:
 
 Why separate script?
 - Classification is a durable decision, not an export-time inference.
-- Writes append-only decision records.
-- Idempotent.
+- Appends decision records to the year's decision journal
+  (accounting/data/2025/decision_journal_2025.jsonl, see decision_journal.py)
+  and, unless --journal-only, to bundles/<id>/decisions/ as a materialized view.
+- Idempotent: a decision already journaled unchanged is not appended again.
 
 Usage
   python3 accounting/scripts/autofill_economic_owner.py
   python3 accounting/scripts/autofill_economic_owner.py --dry-run
+  python3 accounting/scripts/autofill_economic_owner.py --journal-only
 
 Dry-run mode:
 - shows matches
@@ -33,10 +36,14 @@ import json
 import pathlib
 import sys
 from datetime import datetime
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
+
+import bundle_snapshot
+import decision_journal
+from corp_payment_matcher import CorpPaymentMatcher, norm
 
 YEAR = "2025"
-BUNDLES_DIR = pathlib.Path("accounting/data/2025/bundles")
+BUNDLES_DIR = bundle_snapshot.BUNDLES_DIR
 CONFIG_PATH = pathlib.Path("CONFIG/corp_payment_fingerprints.json")
 DECISION_FILENAME = "auto_owner_from_payment.json"
 
@@ -51,13 +58,6 @@ def load_json(path: pathlib.Path) -> Dict[str, Any]:
         die(f"Failed to read JSON {path}: {e}")
     raise RuntimeError
 
-def norm(s: Any) -> str:
-    return str(s or "").strip().lower()
-
-def contains_any(hay: str, needles: List[str]) -> bool:
-    h = hay.lower()
-    return any(n.lower() in h for n in needles if n)
-
 def get_payment(meta: Dict[str, Any]) -> Dict[str, Any]:
     p = meta.get("payment", {}) if isinstance(meta.get("payment", {}), dict) else {}
     return {
@@ -68,40 +68,12 @@ def get_payment(meta: Dict[str, Any]) -> Dict[str, Any]:
         "billing_address": meta.get("billing_address", p.get("billing_address", "")),
     }
 
-def strong_match_by_last4(payment: Dict[str, Any], corp_card: Dict[str, Any], policy: Dict[str, Any]) -> bool:
-    if not payment.get("card_last4"):
-        return False
-    if norm(payment["card_last4"]) != norm(corp_card.get("last4", "")):
-        return False
-
-    if policy.get("require_brand_if_present") and payment.get("card_brand") and corp_card.get("brand"):
-        if norm(payment["card_brand"]) != norm(corp_card["brand"]):
-            return False
-    if policy.get("require_billing_zip_if_present") and payment.get("billing_zip") and corp_card.get("billing_zip"):
-        if norm(payment["billing_zip"]) != norm(corp_card["billing_zip"]):
-            return False
-    return True
-
-def match_by_address(payment: Dict[str, Any], corp_addr_needles: List[str]) -> bool:
-    addr_blob = " ".join([payment.get("billing_name",""), payment.get("billing_address","")]).strip()
-    if not addr_blob:
-        return False
-    return contains_any(addr_blob, corp_addr_needles)
-
 def should_overwrite_existing_owner(existing: str) -> bool:
     e = norm(existing)
     return e in ("", "tbd", "unknown", "unset", "none")
 
-def write_decision(bundle_dir: pathlib.Path, decision: Dict[str, Any]) -> None:
-    ddir = bundle_dir / "decisions"
-    ddir.mkdir(exist_ok=True)
-    (ddir / DECISION_FILENAME).write_text(json.dumps(decision, indent=2) + "\n")
-
-def main() -> None:
-    ap = argparse.ArgumentParser()
-    ap.add_argument("--dry-run", action="store_true", help="Show matches but do not write decisions or modify metadata")
-    args = ap.parse_args()
-
+def autofill(dry_run: bool, bundles: Optional[List[bundle_snapshot.Bundle]] = None, journal_only: bool = False) -> None:
+    """Match and (unless dry_run) record decisions and update metadata, on disk and in bundles."""
     if not CONFIG_PATH.exists():
         die(f"Missing config: {CONFIG_PATH}. Copy CONFIG/corp_payment_fingerprints.template.json -> CONFIG/corp_payment_fingerprints.json and fill it in.")
 
@@ -111,10 +83,14 @@ def main() -> None:
     cfg = load_json(CONFIG_PATH)
     corp_cards = cfg.get("corp_cards", [])
     corp_addr_needles = cfg.get("corp_billing_address_contains", [])
-    policy = cfg.get("match_policy", {})
 
     if not corp_cards and not corp_addr_needles:
         die("Config has no corp_cards or corp_billing_address_contains; nothing to match.")
+    # compiled once: per-bundle matching cost doesn't grow with the config
+    matcher = CorpPaymentMatcher(cfg)
+
+    if bundles is None:
+        bundles = bundle_snapshot.load(BUNDLES_DIR)
 
     matched = 0
     would_update = 0
@@ -122,28 +98,21 @@ def main() -> None:
     skipped = 0
 
     matches_preview: List[str] = []
-
-    for bundle_dir in sorted([p for p in BUNDLES_DIR.iterdir() if p.is_dir()]):
-        meta_path = bundle_dir / "extracted" / "extracted_metadata.json"
-        if not meta_path.exists():
+    # (bundle, decision, can_update): journaled as one batch before any metadata changes
+    pending: List[Tuple[bundle_snapshot.Bundle, Dict[str, Any], bool]] = []
+
+    for b in bundles:
+        bundle_dir = b.dir
+        if b.error:
+            die(b.error)
+        if b.meta is None:
             skipped += 1
             continue
 
-        meta = load_json(meta_path)
+        meta = b.meta
         payment = get_payment(meta)
 
-        match_reason = None
-        match_detail: Dict[str, Any] = {}
-
-        for cc in corp_cards:
-            if strong_match_by_last4(payment, cc, policy):
-                match_reason = "card_last4_match"
-                match_detail = {"matched_card_label": cc.get("label",""), "matched_last4": cc.get("last4","")}
-                break
-
-        if not match_reason and corp_addr_needles and match_by_address(payment, corp_addr_needles):
-            match_reason = "billing_address_match"
-            match_detail = {"matched_address_tokens": corp_addr_needles[:3]}
+        match_reason, match_detail = matcher.match(payment)
 
         if not match_reason:
             continue
@@ -170,17 +139,21 @@ def main() -> None:
             f"{bundle_dir.name} reason={match_reason} last4={payment.get('card_last4','')} prev_owner={existing_owner or '∅'} update={'YES' if can_update else 'NO'}"
         )
 
-        if args.dry_run:
-            continue
-
-        # Write decision record always (append-only) when not dry-run
-        write_decision(bundle_dir, decision)
-
-        if can_update:
+        if not dry_run:
+            pending.append((b, decision, can_update))
+
+    journaled = 0
+    if not dry_run:
+        journaled = decision_journal.record(DECISION_FILENAME, [(b.dir, d) for b, d, _ in pending],
+                                            write_views=not journal_only)
+        for b, _, can_update in pending:
+            if not can_update:
+                continue
+            meta = b.meta
             meta["economic_owner"] = "c_corp"
             if "payer" not in meta or norm(meta.get("payer","")) in ("", "tbd", "unknown"):
                 meta["payer"] = "corporate"
-            meta_path.write_text(json.dumps(meta, indent=2) + "\n")
+            b.meta_path.write_text(json.dumps(meta, indent=2) + "\n")
             updated += 1
 
     if matches_preview:
@@ -188,16 +161,25 @@ def main() -> None:
         for line in matches_preview:
             print(" - " + line)
 
-    print("✅ Autofill complete" + (" (dry-run)" if args.dry_run else ""))
+    print("✅ Autofill complete" + (" (dry-run)" if dry_run else ""))
     print(f"- bundles matched: {matched}")
     print(f"- bundles that would update economic_owner: {would_update}")
-    if not args.dry_run:
+    if not dry_run:
         print(f"- bundles updated (economic_owner set): {updated}")
+        print(f"- decisions journaled (new or changed): {journaled}")
     print(f"- bundles skipped (missing metadata): {skipped}")
-    if args.dry_run:
+    if dry_run:
         print("Note: dry-run mode wrote nothing.")
     else:
-        print("Note: decision records written for every match under /decisions/.")
+        print(f"Note: every match is recorded in {decision_journal.JOURNAL_PATH}"
+              + ("." if journal_only else " and under /decisions/."))
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--dry-run", action="store_true", help="Show matches but do not write decisions or modify metadata")
+    ap.add_argument("--journal-only", action="store_true", help="Record decisions in the journal only, not in per-bundle decision files")
+    args = ap.parse_args()
+    autofill(args.dry_run, journal_only=args.journal_only)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Creative-OS Accounting: shared, cached view of every bundle's extracted metadata
+
+status.py, ci_check_economic_owner.py, autofill_economic_owner.py and
+export_2025.py all read the same files:
+  accounting/data/2025/bundles/<id>/extracted/extracted_metadata.json
+
+This module walks the bundles once and keeps the parsed metadata in a local
+snapshot keyed by each file's (size, mtime_ns, inode). Later runs stat every
+file but only re-parse the ones that changed.
+
+Cache (local-only, safe to delete):
+  accounting/data/.local/cache/bundle_snapshot_2025.json
+
+Usage (from the other scripts):
+  import bundle_snapshot
+  for b in bundle_snapshot.load():
+      b.bundle_id, b.dir, b.meta_path, b.meta (None if missing), b.error (bad JSON)
+
+  python3 accounting/scripts/bundle_snapshot.py   # refresh and print counts
+"""
+
+import json
+import os
+import pathlib
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+BUNDLES_DIR = pathlib.Path("accounting/data/2025/bundles")
+CACHE_PATH = pathlib.Path("accounting/data/.local/cache/bundle_snapshot_2025.json")
+META_RELPATH = pathlib.Path("extracted") / "extracted_metadata.json"
+SCHEMA_VERSION = 1
+# a file modified this close to the snapshot may change again without its stat changing: re-parse it next time
+RACY_NS = 2_000_000_000
+
+@dataclass
+class Bundle:
+    bundle_id: str
+    dir: pathlib.Path
+    meta_path: pathlib.Path
+    meta: Optional[Dict[str, Any]]
+    error: Optional[str] = None
+
+    @property
+    def missing(self) -> bool:
+        return self.meta is None and self.error is None
+
+def _stat_key(st: os.stat_result) -> List[int]:
+    return [st.st_size, st.st_mtime_ns, st.st_ino]
+
+def _read_cache(cache_path: pathlib.Path, bundles_dir: pathlib.Path) -> Dict[str, Any]:
+    try:
+        doc = json.loads(cache_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if doc.get("schema_version") != SCHEMA_VERSION or doc.get("bundles_dir") != str(bundles_dir):
+        return {}
+    return doc.get("entries") or {}
+
+def _write_cache(cache_path: pathlib.Path, bundles_dir: pathlib.Path, entries: Dict[str, Any]) -> None:
+    doc = {"schema_version": SCHEMA_VERSION, "bundles_dir": str(bundles_dir), "entries": entries}
+    tmp = cache_path.with_name(f".{cache_path.name}.{os.getpid()}.tmp")
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        # no sort_keys: metadata keeps its key order, so a script that writes it back doesn't reorder the file
+        tmp.write_text(json.dumps(doc) + "\n", encoding="utf-8")
+        os.replace(tmp, cache_path)
+    except OSError:
+        # the cache is an optimization: a read-only checkout still works, just slower
+        tmp.unlink(missing_ok=True)
+
+def load(bundles_dir: pathlib.Path = BUNDLES_DIR, cache_path: pathlib.Path = CACHE_PATH) -> List[Bundle]:
+    """Every bundle dir, sorted by name, with its parsed metadata.
+
+    Metadata that fails to parse is reported through Bundle.error and never
+    cached. The snapshot is saved before returning, so callers may mutate the
+    dicts they get.
+    """
+    cached = _read_cache(cache_path, bundles_dir)
+    entries: Dict[str, Any] = {}
+    out: List[Bundle] = []
+    dirty = False
+    racy_after = time.time_ns() - RACY_NS
+
+    with os.scandir(bundles_dir) as it:
+        dirs = sorted(e.name for e in it if e.is_dir())
+    for name in dirs:
+        d = bundles_dir / name
+        meta_path = d / META_RELPATH
+        try:
+            st = meta_path.stat()
+        except FileNotFoundError:
+            out.append(Bundle(name, d, meta_path, None))
+            continue
+        key = _stat_key(st)
+        hit = cached.get(name)
+        if hit is not None and hit.get("stat") == key and "meta" in hit:
+            meta = hit["meta"]
+        else:
+            dirty = True
+            try:
+                meta = json.loads(meta_path.read_text())
+            except Exception as e:
+                out.append(Bundle(name, d, meta_path, None, f"Failed to read JSON {meta_path}: {e}"))
+                continue
+        out.append(Bundle(name, d, meta_path, meta))
+        entries[name] = {"stat": key, "meta": meta} if st.st_mtime_ns < racy_after else {"stat": key}
+
+    if dirty or set(entries) != set(cached):
+        _write_cache(cache_path, bundles_dir, entries)
+    return out
+
+def main() -> None:
+    if not BUNDLES_DIR.exists():
+        print(f"No bundles directory found at {BUNDLES_DIR}")
+        return
+    t0 = time.monotonic()
+    bundles = load()
+    print(f"Bundle snapshot ({CACHE_PATH})")
+    print(f"- bundles: {len(bundles)}")
+    print(f"- with metadata: {sum(1 for b in bundles if b.meta is not None)}")
+    print(f"- missing metadata: {sum(1 for b in bundles if b.missing)}")
+    print(f"- unreadable metadata: {sum(1 for b in bundles if b.error)}")
+    print(f"- took: {time.monotonic() - t0:.3f}s")
+
+if __name__ == "__main__":
+    main()
@@ -10,12 +10,12 @@ Usage:
   python3 accounting/scripts/ci_check_economic_owner.py
 """
 
-import json
-import pathlib
 import sys
-from typing import Any, Dict
+from typing import Any, List, Optional
 
-BUNDLES_DIR = pathlib.Path("accounting/data/2025/bundles")
+import bundle_snapshot
+
+BUNDLES_DIR = bundle_snapshot.BUNDLES_DIR
 ALLOWED = {"personal", "sole_proprietor", "sole_prop", "c_corp", "corp"}
 BAD = {"", "tbd", "unknown", "unset", "none"}
 
@@ -23,39 +23,35 @@ def die(msg: str) -> None:
     print(f"ERROR: {msg}", file=sys.stderr)
     sys.exit(1)
 
-def load_json(p: pathlib.Path) -> Dict[str, Any]:
-    try:
-        return json.loads(p.read_text())
-    except Exception as e:
-        die(f"Failed to read JSON {p}: {e}")
-    raise RuntimeError
-
 def norm(v: Any) -> str:
     return str(v or "").strip().lower()
 
-def main() -> None:
+def check(bundles: Optional[List[bundle_snapshot.Bundle]] = None) -> None:
+    """Print the verdict; exit 2 if any bundle is unclassified."""
     if not BUNDLES_DIR.exists():
         die(f"Bundles directory not found: {BUNDLES_DIR}")
+    if bundles is None:
+        bundles = bundle_snapshot.load(BUNDLES_DIR)
 
     failures = []
     missing_meta = 0
 
-    for bundle_dir in sorted([p for p in BUNDLES_DIR.iterdir() if p.is_dir()]):
-        meta_path = bundle_dir / "extracted" / "extracted_metadata.json"
-        if not meta_path.exists():
+    for b in bundles:
+        if b.error:
+            die(b.error)
+        if b.meta is None:
             missing_meta += 1
-            failures.append(f"{bundle_dir.name}: missing extracted_metadata.json")
+            failures.append(f"{b.bundle_id}: missing extracted_metadata.json")
             continue
 
-        meta = load_json(meta_path)
-        owner = norm(meta.get("economic_owner", ""))
+        owner = norm(b.meta.get("economic_owner", ""))
 
         if owner in BAD:
-            failures.append(f"{bundle_dir.name}: economic_owner is '{owner or '∅'}'")
+            failures.append(f"{b.bundle_id}: economic_owner is '{owner or '∅'}'")
             continue
 
         if owner not in { "personal", "sole_proprietor", "sole_prop", "c_corp", "corp" }:
-            failures.append(f"{bundle_dir.name}: economic_owner '{owner}' not in allowed set")
+            failures.append(f"{b.bundle_id}: economic_owner '{owner}' not in allowed set")
             continue
 
     if failures:
@@ -70,5 +66,8 @@ def main() -> None:
     if missing_meta:
         print(f"Note: {missing_meta} bundles were missing metadata (would have failed).")
 
+def main() -> None:
+    check()
+
 if __name__ == "__main__":
     main()
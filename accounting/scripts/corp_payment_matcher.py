@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Creative-OS Accounting: corp payment fingerprints compiled for matching
+
+autofill_economic_owner.py asks one question per bundle: does its payment
+match a corp card (last4, optionally brand / billing zip), or else contain a
+corp billing-address token? This module compiles
+CONFIG/corp_payment_fingerprints.json once so each answer costs the same
+however many cards and tokens the config lists:
+
+- corp_cards -> a hash index on normalized last4. Each last4 bucket is
+  sub-indexed by brand and zip, but only as far as match_policy asks for
+  them. A lookup reads at most four dict entries.
+- corp_billing_address_contains -> one Aho-Corasick automaton over the
+  lowercased tokens, run once over the lowercased billing name + address.
+
+The rules are unchanged:
+- The first card in config order that matches wins.
+- A card or payment without a brand/zip passes that check.
+- Empty tokens are ignored.
+- Matching is case-insensitive substring search.
+"""
+
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+def norm(s: Any) -> str:
+    return str(s or "").strip().lower()
+
+class TokenAutomaton:
+    """Aho-Corasick over lowercased tokens: does the text contain any of them?"""
+
+    def __init__(self, tokens: List[str]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.hit: List[bool] = [False]
+        for t in tokens:
+            if not t:
+                continue
+            s = 0
+            for ch in t.lower():
+                nxt = self.goto[s].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[s][ch] = nxt
+                    self.goto.append({})
+                    self.hit.append(False)
+                s = nxt
+            self.hit[s] = True
+        # failure links, breadth first; a state also hits if any suffix of it does
+        self.fail = [0] * len(self.goto)
+        q = deque(self.goto[0].values())
+        while q:
+            s = q.popleft()
+            for ch, nxt in self.goto[s].items():
+                f = self.fail[s]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.hit[nxt] = self.hit[nxt] or self.hit[self.fail[nxt]]
+                q.append(nxt)
+
+    def search(self, text: str) -> bool:
+        goto, fail, hit = self.goto, self.fail, self.hit
+        s = 0
+        for ch in text.lower():
+            while s and ch not in goto[s]:
+                s = fail[s]
+            s = goto[s].get(ch, 0)
+            if hit[s]:
+                return True
+        return False
+
+_ANY = object()
+
+class CorpPaymentMatcher:
+    def __init__(self, cfg: Dict[str, Any]):
+        self.corp_cards = cfg.get("corp_cards", [])
+        self.corp_addr_needles = cfg.get("corp_billing_address_contains", [])
+        policy = cfg.get("match_policy", {})
+        self.by_brand = bool(policy.get("require_brand_if_present"))
+        self.by_zip = bool(policy.get("require_billing_zip_if_present"))
+
+        # last4 -> {("bz", brand key, zip key) | ("b", brand key) | ("z", zip key) | (): first card index}
+        # a None key is a card without that field: it passes whatever the payment says
+        self.last4: Dict[str, Dict[Tuple, int]] = {}
+        for i, cc in enumerate(self.corp_cards or []):
+            bk = norm(cc["brand"]) if self.by_brand and cc.get("brand") else None
+            zk = norm(cc["billing_zip"]) if self.by_zip and cc.get("billing_zip") else None
+            bucket = self.last4.setdefault(norm(cc.get("last4", "")), {})
+            for key in (("bz", bk, zk), ("b", bk), ("z", zk), ()):
+                bucket.setdefault(key, i)
+        self.addresses = TokenAutomaton(list(self.corp_addr_needles or []))
+
+    def _card(self, payment: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if not payment.get("card_last4"):
+            return None
+        bucket = self.last4.get(norm(payment["card_last4"]))
+        if bucket is None:
+            return None
+        pb = norm(payment["card_brand"]) if self.by_brand and payment.get("card_brand") else _ANY
+        pz = norm(payment["billing_zip"]) if self.by_zip and payment.get("billing_zip") else _ANY
+        if pb is _ANY and pz is _ANY:
+            keys = [()]
+        elif pz is _ANY:
+            keys = [("b", pb), ("b", None)]
+        elif pb is _ANY:
+            keys = [("z", pz), ("z", None)]
+        else:
+            keys = [("bz", pb, pz), ("bz", pb, None), ("bz", None, pz), ("bz", None, None)]
+        found = [bucket[k] for k in keys if k in bucket]
+        return self.corp_cards[min(found)] if found else None
+
+    def _address(self, payment: Dict[str, Any]) -> bool:
+        addr_blob = " ".join([payment.get("billing_name",""), payment.get("billing_address","")]).strip()
+        if not addr_blob:
+            return False
+        return self.addresses.search(addr_blob)
+
+    def match(self, payment: Dict[str, Any]) -> Tuple[Optional[str], Dict[str, Any]]:
+        """(reason, detail) for the decision record, or (None, {})."""
+        cc = self._card(payment)
+        if cc is not None:
+            return "card_last4_match", {"matched_card_label": cc.get("label",""), "matched_last4": cc.get("last4","")}
+        if self.corp_addr_needles and self._address(payment):
+            return "billing_address_match", {"matched_address_tokens": self.corp_addr_needles[:3]}
+        return None, {}
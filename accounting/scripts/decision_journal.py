@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""Creative-OS Accounting: year-level append-only decision journal (2025)
+
+Every decision the scripts make (autofill's set_economic_owner, the vendor
+classifier's classify_vendor) is appended to one JSONL file:
+  accounting/data/2025/decision_journal_2025.jsonl
+one record per line: {"seq": n, "view": <per-bundle file name>, <decision fields>}.
+Records are never rewritten; a newer record for the same bundle and view
+supersedes the older one.
+
+After each append the journal is fsync'd, then a small tail pointer is
+replaced atomically:
+  accounting/data/2025/decision_journal_2025.tail.json
+  {"seq", "bytes", "ts", "at", "last": {action: {"seq", "ts", "at"}}}
+Only the first `bytes` bytes of the journal are committed; anything past them
+(a write interrupted before the pointer moved) is cut off by the next append.
+"Has autofill run" and "when was the newest decision" are answered from the
+pointer alone, without walking the bundles.
+
+The per-bundle files (bundles/<id>/decisions/<view>) are a materialized view
+of the latest record per bundle and view. Writers keep them by default;
+`materialize` rebuilds them from the journal. Files written before the
+journal existed are imported (stamped with their mtimes) by the first write
+to an empty journal, so the pointer also covers them.
+
+Usage:
+  python3 accounting/scripts/decision_journal.py               # print the tail pointer
+  python3 accounting/scripts/decision_journal.py materialize   # rewrite per-bundle files from the journal
+  python3 accounting/scripts/decision_journal.py rebuild-tail  # recompute the pointer from the journal
+"""
+
+import argparse
+import fcntl
+import json
+import os
+import pathlib
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import bundle_snapshot
+
+YEAR = "2025"
+BUNDLES_DIR = bundle_snapshot.BUNDLES_DIR
+JOURNAL_PATH = pathlib.Path(f"accounting/data/{YEAR}/decision_journal_{YEAR}.jsonl")
+TAIL_PATH = pathlib.Path(f"accounting/data/{YEAR}/decision_journal_{YEAR}.tail.json")
+SCHEMA_VERSION = 1
+# journal bookkeeping, not part of the decision itself
+RECORD_KEYS = ("seq", "view")
+
+def die(msg: str) -> None:
+    print(f"ERROR: {msg}", file=sys.stderr)
+    sys.exit(1)
+
+def _empty_tail() -> Dict[str, Any]:
+    return {"schema_version": SCHEMA_VERSION, "seq": 0, "bytes": 0, "ts": None, "at": None, "last": {}}
+
+def _note(tail: Dict[str, Any], rec: Dict[str, Any], nbytes: int, ts: float, at: str) -> None:
+    tail["seq"] = rec["seq"]
+    tail["bytes"] += nbytes
+    tail["ts"], tail["at"] = ts, at
+    tail["last"][rec.get("action", "")] = {"seq": rec["seq"], "ts": ts, "at": at}
+
+def _write_tail(tail: Dict[str, Any], tail_path: pathlib.Path) -> None:
+    tmp = tail_path.with_name(f".{tail_path.name}.{os.getpid()}.tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        f.write(json.dumps(tail, indent=2, sort_keys=True) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, tail_path)
+    dfd = os.open(tail_path.parent, os.O_RDONLY)
+    try:
+        os.fsync(dfd)
+    finally:
+        os.close(dfd)
+
+def read_tail(tail_path: pathlib.Path = TAIL_PATH) -> Optional[Dict[str, Any]]:
+    """The tail pointer, or None if there is none (no journal yet, or an unreadable pointer)."""
+    try:
+        tail = json.loads(tail_path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(tail, dict) or tail.get("schema_version") != SCHEMA_VERSION:
+        return None
+    return tail
+
+def _scan(journal_path: pathlib.Path, limit: Optional[int] = None) -> Iterator[Tuple[Dict[str, Any], int]]:
+    """(record, line bytes) for each complete line, up to limit bytes."""
+    try:
+        f = journal_path.open("rb")
+    except FileNotFoundError:
+        return
+    with f:
+        data = f.read() if limit is None else f.read(limit)
+    for line in data.splitlines(keepends=True):
+        if not line.endswith(b"\n"):
+            break  # torn final write
+        try:
+            rec = json.loads(line)
+        except ValueError:
+            break
+        yield rec, len(line)
+
+def rebuild_tail(journal_path: pathlib.Path = JOURNAL_PATH, tail_path: pathlib.Path = TAIL_PATH) -> Dict[str, Any]:
+    """Recompute the pointer from the journal's complete lines and save it."""
+    tail = _empty_tail()
+    for rec, n in _scan(journal_path):
+        _note(tail, rec, n, rec.get("journal_ts"), rec.get("journal_at"))
+    tail_path.parent.mkdir(parents=True, exist_ok=True)
+    _write_tail(tail, tail_path)
+    return tail
+
+def _committed_tail(journal_path: pathlib.Path, tail_path: pathlib.Path) -> Dict[str, Any]:
+    tail = read_tail(tail_path)
+    try:
+        size = journal_path.stat().st_size
+    except FileNotFoundError:
+        size = 0
+    if tail is None or size < tail["bytes"]:
+        # pointer missing or ahead of the journal (journal replaced): the journal is the source of truth
+        return rebuild_tail(journal_path, tail_path) if size else _empty_tail()
+    return tail
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+
+@contextmanager
+def _locked(journal_path: pathlib.Path) -> Iterator[None]:
+    # writers are serialized with a lock file, so two scripts can run at once
+    journal_path.parent.mkdir(parents=True, exist_ok=True)
+    with journal_path.with_name(f".{journal_path.name}.lock").open("a") as lockf:
+        fcntl.flock(lockf.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lockf.fileno(), fcntl.LOCK_UN)
+
+def _write(tail: Dict[str, Any], recs: List[Dict[str, Any]], journal_path: pathlib.Path, tail_path: pathlib.Path) -> List[int]:
+    """Number recs, append them as one fsync'd batch, then move the tail pointer. Caller holds the lock."""
+    committed = tail["bytes"]
+    lines, seqs = [], []
+    for r in recs:
+        rec = {"seq": tail["seq"] + 1, **r}
+        line = (json.dumps(rec) + "\n").encode("utf-8")
+        _note(tail, rec, len(line), rec["journal_ts"], rec["journal_at"])
+        lines.append(line)
+        seqs.append(rec["seq"])
+    with journal_path.open("ab") as f:
+        f.truncate(committed)  # drop an uncommitted tail left by an interrupted append
+        f.write(b"".join(lines))
+        f.flush()
+        os.fsync(f.fileno())
+    _write_tail(tail, tail_path)
+    return seqs
+
+def append(entries: List[Tuple[str, Dict[str, Any]]], journal_path: pathlib.Path = JOURNAL_PATH,
+           tail_path: pathlib.Path = TAIL_PATH) -> List[int]:
+    """Append (view, decision) pairs as one fsync'd batch and move the tail pointer. Returns their seqs."""
+    if not entries:
+        return []
+    now = datetime.now(timezone.utc).timestamp()
+    ts, at = round(now, 6), _iso(now)
+    with _locked(journal_path):
+        tail = _committed_tail(journal_path, tail_path)
+        return _write(tail, [{"view": v, **d, "journal_ts": ts, "journal_at": at} for v, d in entries], journal_path, tail_path)
+
+def seed(bundles_dir: pathlib.Path = BUNDLES_DIR, journal_path: pathlib.Path = JOURNAL_PATH,
+         tail_path: pathlib.Path = TAIL_PATH) -> int:
+    """Import the per-bundle decision files written before the journal existed. Returns records added.
+
+    Runs only while the journal is empty, so it happens once per year. Each
+    file becomes a record stamped with its mtime, oldest first, which makes the
+    tail's newest time and last-per-action match what the files said.
+    """
+    with _locked(journal_path):
+        tail = _committed_tail(journal_path, tail_path)
+        if tail["bytes"] or not bundles_dir.exists():
+            return 0
+        found = []
+        for path in bundles_dir.glob("*/decisions/*.json"):
+            try:
+                decision = json.loads(path.read_text())
+                mtime = path.stat().st_mtime
+            except (OSError, ValueError):
+                continue
+            if isinstance(decision, dict):
+                decision.setdefault("bundle_id", path.parent.parent.name)
+                found.append((mtime, path.parent.parent.name, path.name, decision))
+        found.sort(key=lambda x: x[:3])
+        recs = [{"view": view, **d, "journal_ts": round(mtime, 6), "journal_at": _iso(mtime), "journal_seeded": True}
+                for mtime, _, view, d in found]
+        return len(_write(tail, recs, journal_path, tail_path)) if recs else 0
+
+def records(journal_path: pathlib.Path = JOURNAL_PATH, tail_path: pathlib.Path = TAIL_PATH) -> Iterator[Dict[str, Any]]:
+    """Committed records, oldest first."""
+    tail = read_tail(tail_path)
+    yield from (rec for rec, _ in _scan(journal_path, tail["bytes"] if tail else None))
+
+def decision_of(rec: Dict[str, Any]) -> Dict[str, Any]:
+    """The decision as written to its per-bundle file: the record minus journal bookkeeping."""
+    return {k: v for k, v in rec.items() if k not in RECORD_KEYS and not k.startswith("journal_")}
+
+def latest(view: Optional[str] = None, journal_path: pathlib.Path = JOURNAL_PATH,
+           tail_path: pathlib.Path = TAIL_PATH) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    """(bundle_id, view) -> newest record, optionally for one view only."""
+    out: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for rec in records(journal_path, tail_path):
+        if view is None or rec.get("view") == view:
+            out[(rec.get("bundle_id", ""), rec.get("view", ""))] = rec
+    return out
+
+def same_decision(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    """Equal apart from timestamps and journal bookkeeping."""
+    strip = lambda d: {k: v for k, v in decision_of(d).items() if k != "timestamp"}
+    return strip(a) == strip(b)
+
+def write_view(bundle_dir: pathlib.Path, view: str, decision: Dict[str, Any]) -> None:
+    ddir = bundle_dir / "decisions"
+    ddir.mkdir(exist_ok=True)
+    (ddir / view).write_text(json.dumps(decision_of(decision), indent=2) + "\n")
+
+def record(view: str, decisions: List[Tuple[pathlib.Path, Dict[str, Any]]], write_views: bool = True) -> int:
+    """Journal (bundle_dir, decision) pairs for one view; returns how many were new or changed.
+
+    A decision equal to the bundle's latest journaled one (timestamps aside) is
+    not appended again. The first write to an empty journal seeds it from the
+    per-bundle files already on disk. With write_views, changed decisions, and any whose
+    per-bundle file is missing, are written to bundles/<id>/decisions/<view>.
+    """
+    seed()
+    prev = latest(view)
+    changed = []
+    for bundle_dir, d in decisions:
+        p = prev.get((d["bundle_id"], view))
+        if p is None or not same_decision(p, d):
+            changed.append((bundle_dir, d))
+            prev[(d["bundle_id"], view)] = d
+    append([(view, d) for _, d in changed])
+    if write_views:
+        changed_ids = {id(d) for _, d in changed}
+        for bundle_dir, d in decisions:
+            if id(d) in changed_ids or not (bundle_dir / "decisions" / view).exists():
+                write_view(bundle_dir, view, prev[(d["bundle_id"], view)])
+    return len(changed)
+
+def materialize(bundles_dir: pathlib.Path = BUNDLES_DIR) -> Tuple[int, int]:
+    """Write every bundle's latest decisions to its decisions/ dir. Returns (written, bundles missing)."""
+    written = missing = 0
+    for (bundle_id, view), rec in sorted(latest().items()):
+        bundle_dir = bundles_dir / bundle_id
+        if not bundle_id or not view or not bundle_dir.is_dir():
+            missing += 1
+            continue
+        write_view(bundle_dir, view, rec)
+        written += 1
+    return written, missing
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("command", nargs="?", choices=["tail", "materialize", "rebuild-tail"], default="tail")
+    args = ap.parse_args()
+    if args.command == "materialize":
+        if not BUNDLES_DIR.exists():
+            die(f"Bundles directory not found: {BUNDLES_DIR} (run from repo root or update paths)")
+        written, missing = materialize()
+        print("✅ Decision files materialized from journal")
+        print(f"- per-bundle decision files written: {written}")
+        print(f"- records for missing bundles: {missing}")
+        return
+    tail = rebuild_tail() if args.command == "rebuild-tail" else read_tail()
+    if tail is None:
+        print(f"No decision journal tail at {TAIL_PATH}")
+        return
+    print(f"Decision journal ({JOURNAL_PATH})")
+    print(f"- records: {tail['seq']}")
+    print(f"- committed bytes: {tail['bytes']}")
+    print(f"- newest: {tail['at'] or '∅'}")
+    for action, last in sorted(tail["last"].items()):
+        print(f"- last {action}: seq {last['seq']} at {last['at'] or '∅'}")
+
+if __name__ == "__main__":
+    main()
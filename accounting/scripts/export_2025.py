@@ -23,16 +23,25 @@ This script:
 - never mutates evidence
 - fails loudly on missing required fields
 - writes boring CSVs that map cleanly to filing / handoff tasks
+- is incremental: rows are cached per bundle by metadata hash
+  (accounting/data/.local/cache/export_rows_2025.json), and a CSV whose
+  content is unchanged is not rewritten, so its mtime stays put
 """
 
 import csv
+import hashlib
+import io
 import json
+import os
 import pathlib
 import sys
-from typing import Any, Dict, List
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import bundle_snapshot
 
 YEAR = "2025"
-BASE = pathlib.Path("accounting/data/2025/bundles")  # run from repo root or update
+BASE = bundle_snapshot.BUNDLES_DIR  # run from repo root or update
 EXPORT_DIR = pathlib.Path("accounting/data/2025/exports")
 
 REQ = [
@@ -44,6 +53,27 @@ REQ = [
     "date",
 ]
 
+# row cache: bundle_id -> rows derived from it, keyed by a hash of its metadata (local-only, safe to delete)
+ROW_CACHE_PATH = pathlib.Path("accounting/data/.local/cache/export_rows_2025.json")
+# touched by every successful export, changed CSVs or not: the shell compares it against the newest metadata/decision
+EXPORTS_STAMP_PATH = pathlib.Path("accounting/data/.local/cache/exports_2025.stamp")
+# bump when derive_rows changes what it produces
+ROWS_VERSION = 1
+
+EXPORTS = [
+    ("schedule_c", f"schedule_c_expenses_{YEAR}.csv",
+     ["date","vendor","amount","category","description","evidence_path"]),
+    ("corp_reimbursable", f"corp_reimbursable_expenses_{YEAR}.csv",
+     ["date","vendor","amount","category","description","evidence_path","reimbursement_status"]),
+    ("sole_prop_assets_retained", f"sole_prop_assets_retained_{YEAR}.csv",
+     ["asset_id","description","purchase_date","original_cost","category","evidence_path","serial","location"]),
+    ("sole_prop_assets_for_sale", "sole_prop_assets_for_sale_2026.csv",
+     ["asset_id","description","purchase_date","original_cost","adjusted_basis_2025","proposed_fmv_2026","category","evidence_path","serial","location"]),
+    ("corp_asset_intake", "corp_asset_intake_2026.csv",
+     ["corp_asset_id","source_asset_id","acquisition_type","acquisition_date","vendor_or_source","description","purchase_price_2026","original_purchase_date","category","serial","location","evidence_path"]),
+]
+ROW_KEYS = [k for k, _, _ in EXPORTS]
+
 VALID_ECON_OWNERS = {"personal", "sole_proprietor", "sole_prop", "c_corp", "corp"}
 VALID_TREATMENT = {"expense", "asset"}
 
@@ -51,13 +81,6 @@ def die(msg: str) -> None:
     print(f"ERROR: {msg}", file=sys.stderr)
     sys.exit(1)
 
-def load_json(p: pathlib.Path) -> Dict[str, Any]:
-    try:
-        return json.loads(p.read_text())
-    except Exception as e:
-        die(f"Failed to read JSON {p}: {e}")
-    raise RuntimeError
-
 def norm_owner(v: Any) -> str:
     s = str(v).strip().lower()
     if s == "sole_prop":
@@ -93,141 +116,197 @@ def ensure_required(bundle_id: str, d: Dict[str, Any]) -> None:
 def amount(x: Any) -> float:
     return round(float(x), 2)
 
-def write_csv(path: str, rows: List[Dict[str, Any]], fieldnames: List[str]) -> None:
+def write_csv(path: str, rows: List[Dict[str, Any]], fieldnames: List[str]) -> bool:
+    """Write the CSV unless the file already holds exactly this content. Returns True if written."""
+    buf = io.StringIO(newline="")
+    w = csv.DictWriter(buf, fieldnames=fieldnames)
+    w.writeheader()
+    for r in rows:
+        w.writerow({k: r.get(k, "") for k in fieldnames})
+    data = buf.getvalue().encode("utf-8")
     out_path = pathlib.Path(path)
+    try:
+        if hashlib.sha256(out_path.read_bytes()).digest() == hashlib.sha256(data).digest():
+            return False
+    except FileNotFoundError:
+        pass
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    with out_path.open("w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=fieldnames)
-        w.writeheader()
-        for r in rows:
-            w.writerow({k: r.get(k, "") for k in fieldnames})
+    tmp = out_path.with_name(f".{out_path.name}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, out_path)
+    return True
 
-def main() -> None:
-    if not BASE.exists():
-        die(f"Bundles directory not found: {BASE} (run from repo root or update BASE)")
+def meta_key(bundle_dir: pathlib.Path, d: Dict[str, Any]) -> str:
+    h = hashlib.sha256(json.dumps({"dir": str(bundle_dir), "meta": d}, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
 
+def read_row_cache() -> Dict[str, Any]:
+    try:
+        doc = json.loads(ROW_CACHE_PATH.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if doc.get("rows_version") != ROWS_VERSION:
+        return {}
+    return doc.get("entries") or {}
+
+def write_row_cache(entries: Dict[str, Any]) -> None:
+    try:
+        ROW_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        tmp = ROW_CACHE_PATH.with_name(f".{ROW_CACHE_PATH.name}.tmp")
+        tmp.write_text(json.dumps({"rows_version": ROWS_VERSION, "entries": entries}, sort_keys=True) + "\n", encoding="utf-8")
+        os.replace(tmp, ROW_CACHE_PATH)
+    except OSError:
+        pass  # cache only: the next run re-derives
+
+def write_stamp() -> None:
+    EXPORTS_STAMP_PATH.parent.mkdir(parents=True, exist_ok=True)
+    EXPORTS_STAMP_PATH.write_text(datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ") + "\n")
+
+def derive_rows(bundle_id: str, bundle_dir: pathlib.Path, d: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+    """Rows one bundle contributes to each export, by ROW_KEYS. Depends only on its arguments."""
     schedule_c_rows: List[Dict[str, Any]] = []
     corp_reimb_rows: List[Dict[str, Any]] = []
     sole_assets_keep: List[Dict[str, Any]] = []
     sole_assets_sale: List[Dict[str, Any]] = []
     corp_asset_intake_2026: List[Dict[str, Any]] = []
 
-    for bundle_dir in sorted([p for p in BASE.iterdir() if p.is_dir()]):
-        bundle_id = bundle_dir.name
-        meta_path = bundle_dir / "extracted" / "extracted_metadata.json"
-        if not meta_path.exists():
-            die(f"Missing extracted_metadata.json for bundle {bundle_id}: {meta_path}")
-
-        d = load_json(meta_path)
-        ensure_required(bundle_id, d)
-
-        owner = norm_owner(d["economic_owner"])
-        tr = str(d["treatment"]).strip().lower()
-        cat = d["category"]
-        dt = d["date"]
-        amt = amount(d["total_amount"])
-
-        intended = str(d.get("intended_disposition", "tbd")).strip().lower()
-        vendor = d.get("vendor", "")
-        desc = d.get("description", "")
-
-        evidence_path = str(bundle_dir)
-
-        # --- Schedule C expenses (personal return) ---
-        # Include ONLY sole proprietor + expense
-        if owner == "sole_proprietor" and tr == "expense":
-            schedule_c_rows.append({
-                "date": dt,
-                "vendor": vendor,
-                "amount": amt,
-                "category": cat,
-                "description": desc,
-                "evidence_path": evidence_path,
-            })
-
-        # --- Corp reimbursable expenses (paid personally, owned economically by corp) ---
-        # Not deductible personally.
-        if owner == "c_corp" and tr == "expense" and intended in ("reimburse", "reimbursable", "tbd"):
-            corp_reimb_rows.append({
-                "date": dt,
-                "vendor": vendor,
-                "amount": amt,
-                "category": cat,
-                "description": desc,
-                "evidence_path": evidence_path,
-                "reimbursement_status": d.get("reimbursement_status", "tbd"),
-            })
-
-        # --- Sole-prop assets retained ---
-        if owner == "sole_proprietor" and tr == "asset" and intended in ("retain", "keep", "tbd"):
-            sole_assets_keep.append({
-                "asset_id": bundle_id,
-                "description": desc,
-                "purchase_date": dt,
-                "original_cost": amt,
-                "category": cat,
-                "evidence_path": evidence_path,
-                "serial": d.get("serial", ""),
-                "location": d.get("location", ""),
-            })
-
-        # --- Sole-prop assets intended for sale to corp in 2026 ---
-        if owner == "sole_proprietor" and tr == "asset" and intended in ("sell_to_c_corp", "sell", "transfer_to_c_corp"):
-            adj_basis = d.get("adjusted_basis_2025", "")  # leave blank unless you compute/decide
-            sole_assets_sale.append({
-                "asset_id": bundle_id,
-                "description": desc,
-                "purchase_date": dt,
-                "original_cost": amt,
-                "adjusted_basis_2025": adj_basis,
-                "proposed_fmv_2026": d.get("proposed_fmv_2026", ""),
-                "category": cat,
-                "evidence_path": evidence_path,
-                "serial": d.get("serial", ""),
-                "location": d.get("location", ""),
-            })
-
-            # Draft corp intake row (corp side) — can be copied into 2026 corp books
-            corp_asset_intake_2026.append({
-                "corp_asset_id": f"corp-{bundle_id}",
-                "source_asset_id": bundle_id,
-                "acquisition_type": "purchase_from_founder",
-                "acquisition_date": d.get("proposed_sale_date_2026", ""),
-                "vendor_or_source": "founder",
-                "description": desc,
-                "purchase_price_2026": d.get("proposed_fmv_2026", ""),
-                "original_purchase_date": dt,
-                "category": cat,
-                "serial": d.get("serial", ""),
-                "location": d.get("location", ""),
-                "evidence_path": evidence_path,
-            })
-
-        # NOTE: c_corp assets purchased directly in 2025 are intentionally excluded from personal exports.
-        # If you want a corp-side 2025 asset register export, generate it from corp accounting, not this repo.
-
-    # Write outputs (even if empty, write headers to be predictable)
-    write_csv(str(EXPORT_DIR / f"schedule_c_expenses_{YEAR}.csv"), schedule_c_rows,
-              ["date","vendor","amount","category","description","evidence_path"])
-
-    write_csv(str(EXPORT_DIR / f"corp_reimbursable_expenses_{YEAR}.csv"), corp_reimb_rows,
-              ["date","vendor","amount","category","description","evidence_path","reimbursement_status"])
-
-    write_csv(str(EXPORT_DIR / f"sole_prop_assets_retained_{YEAR}.csv"), sole_assets_keep,
-              ["asset_id","description","purchase_date","original_cost","category","evidence_path","serial","location"])
-
-    write_csv(str(EXPORT_DIR / "sole_prop_assets_for_sale_2026.csv"), sole_assets_sale,
-              ["asset_id","description","purchase_date","original_cost","adjusted_basis_2025","proposed_fmv_2026","category","evidence_path","serial","location"])
-
-    write_csv(str(EXPORT_DIR / "corp_asset_intake_2026.csv"), corp_asset_intake_2026,
-              ["corp_asset_id","source_asset_id","acquisition_type","acquisition_date","vendor_or_source","description","purchase_price_2026","original_purchase_date","category","serial","location","evidence_path"])
+    owner = norm_owner(d["economic_owner"])
+    tr = str(d["treatment"]).strip().lower()
+    cat = d["category"]
+    dt = d["date"]
+    amt = amount(d["total_amount"])
+
+    intended = str(d.get("intended_disposition", "tbd")).strip().lower()
+    vendor = d.get("vendor", "")
+    desc = d.get("description", "")
+
+    evidence_path = str(bundle_dir)
+
+    # --- Schedule C expenses (personal return) ---
+    # Include ONLY sole proprietor + expense
+    if owner == "sole_proprietor" and tr == "expense":
+        schedule_c_rows.append({
+            "date": dt,
+            "vendor": vendor,
+            "amount": amt,
+            "category": cat,
+            "description": desc,
+            "evidence_path": evidence_path,
+        })
+
+    # --- Corp reimbursable expenses (paid personally, owned economically by corp) ---
+    # Not deductible personally.
+    if owner == "c_corp" and tr == "expense" and intended in ("reimburse", "reimbursable", "tbd"):
+        corp_reimb_rows.append({
+            "date": dt,
+            "vendor": vendor,
+            "amount": amt,
+            "category": cat,
+            "description": desc,
+            "evidence_path": evidence_path,
+            "reimbursement_status": d.get("reimbursement_status", "tbd"),
+        })
+
+    # --- Sole-prop assets retained ---
+    if owner == "sole_proprietor" and tr == "asset" and intended in ("retain", "keep", "tbd"):
+        sole_assets_keep.append({
+            "asset_id": bundle_id,
+            "description": desc,
+            "purchase_date": dt,
+            "original_cost": amt,
+            "category": cat,
+            "evidence_path": evidence_path,
+            "serial": d.get("serial", ""),
+            "location": d.get("location", ""),
+        })
+
+    # --- Sole-prop assets intended for sale to corp in 2026 ---
+    if owner == "sole_proprietor" and tr == "asset" and intended in ("sell_to_c_corp", "sell", "transfer_to_c_corp"):
+        adj_basis = d.get("adjusted_basis_2025", "")  # leave blank unless you compute/decide
+        sole_assets_sale.append({
+            "asset_id": bundle_id,
+            "description": desc,
+            "purchase_date": dt,
+            "original_cost": amt,
+            "adjusted_basis_2025": adj_basis,
+            "proposed_fmv_2026": d.get("proposed_fmv_2026", ""),
+            "category": cat,
+            "evidence_path": evidence_path,
+            "serial": d.get("serial", ""),
+            "location": d.get("location", ""),
+        })
+
+        # Draft corp intake row (corp side) — can be copied into 2026 corp books
+        corp_asset_intake_2026.append({
+            "corp_asset_id": f"corp-{bundle_id}",
+            "source_asset_id": bundle_id,
+            "acquisition_type": "purchase_from_founder",
+            "acquisition_date": d.get("proposed_sale_date_2026", ""),
+            "vendor_or_source": "founder",
+            "description": desc,
+            "purchase_price_2026": d.get("proposed_fmv_2026", ""),
+            "original_purchase_date": dt,
+            "category": cat,
+            "serial": d.get("serial", ""),
+            "location": d.get("location", ""),
+            "evidence_path": evidence_path,
+        })
+
+    # NOTE: c_corp assets purchased directly in 2025 are intentionally excluded from personal exports.
+    # If you want a corp-side 2025 asset register export, generate it from corp accounting, not this repo.
+
+    return {
+        "schedule_c": schedule_c_rows,
+        "corp_reimbursable": corp_reimb_rows,
+        "sole_prop_assets_retained": sole_assets_keep,
+        "sole_prop_assets_for_sale": sole_assets_sale,
+        "corp_asset_intake": corp_asset_intake_2026,
+    }
+
+def export(bundles: Optional[List[bundle_snapshot.Bundle]] = None) -> None:
+    """Write the five CSVs from bundles (default: the current snapshot)."""
+    if not BASE.exists():
+        die(f"Bundles directory not found: {BASE} (run from repo root or update BASE)")
+    if bundles is None:
+        bundles = bundle_snapshot.load(BASE)
+
+    cached = read_row_cache()
+    entries: Dict[str, Any] = {}
+    out: Dict[str, List[Dict[str, Any]]] = {k: [] for k in ROW_KEYS}
+
+    for b in bundles:
+        bundle_id, bundle_dir = b.bundle_id, b.dir
+        if b.error:
+            die(b.error)
+        if b.meta is None:
+            die(f"Missing extracted_metadata.json for bundle {bundle_id}: {b.meta_path}")
+
+        d = b.meta
+        key = meta_key(bundle_dir, d)
+        hit = cached.get(bundle_id)
+        if hit is not None and hit.get("key") == key:
+            rows = hit["rows"]
+        else:
+            ensure_required(bundle_id, d)
+            rows = derive_rows(bundle_id, bundle_dir, d)
+        entries[bundle_id] = {"key": key, "rows": rows}
+        for k in ROW_KEYS:
+            out[k].extend(rows[k])
+
+    if entries != cached:
+        write_row_cache(entries)
+
+    # Write outputs (even if empty, write headers to be predictable); unchanged files keep their mtime
+    for key, name, fieldnames in EXPORTS:
+        write_csv(str(EXPORT_DIR / name), out[key], fieldnames)
+    write_stamp()
 
     print("✅ Exports generated:")
-    print(f"- accounting/data/2025/exports/schedule_c_expenses_{YEAR}.csv ({len(schedule_c_rows)} rows)")
-    print(f"- accounting/data/2025/exports/corp_reimbursable_expenses_{YEAR}.csv ({len(corp_reimb_rows)} rows)")
-    print(f"- accounting/data/2025/exports/sole_prop_assets_retained_{YEAR}.csv ({len(sole_assets_keep)} rows)")
-    print(f"- accounting/data/2025/exports/sole_prop_assets_for_sale_2026.csv ({len(sole_assets_sale)} rows)")
-    print(f"- accounting/data/2025/exports/corp_asset_intake_2026.csv ({len(corp_asset_intake_2026)} rows)")
+    for key, name, _ in EXPORTS:
+        print(f"- accounting/data/2025/exports/{name} ({len(out[key])} rows)")
+
+def main() -> None:
+    export()
 
 if __name__ == "__main__":
     main()
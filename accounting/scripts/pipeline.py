@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""Creative-OS Accounting: autofill -> classify -> CI -> exports in one process (make all)
+
+Same steps, output and exit codes as running
+  autofill_economic_owner.py, vendor_classifier.py, ci_check_economic_owner.py,
+  export_2025.py
+one after another, but bundles are loaded once (through the bundle_snapshot
+cache). Autofill updates the in-memory metadata as well as the files on disk,
+so the later steps see its changes without re-reading them.
+
+Exit codes:
+  0  exports written
+  1  a step failed (missing config/bundles, bad metadata)
+  2  CI gate failed (economic_owner not fully classified); no exports written
+
+Usage:
+  python3 accounting/scripts/pipeline.py
+"""
+
+import autofill_economic_owner
+import bundle_snapshot
+import ci_check_economic_owner
+import export_2025
+import vendor_classifier
+
+def main() -> None:
+    bundles = bundle_snapshot.load() if bundle_snapshot.BUNDLES_DIR.exists() else None
+    autofill_economic_owner.autofill(dry_run=False, bundles=bundles)
+    vendor_classifier.run(dry_run=False, bundles=bundles)
+    ci_check_economic_owner.check(bundles)
+    export_2025.export(bundles)
+
+if __name__ == "__main__":
+    main()
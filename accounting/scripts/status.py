@@ -6,13 +6,15 @@ Usage:
 
 Reads:
   accounting/data/2025/bundles/<id>/extracted/extracted_metadata.json
+  (through the bundle_snapshot cache)
 """
 
-import json
-import pathlib
+import sys
 from collections import Counter, defaultdict
 
-BUNDLES_DIR = pathlib.Path("accounting/data/2025/bundles")
+import bundle_snapshot
+
+BUNDLES_DIR = bundle_snapshot.BUNDLES_DIR
 
 def norm(v):
     return str(v or "").strip().lower()
@@ -28,13 +30,15 @@ def main():
         print(f"No bundles directory found at {BUNDLES_DIR}")
         return
 
-    for b in sorted([p for p in BUNDLES_DIR.iterdir() if p.is_dir()]):
-        meta_path = b / "extracted" / "extracted_metadata.json"
-        if not meta_path.exists():
+    for b in bundle_snapshot.load(BUNDLES_DIR):
+        if b.error:
+            print(f"ERROR: {b.error}", file=sys.stderr)
+            sys.exit(1)
+        if b.meta is None:
             missing += 1
             continue
         total += 1
-        meta = json.loads(meta_path.read_text())
+        meta = b.meta
         o = norm(meta.get("economic_owner", "")) or "∅"
         t = norm(meta.get("treatment", "")) or "∅"
         owners[o] += 1
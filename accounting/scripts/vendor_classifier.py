@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""Creative-OS Accounting: Vendor auto-classifier (domain rules)
+
+Implements the "Rules (Domains)" tables of
+accounting/scripts/VENDOR_AUTO_CLASSIFIER_TABLE.md as a deterministic first
+pass. The table is compiled into a trie over reversed domain labels
+(com -> openai), so a lookup costs one step per label of the vendor domain
+however many rules there are:
+- a rule matches its domain and every subdomain (api.openai.com -> openai.com);
+- the most specific rule wins;
+- `name.*` rules (godox.*) match name under any top-level domain (godox.com,
+  godox.de) or a known two-label public suffix (godox.co.uk), never under
+  another registrable domain (godox.evil.com), and only when no exact rule
+  matches.
+
+Every bundle's vendor domain is classified in one batch (each distinct domain
+once). Each match is recorded in the decision journal (decision_journal.py)
+and, unless --journal-only, next to auto_owner_from_payment.json:
+  bundles/<id>/decisions/auto_vendor_classification.json
+with category, asset_candidate_hint (false | ambiguous | threshold) and the
+rule that matched. An unchanged classification is not recorded again, so
+re-runs don't make exports look stale. Metadata is never modified: unmatched
+or needs_item_parse bundles go to human triage.
+
+Vendor domain, first found of:
+  vendor_domain, vendor_email, from, sender, sources[].from / sources[].sender, vendor
+(an email address or URL is reduced to its host; vendor only counts if it looks like a domain)
+
+Usage:
+  python3 accounting/scripts/vendor_classifier.py            # write decisions, print stats
+  python3 accounting/scripts/vendor_classifier.py --dry-run  # stats only
+  python3 accounting/scripts/vendor_classifier.py --json     # stats as JSON
+  python3 accounting/scripts/vendor_classifier.py --journal-only  # no per-bundle decision files
+"""
+
+import argparse
+import json
+import pathlib
+import re
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import bundle_snapshot
+import decision_journal
+
+BUNDLES_DIR = bundle_snapshot.BUNDLES_DIR
+TABLE_PATH = pathlib.Path(__file__).with_name("VENDOR_AUTO_CLASSIFIER_TABLE.md")
+DECISION_FILENAME = "auto_vendor_classification.json"
+RULES_HEADING = "## Rules (Domains)"
+HINTS = {"no": "false", "ambiguous": "ambiguous", "threshold": "threshold"}
+DOMAIN_KEYS = ["vendor_domain", "vendor_email", "from", "sender"]
+# two-label public suffixes a trailing `*` may stand for, besides any single TLD
+PUBLIC_SUFFIXES_2 = frozenset({
+    "co.uk", "org.uk", "ac.uk", "gov.uk", "me.uk", "ltd.uk", "plc.uk",
+    "com.au", "net.au", "org.au", "co.nz", "org.nz",
+    "co.jp", "ne.jp", "or.jp", "co.kr", "or.kr",
+    "com.cn", "com.hk", "com.tw", "com.sg", "com.my", "co.in", "co.id", "co.th",
+    "com.br", "com.mx", "com.ar", "com.co", "co.za", "com.tr",
+})
+
+_LABEL_RE = re.compile(r"^[a-z0-9]([a-z0-9-]*[a-z0-9])?$")
+_DOMAIN_RE = re.compile(r"^([a-z0-9]([a-z0-9-]*[a-z0-9])?\.)+[a-z]{2,}$")
+
+def die(msg: str) -> None:
+    print(f"ERROR: {msg}", file=sys.stderr)
+    sys.exit(1)
+
+def parse_table(text: str) -> List[Dict[str, Any]]:
+    """Rules from the markdown tables under RULES_HEADING, in table order."""
+    rules: List[Dict[str, Any]] = []
+    in_rules = False
+    section = ""
+    for n, line in enumerate(text.splitlines(), 1):
+        s = line.strip()
+        if s.startswith("## "):
+            in_rules = s == RULES_HEADING
+            continue
+        if not in_rules:
+            continue
+        if s.startswith("### "):
+            section = s[4:].strip()
+            continue
+        if not s.startswith("|"):
+            continue
+        cells = [c.strip() for c in s.strip("|").split("|")]
+        if len(cells) < 4 or cells[0].lower() == "domain match" or set(cells[0]) <= set("-: "):
+            continue
+        domains, category, hint, notes = cells[0], cells[1], cells[2], cells[3]
+        if hint.lower() not in HINTS:
+            raise ValueError(f"line {n}: asset candidate must be No, Ambiguous or Threshold (got {hint!r})")
+        # "cursor.sh / cursor.com", "microsoft.com (Azure)"
+        for d in re.sub(r"\(.*?\)", "", domains).split("/"):
+            pattern = d.strip().lower()
+            labels = pattern.split(".")
+            if len(labels) < 2 or not all(_LABEL_RE.match(l) for l in labels[:-1]) or not (labels[-1] == "*" or _LABEL_RE.match(labels[-1])):
+                raise ValueError(f"line {n}: bad domain pattern {d.strip()!r}")
+            rules.append({"pattern": pattern, "section": section, "category": category,
+                          "asset_candidate_hint": HINTS[hint.lower()], "notes": notes})
+    if not rules:
+        raise ValueError(f"no rules found under '{RULES_HEADING}'")
+    return rules
+
+class DomainTrie:
+    """Reversed-label trie: rules at nodes, looked up by walking the domain's labels right to left."""
+
+    def __init__(self, rules: List[Dict[str, Any]]):
+        self.root: Dict[str, Any] = {}
+        self.wild: Dict[str, Any] = {}
+        for r in rules:
+            labels = r["pattern"].split(".")
+            node, labels = (self.wild, labels[:-1]) if labels[-1] == "*" else (self.root, labels)
+            for label in reversed(labels):
+                node = node.setdefault(label, {})
+            node.setdefault("", r)  # first row for a pattern wins
+
+    @staticmethod
+    def _walk(node: Dict[str, Any], labels: List[str]) -> Tuple[Optional[Dict[str, Any]], int]:
+        best, depth = None, 0
+        for i, label in enumerate(labels):
+            node = node.get(label)
+            if node is None:
+                break
+            if "" in node:
+                best, depth = node[""], i + 1
+        return best, depth
+
+    def lookup(self, domain: str) -> Optional[Dict[str, Any]]:
+        labels = domain.split(".")[::-1]
+        rule, _ = self._walk(self.root, labels)
+        if rule is not None or not self.wild:
+            return rule
+        # labels is reversed: skip the TLD, or a public suffix like co.uk
+        skips = [1] + ([2] if len(labels) > 2 and f"{labels[1]}.{labels[0]}" in PUBLIC_SUFFIXES_2 else [])
+        best, best_depth = None, 0
+        for skip in skips:
+            r, depth = self._walk(self.wild, labels[skip:])
+            if r is not None and depth > best_depth:
+                best, best_depth = r, depth
+        return best
+
+def domain_of(value: Any) -> str:
+    """Host part of an email address, URL or bare domain; '' if there is none."""
+    if not value:
+        return ""
+    s = str(value).strip().lower()
+    if "@" in s:
+        s = s.rsplit("@", 1)[1]
+    s = re.sub(r"^[a-z][a-z0-9+.-]*://", "", s)
+    s = re.split(r"[/:?#>\s]", s, 1)[0].strip(".")
+    if s.startswith("www."):
+        s = s[4:]
+    return s if _DOMAIN_RE.match(s) else ""
+
+def vendor_domain(meta: Dict[str, Any]) -> str:
+    for k in DOMAIN_KEYS:
+        d = domain_of(meta.get(k))
+        if d:
+            return d
+    for src in meta.get("sources") or []:
+        if isinstance(src, dict):
+            d = domain_of(src.get("from")) or domain_of(src.get("sender"))
+            if d:
+                return d
+    vendor = str(meta.get("vendor") or "")
+    return domain_of(vendor) if " " not in vendor.strip() else ""
+
+def classify(bundles: List[bundle_snapshot.Bundle], trie: DomainTrie) -> Tuple[Dict[str, Tuple[str, Optional[Dict[str, Any]]]], Dict[str, Any]]:
+    """bundle_id -> (domain, rule or None) for bundles with metadata, and match statistics."""
+    t0 = time.perf_counter()
+    domains = {b.bundle_id: vendor_domain(b.meta) for b in bundles if b.meta is not None}
+    t1 = time.perf_counter()
+    rules = {d: trie.lookup(d) for d in set(domains.values()) if d}
+    t2 = time.perf_counter()
+    out = {bid: (d, rules.get(d)) for bid, d in domains.items()}
+
+    matched = [r for _, r in out.values() if r is not None]
+    unmatched = Counter(d for d, r in out.values() if d and r is None)
+    stats = {
+        "bundles": len(bundles),
+        "with_metadata": len(domains),
+        "no_domain": sum(1 for d in domains.values() if not d),
+        "matched": len(matched),
+        "unmatched": sum(unmatched.values()),
+        "distinct_domains": len(rules),
+        "wildcard_matches": sum(1 for r in matched if r["pattern"].endswith(".*")),
+        "by_category": dict(Counter(r["category"] for r in matched).most_common()),
+        "by_asset_candidate_hint": dict(Counter(r["asset_candidate_hint"] for r in matched).most_common()),
+        "by_rule": dict(Counter(r["pattern"] for r in matched).most_common()),
+        "top_unmatched_domains": dict(unmatched.most_common(10)),
+        "seconds": {"extract_domains": round(t1 - t0, 6), "lookup": round(t2 - t1, 6)},
+    }
+    return out, stats
+
+def _decision(bundle_id: str, domain: str, rule: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "bundle_id": bundle_id,
+        "action": "classify_vendor",
+        "reason": "vendor_domain_match",
+        "vendor_domain": domain,
+        "matched_rule": rule["pattern"],
+        "rule_section": rule["section"],
+        "category": rule["category"],
+        "asset_candidate_hint": rule["asset_candidate_hint"],
+        "notes": rule["notes"],
+        "table": TABLE_PATH.name,
+    }
+
+def run(dry_run: bool, as_json: bool = False, bundles: Optional[List[bundle_snapshot.Bundle]] = None,
+        journal_only: bool = False) -> Dict[str, Any]:
+    if not BUNDLES_DIR.exists():
+        die(f"Bundles directory not found: {BUNDLES_DIR} (run from repo root or update paths)")
+    try:
+        trie = DomainTrie(parse_table(TABLE_PATH.read_text(encoding="utf-8")))
+    except (OSError, ValueError) as e:
+        die(f"Failed to load {TABLE_PATH}: {e}")
+    if bundles is None:
+        bundles = bundle_snapshot.load(BUNDLES_DIR)
+    for b in bundles:
+        if b.error:
+            die(b.error)
+
+    results, stats = classify(bundles, trie)
+    written = 0
+    if not dry_run:
+        dirs = {b.bundle_id: b.dir for b in bundles}
+        written = decision_journal.record(
+            DECISION_FILENAME,
+            [(dirs[bid], _decision(bid, domain, rule)) for bid, (domain, rule) in sorted(results.items()) if rule is not None],
+            write_views=not journal_only)
+    stats["decisions_journaled"] = written
+
+    if as_json:
+        print(json.dumps(stats, indent=2, sort_keys=True))
+        return stats
+    print("✅ Vendor classification complete" + (" (dry-run)" if dry_run else ""))
+    print(f"- bundles with metadata: {stats['with_metadata']}")
+    print(f"- matched by domain rule: {stats['matched']} ({stats['wildcard_matches']} via wildcard)")
+    print(f"- unmatched domain: {stats['unmatched']}")
+    print(f"- no vendor domain found: {stats['no_domain']}")
+    if not dry_run:
+        print(f"- decisions journaled (new or changed): {written}")
+    if stats["by_category"]:
+        print("\nBy category:")
+        for k, v in stats["by_category"].items():
+            print(f"  {k:40} {v}")
+    if stats["top_unmatched_domains"]:
+        print("\nTop unmatched domains (human triage):")
+        for k, v in stats["top_unmatched_domains"].items():
+            print(f"  {k:40} {v}")
+    print(f"\nLookup: {stats['distinct_domains']} distinct domains in {stats['seconds']['lookup']:.3f}s")
+    return stats
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--dry-run", action="store_true", help="Classify and print stats; write no decision records")
+    ap.add_argument("--json", action="store_true", help="Print match statistics as JSON")
+    ap.add_argument("--journal-only", action="store_true", help="Record decisions in the journal only, not in per-bundle decision files")
+    args = ap.parse_args()
+    run(args.dry_run, as_json=args.json, journal_only=args.journal_only)
+
+if __name__ == "__main__":
+    main()
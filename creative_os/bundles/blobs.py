@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+from creative_os.bundles import fsutil
+
+FILES_FILENAME = "files.v1.json"
+
+def objects_root(vault: Path) -> Path:
+    return vault / "objects" / "sha256"
+
+def blob_path(vault: Path, sha256: str) -> Path:
+    return objects_root(vault) / sha256[:2] / sha256
+
+def has_blob(vault: Path, sha256: str, size: Optional[int] = None) -> bool:
+    try:
+        st = blob_path(vault, sha256).stat()
+    except FileNotFoundError:
+        return False
+    return size is None or st.st_size == size
+
+def put_stream(vault: Path, src: BinaryIO, expected_sha256: Optional[str] = None) -> tuple[str, int, bool]:
+    """Store a stream as a blob. Returns (sha256, bytes, created).
+
+    The stream is hashed while written to a temp file and only renamed into place
+    once complete, so a partially written blob is never visible. Blobs are made
+    read-only: they are shared by every bundle that references them.
+    """
+    tmp_dir = vault / "objects" / "tmp"
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    tmp = tmp_dir / f"{os.getpid()}.{threading.get_ident()}.{os.urandom(4).hex()}"
+    h = hashlib.sha256()
+    n = 0
+    try:
+        with tmp.open("wb") as f:
+            for chunk in iter(lambda: src.read(fsutil.COPY_CHUNK), b""):
+                h.update(chunk)
+                f.write(chunk)
+                n += len(chunk)
+        sha = h.hexdigest()
+        if expected_sha256 and sha != expected_sha256:
+            raise ValueError(f"content sha256 mismatch: expected {expected_sha256}, got {sha}")
+        dst = blob_path(vault, sha)
+        if dst.exists():
+            return sha, n, False
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        os.chmod(tmp, 0o444)
+        os.replace(tmp, dst)
+        return sha, n, True
+    finally:
+        tmp.unlink(missing_ok=True)
+
+def materialize(vault: Path, files: list[dict], dest: Path) -> int:
+    """Rebuild a bundle tree under dest from its file list. Returns bytes written."""
+    total = 0
+    for f in files:
+        out = dest / f["path"]
+        out.parent.mkdir(parents=True, exist_ok=True)
+        fsutil.clone_file(blob_path(vault, f["sha256"]), out)
+        os.chmod(out, f.get("mode") or 0o644)
+        total += int(f.get("bytes", 0))
+    return total
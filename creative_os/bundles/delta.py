@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import zipfile
+from pathlib import Path, PurePosixPath
+from typing import Any, Optional
+
+from creative_os.bundles import blobs
+from creative_os.bundles import pack
+from creative_os.bundles import verify
+
+MANIFEST_NAME = "bundle_manifest.v1.json"
+
+def spec(manifest: dict[str, Any]) -> Optional[dict[str, Any]]:
+    """contents.delta normalized to {parent_bundle_id, deletions}, or None for a full bundle."""
+    d = (manifest.get("contents") or {}).get("delta")
+    if d is None:
+        return None
+    if not isinstance(d, dict):
+        raise ValueError("bundle_manifest.contents.delta must be an object")
+    parent = d.get("parent_bundle_id")
+    if not isinstance(parent, str) or not parent:
+        raise ValueError("bundle_manifest.contents.delta.parent_bundle_id missing/invalid")
+    if parent == manifest.get("bundle_id"):
+        raise ValueError("bundle_manifest.contents.delta.parent_bundle_id names the bundle itself")
+    deletions = d.get("deletions") or []
+    if not isinstance(deletions, list) or not all(isinstance(p, str) and p for p in deletions):
+        raise ValueError("bundle_manifest.contents.delta.deletions must be a list of paths")
+    for p in deletions:
+        pp = PurePosixPath(p)
+        if pp.is_absolute() or ".." in pp.parts or "\\" in p:
+            raise ValueError(f"unsafe path in contents.delta.deletions: {p}")
+    return {"parent_bundle_id": parent, "deletions": sorted(set(deletions))}
+
+def archive_name(manifest: dict[str, Any]) -> Optional[str]:
+    archive = (manifest.get("contents") or {}).get("archive") or {}
+    name = archive.get("filename") if isinstance(archive, dict) else None
+    return name if isinstance(name, str) and name else None
+
+def embedded_archive(doc: dict[str, Any], manifest: dict[str, Any]) -> Optional[dict[str, Any]]:
+    """The manifest's contents.archive when the bundle zip carried it.
+
+    Expanded at import into doc "archive" (its members are the tree); vaults
+    written before that hold it as one blob row in doc "files".
+    """
+    if doc.get("archive") is not None:
+        return doc["archive"]
+    name = archive_name(manifest)
+    return next((f for f in doc["files"] if f["path"] == name), None) if name else None
+
+def _expand_archive(vault: Path, row: dict[str, Any]) -> list[dict[str, Any]]:
+    # store each member of an embedded payload archive as its own blob
+    out = []
+    with zipfile.ZipFile(blobs.blob_path(vault, row["sha256"]), "r") as z:
+        for info in z.infolist():
+            if info.is_dir():
+                continue
+            path = str(PurePosixPath(info.filename))
+            if PurePosixPath(path).is_absolute() or ".." in PurePosixPath(path).parts:
+                raise ValueError(f"unsafe path in payload archive: {info.filename}")
+            with z.open(info) as src:
+                sha, n, _ = blobs.put_stream(vault, src)
+            out.append({"path": path, "sha256": sha, "bytes": n, "mode": (info.external_attr >> 16) & 0o777 or 0o644})
+    return out
+
+def payload_rows(vault: Path, doc: dict[str, Any], manifest: dict[str, Any]) -> list[dict[str, Any]]:
+    """The tree a bundle applies, as blob rows.
+
+    The stored tree (a delta's reconstructed tree, or the members of an
+    embedded payload archive expanded at import) if there is one; else, for
+    vaults that stored the archive as one blob, its members expanded now;
+    else the zip members themselves (minus the manifest).
+    """
+    if doc.get("tree") is not None:
+        return doc["tree"]
+    row = embedded_archive(doc, manifest)
+    if row is not None:
+        return _expand_archive(vault, row)
+    return [f for f in doc["files"] if f["path"] != MANIFEST_NAME]
+
+def reconstruct(parent_rows: list[dict[str, Any]], own_rows: list[dict[str, Any]], d: dict[str, Any], manifest: dict[str, Any]) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """(full tree, deleted parent rows): the parent's tree minus deletions, overlaid with the delta.
+
+    Every file the manifest lists must come out with its listed sha256. When
+    the manifest lists files, only listed parent files are inherited: the rest
+    of the parent zip (its own scripts, say) is not part of the payload.
+    """
+    parent = {r["path"]: r for r in parent_rows}
+    own = {r["path"]: r for r in own_rows}
+    deleted = []
+    for p in d["deletions"]:
+        if p in own:
+            raise ValueError(f"{p}: listed in contents.delta.deletions but shipped in the delta")
+        if p not in parent:
+            raise ValueError(f"{p}: listed in contents.delta.deletions but not in parent {d['parent_bundle_id']}")
+        deleted.append(parent.pop(p))
+    listed = verify.listed_files(manifest)
+    if listed:
+        parent = {p: r for p, r in parent.items() if p in listed}
+    tree = {**parent, **own}
+    for path, entry in sorted(listed.items()):
+        row = tree.get(path)
+        if row is None:
+            raise verify.ContentMismatch(f"{path}: listed in manifest but neither in the delta nor in parent {d['parent_bundle_id']}")
+        verify.check(path, entry, row["sha256"], int(row["bytes"]))
+    return sorted(tree.values(), key=lambda r: r["path"]), deleted
+
+def materialize(vault: Path, doc: dict[str, Any], manifest: dict[str, Any], dest: Path) -> int:
+    """Extract a bundle with a stored tree as if it had shipped in full. Returns bytes written.
+
+    An embedded payload archive is rebuilt from the tree (deterministically,
+    as pack writes it), so the bundle's own entrypoint, which unzips it,
+    applies everything; otherwise the tree is laid out at the root next to the
+    zip's own members.
+    """
+    files, tree = doc["files"], doc["tree"]
+    row = embedded_archive(doc, manifest)
+    if row is None:
+        paths = {r["path"] for r in tree}
+        return blobs.materialize(vault, [f for f in files if f["path"] not in paths], dest) + blobs.materialize(vault, tree, dest)
+    total = blobs.materialize(vault, [f for f in files if f["path"] != row["path"]], dest)
+    _, n = pack.write_zip(dest / row["path"], [(r["path"], blobs.blob_path(vault, r["sha256"]), r.get("mode") or 0o644) for r in tree])
+    return total + n
+
+def diff(parent_files: dict[str, str], files: list[dict[str, Any]]) -> tuple[list[dict[str, Any]], list[str]]:
+    """(rows whose content differs from the parent's listing, parent paths gone from files)."""
+    changed = [f for f in files if parent_files.get(f["path"]) != f["sha256"]]
+    current = {f["path"] for f in files}
+    return changed, sorted(p for p in parent_files if p not in current and p != MANIFEST_NAME)
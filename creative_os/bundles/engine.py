@@ -1,35 +1,58 @@
 from __future__ import annotations
 
+import contextlib
+import glob
 import hashlib
 import json
 import os
 import shutil
+import signal
+import stat
 import subprocess
+import sys
 import tempfile
+import threading
+import time
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from pathlib import Path
+from pathlib import Path, PurePosixPath
 from typing import Any, Optional
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from creative_os.bundles import blobs
+from creative_os.bundles import delta as delta_mod
+from creative_os.bundles import extract_cache
+from creative_os.bundles import fsutil
+from creative_os.bundles import gc as vault_gc_mod
+from creative_os.bundles.hashcache import HashCache
+from creative_os.bundles import index as vault_index
+from creative_os.bundles import ledger
+from creative_os.bundles import lineage
+from creative_os.bundles import locks
+from creative_os.bundles import memo
+from creative_os.bundles import pack
+from creative_os.bundles import replication
+from creative_os.bundles import staging
+from creative_os.bundles import verify
 
 ISO = "%Y-%m-%dT%H:%M:%SZ"
 
 def _now_iso() -> str:
     return datetime.now(timezone.utc).strftime(ISO)
 
+# exit codes for batch commands: every item passed, some failed, all failed
+EXIT_PASS, EXIT_FAIL, EXIT_PARTIAL = 0, 1, 2
+
+def _exit_code(status: str) -> int:
+    return {"pass": EXIT_PASS, "partial": EXIT_PARTIAL}.get(status, EXIT_FAIL)
+
 def _run_id() -> str:
     # Stable-ish monotonic ID for filesystem
     return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ") + "_" + os.urandom(3).hex()
 
-def _sha256_bytes(data: bytes) -> str:
-    return hashlib.sha256(data).hexdigest()
-
-def _sha256_file(path: Path) -> str:
-    h = hashlib.sha256()
-    with path.open("rb") as f:
-        for chunk in iter(lambda: f.read(1024 * 1024), b""):
-            h.update(chunk)
-    return h.hexdigest()
+def _write_json(path: Path, data: Any) -> None:
+    path.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n", encoding="utf-8")
 
 def _vault_root(override: Optional[str] = None) -> Path:
     if override:
@@ -57,13 +80,14 @@ def _bundle_store_dir(vault: Path, bundle_id: str) -> Path:
     return vault / "memory" / "bundles" / dt.strftime("%Y") / dt.strftime("%m") / bundle_id
 
 def _load_manifest_from_zip(zip_path: Path) -> dict[str, Any]:
+    # Only the central directory and the manifest member are read, not the payload.
     with zipfile.ZipFile(zip_path, "r") as z:
         # must be at root
-        candidates = [n for n in z.namelist() if n.endswith("bundle_manifest.v1.json")]
-        root_candidate = "bundle_manifest.v1.json" if "bundle_manifest.v1.json" in z.namelist() else None
-        if not root_candidate:
+        try:
+            info = z.getinfo("bundle_manifest.v1.json")
+        except KeyError:
             raise ValueError("Zip must contain bundle_manifest.v1.json at root.")
-        raw = z.read(root_candidate)
+        raw = z.read(info)
         try:
             manifest = json.loads(raw.decode("utf-8"))
         except Exception as e:
@@ -83,31 +107,188 @@ def _validate_manifest_min(manifest: dict[str, Any]) -> None:
         raise ValueError("bundle_manifest.apply.default_entrypoint missing")
     # contents.archive is optional for imported zips (we compute), but keep consistent.
 
-def bundle_import(zip_path: str, vault_override: Optional[str] = None, tags: Optional[list[str]] = None) -> bool:
-    zpath = Path(zip_path).expanduser().resolve()
+MANIFEST_NAME = "bundle_manifest.v1.json"
+
+def _manifest_file_hashes(manifest: dict[str, Any]) -> dict[str, dict[str, Any]]:
+    files = manifest.get("contents", {}).get("files", [])
+    if not isinstance(files, list):
+        return {}
+    return {f["path"]: f for f in files if isinstance(f, dict) and isinstance(f.get("path"), str) and f.get("sha256")}
+
+def _safe_member_path(name: str) -> str:
+    p = PurePosixPath(name)
+    if p.is_absolute() or ".." in p.parts or "\\" in name:
+        raise ValueError(f"unsafe path in bundle zip: {name}")
+    return str(p)
+
+def _store_members(vault: Path, readers: verify.ZipReaders, infos: list[zipfile.ZipInfo], expected: dict[str, dict[str, Any]], jobs: int, verify_contents: bool) -> list[dict[str, Any]]:
+    """Store zip members as blobs on a thread pool; one result per member, in input order."""
+
+    def one(info: zipfile.ZipInfo, stop) -> dict[str, Any]:
+        t = time.monotonic()
+        path = _safe_member_path(info.filename)
+        mode = (info.external_attr >> 16) & 0o777 or 0o644
+        entry = expected.get(info.filename)
+        reused = entry is not None and blobs.has_blob(vault, entry["sha256"], info.file_size)
+        created = False
+        if reused and not verify_contents:
+            sha, n = entry["sha256"], info.file_size
+        elif reused:
+            with readers.get().open(info) as src:
+                sha, n = verify.hash_stream(src, stop)
+            verify.check(path, entry, sha, n)
+        else:
+            with readers.get().open(info) as src:
+                try:
+                    sha, n, created = blobs.put_stream(vault, verify.StopReader(src, stop), entry["sha256"] if entry else None)
+                except ValueError as e:
+                    raise verify.ContentMismatch(f"{path}: {e}")
+            if entry is not None:
+                verify.check(path, entry, sha, n)
+        return {
+            "file": {"path": path, "sha256": sha, "bytes": n, "mode": mode},
+            "created": created,
+            "timing": {"path": path, "bytes": n, "seconds": round(time.monotonic() - t, 6), "verified": entry is not None and verify_contents},
+        }
+
+    try:
+        return verify.run_fail_fast(infos, one, jobs)
+    finally:
+        readers.close()
+
+def _store_archive_as_blobs(vault: Path, zpath: Path, info: zipfile.ZipInfo, entry: Optional[dict[str, Any]], listed: dict[str, dict[str, Any]], jobs: int, verify_contents: bool) -> tuple[dict[str, Any], list[dict[str, Any]], list[dict[str, Any]]]:
+    """Expand an embedded contents.archive into one blob per member. Returns (archive row, timing, member results).
+
+    The archive is spooled to a temp file (zipfile needs to seek), checked
+    against contents.archive when verifying, and never stored itself: extract
+    rebuilds it from the member blobs, so unchanged files are shared between
+    versions. Members are checked against their contents.files entries.
+    """
+    t = time.monotonic()
+    path = _safe_member_path(info.filename)
+    tmp_dir = vault / "objects" / "tmp"
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    tmp = tmp_dir / f"{os.getpid()}.{threading.get_ident()}.{os.urandom(4).hex()}.zip"
+    try:
+        with zipfile.ZipFile(zpath, "r") as z, z.open(info) as src, tmp.open("wb") as sink:
+            sha, n = verify.hash_stream(src, threading.Event(), sink)
+        if entry is not None and verify_contents:
+            verify.check(path, entry, sha, n)
+        with zipfile.ZipFile(tmp, "r") as inner:
+            infos = [i for i in inner.infolist() if not i.is_dir()]
+        expected = {i.filename: listed[i.filename] for i in infos if i.filename in listed}
+        for i in infos:
+            e = expected.get(i.filename)
+            if e is not None and "bytes" in e and int(e["bytes"]) != i.file_size:
+                raise verify.ContentMismatch(f"{i.filename}: size mismatch: manifest {e['bytes']} bytes, bundle {i.file_size} bytes")
+        results = _store_members(vault, verify.ZipReaders(tmp), infos, expected, jobs, verify_contents)
+    finally:
+        tmp.unlink(missing_ok=True)
+    row = {"path": path, "sha256": sha, "bytes": n, "mode": (info.external_attr >> 16) & 0o777 or 0o644}
+    timing = {"path": path, "bytes": n, "seconds": round(time.monotonic() - t, 6), "verified": entry is not None and verify_contents}
+    return row, [timing], results
+
+def _store_zip_as_blobs(vault: Path, zpath: Path, manifest: dict[str, Any], jobs: int = 0, verify_contents: bool = True) -> tuple[dict[str, Any], dict[str, int], Optional[dict[str, Any]]]:
+    """Split a bundle zip into content-addressed blobs, on a thread pool. Returns (files doc, stats, verification).
+
+    An embedded contents.archive is expanded: each file inside it becomes a
+    blob keyed by its own sha256 (doc "tree"), and the archive itself is only
+    described (doc "archive"). With verify_contents every listed file, and the
+    archive, is streamed through sha256 and checked against the manifest;
+    members whose blob already exists are hashed without being written. The
+    first mismatch aborts the import. Without it, members whose listed sha256
+    is already stored are not decompressed at all. The manifest's own entry is
+    never trusted (it cannot contain its own hash).
+    """
+    t0 = time.monotonic()
+    with zipfile.ZipFile(zpath, "r") as z:
+        infos = [i for i in z.infolist() if not i.is_dir()]
+    members = {i.filename: i for i in infos}
+    if verify_contents:
+        expected, skipped = verify.zip_expectations(members, manifest)
+    else:
+        expected, skipped = verify.listed_files(manifest), []
+    archive_name = delta_mod.archive_name(manifest)
+    archive_info = members.get(archive_name) if archive_name else None
+
+    results = _store_members(vault, verify.ZipReaders(zpath), [i for i in infos if i is not archive_info], expected, jobs, verify_contents)
+    doc: dict[str, Any] = {"schema_version": 1, "bundle_id": manifest["bundle_id"], "files": sorted((r["file"] for r in results), key=lambda f: f["path"])}
+    timings = [r["timing"] for r in results]
+    if archive_info is not None:
+        row, archive_timing, inner = _store_archive_as_blobs(vault, zpath, archive_info, expected.get(archive_name), verify.listed_files(manifest), jobs, verify_contents)
+        doc["archive"] = row
+        doc["tree"] = sorted((r["file"] for r in inner), key=lambda f: f["path"])
+        timings += archive_timing + [r["timing"] for r in inner]
+        results += inner
+        inside = {f["path"] for f in doc["tree"]}
+        skipped = [p for p in skipped if p not in inside]
+        if verify_contents and skipped and delta_mod.spec(manifest) is None:
+            raise verify.ContentMismatch(f"{skipped[0]}: listed in manifest but missing from bundle zip and its payload archive")
+    stats = {
+        "blobs_created": sum(1 for r in results if r["created"]),
+        "blobs_reused": sum(1 for r in results if not r["created"]),
+        "bytes_written": sum(r["file"]["bytes"] for r in results if r["created"]),
+    }
+    report = None
+    if verify_contents:
+        report = verify.report([t for t in timings if t["verified"]], skipped, t0)
+    return doc, stats, report
+
+def _import_zip(vault: Path, zpath: Path, tags: list[str], jobs: int = 0, verify_contents: bool = True) -> dict[str, Any]:
+    """Validate and store one bundle zip. Returns the per-bundle import record."""
     if not zpath.exists():
         raise FileNotFoundError(f"zip not found: {zpath}")
-    data = zpath.read_bytes()
-    zip_sha = _sha256_bytes(data)
-    zip_bytes = len(data)
 
     manifest = _load_manifest_from_zip(zpath)
     _validate_manifest_min(manifest)
+    delta_spec = delta_mod.spec(manifest)
+
+    # this bundle_id exclusively (no concurrent store of the same id), a delta's parent shared; sorted against deadlock
+    wanted = {manifest["bundle_id"]: True}
+    if delta_spec is not None:
+        wanted[delta_spec["parent_bundle_id"]] = False
+    with contextlib.ExitStack() as held:
+        held.enter_context(locks.vault_lock(vault))
+        for bid in sorted(wanted):
+            held.enter_context(locks.bundle_lock(vault, bid, exclusive=wanted[bid]))
+        return _store_bundle(vault, zpath, manifest, delta_spec, tags, jobs, verify_contents)
 
+def _store_bundle(vault: Path, zpath: Path, manifest: dict[str, Any], delta_spec: Optional[dict[str, Any]], tags: list[str], jobs: int, verify_contents: bool) -> dict[str, Any]:
     bundle_id = manifest["bundle_id"]
-    vault = _vault_root(vault_override)
-    _ensure_dirs(vault)
+    # refuse lineage that would make the graph cyclic before storing anything
+    lineage.check_add(vault, bundle_id, lineage.node_record(manifest, ""))
+    parent_dir = None
+    if delta_spec is not None:
+        parent_id = delta_spec["parent_bundle_id"]
+        if parent_id not in _load_index(vault)["bundles"]:
+            raise FileNotFoundError(f"Delta parent not imported: {parent_id} (import it before {bundle_id})")
+        parent_dir = _find_bundle_dir(vault, parent_id)
+        if _load_file_list(parent_dir) is None:
+            raise ValueError(f"Delta parent {parent_id} predates the blob store; re-import it first")
+
+    # store payload as shared blobs + a file list (no per-bundle zip copy)
+    t0 = time.monotonic()
+    zip_sha, zip_bytes = fsutil.sha256_file(zpath)
+    doc, blob_stats, verification = _store_zip_as_blobs(vault, zpath, manifest, jobs=jobs, verify_contents=verify_contents)
+    if delta_spec is not None:
+        # the full tree is rebuilt here, from the parent's blobs plus ours, so apply never needs the parent again
+        parent_doc = memo.read_json(parent_dir / blobs.FILES_FILENAME)
+        parent_rows = delta_mod.payload_rows(vault, parent_doc, memo.read_json(parent_dir / "bundle_manifest.v1.json"))
+        own_rows = delta_mod.payload_rows(vault, doc, manifest)
+        doc["tree"], doc["deleted"] = delta_mod.reconstruct(parent_rows, own_rows, delta_spec, manifest)
+        doc["delta"] = {**delta_spec, "files": len(own_rows), "inherited": len(doc["tree"]) - len(own_rows)}
+        if verification is not None:
+            verification["skipped"] = []
+    transfer_s = time.monotonic() - t0
 
     store_dir = _bundle_store_dir(vault, bundle_id)
+    fresh_store = not store_dir.exists()
     store_dir.mkdir(parents=True, exist_ok=True)
-
-    # write bundle zip
-    stored_zip = store_dir / "bundle.zip"
-    stored_zip.write_bytes(data)
+    _write_json(store_dir / blobs.FILES_FILENAME, doc)
 
     # write manifest as stored copy
     stored_manifest = store_dir / "bundle_manifest.v1.json"
-    stored_manifest.write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    _write_json(stored_manifest, manifest)
 
     # write computed metadata
     meta = {
@@ -116,11 +297,52 @@ def bundle_import(zip_path: str, vault_override: Optional[str] = None, tags: Opt
         "imported_at": _now_iso(),
         "source_zip_path": str(zpath),
         "zip": {"bytes": zip_bytes, "sha256": zip_sha},
-        "manifest_sha256": _sha256_file(stored_manifest),
-        "tags": tags or [],
+        "storage": "blobs",
+        "manifest_sha256": fsutil.sha256_file(stored_manifest)[0],
+        "tags": tags,
         "vault_store_dir": str(store_dir),
     }
-    (store_dir / "import_meta.v1.json").write_text(json.dumps(meta, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    if delta_spec is not None:
+        meta["delta"] = doc["delta"]
+    _write_json(store_dir / "import_meta.v1.json", meta)
+
+    # lineage re-checks for a cycle under its lock (a concurrent import may have closed one since check_add)
+    try:
+        lineage.add(vault, bundle_id, lineage.node_record(manifest, meta["imported_at"]))
+    except ValueError:
+        if fresh_store:
+            shutil.rmtree(store_dir, ignore_errors=True)
+        raise
+    # index last: the bundle only becomes visible once fully stored
+    vault_index.update_index(vault, bundle_id, vault_index.index_entry(meta))
+
+    return {
+        "bundle_id": bundle_id,
+        "manifest": manifest,
+        "meta": meta,
+        "transfer": {
+            "method": "blobs",
+            "bytes": zip_bytes,
+            **blob_stats,
+            "seconds": round(transfer_s, 6),
+            "bytes_per_sec": int(zip_bytes / transfer_s) if transfer_s > 0 else None,
+        },
+        "verification": verification,
+    }
+
+def _project_links(manifest: dict[str, Any]) -> list[Any]:
+    return manifest.get("targets", []) if isinstance(manifest.get("targets"), list) else []
+
+def bundle_import(zip_path: str, vault_override: Optional[str] = None, tags: Optional[list[str]] = None, jobs: int = 0, verify_contents: bool = True) -> bool:
+    zpath = Path(zip_path).expanduser().resolve()
+    if not zpath.exists():
+        raise FileNotFoundError(f"zip not found: {zpath}")
+    vault = _vault_root(vault_override)
+    _ensure_dirs(vault)
+
+    rec = _import_zip(vault, zpath, tags or [], jobs=jobs, verify_contents=verify_contents)
+    bundle_id = rec["bundle_id"]
+    transfer = rec["transfer"]
 
     # import receipt
     run_id = _run_id()
@@ -134,144 +356,1348 @@ def bundle_import(zip_path: str, vault_override: Optional[str] = None, tags: Opt
         "objects": [{"kind": "bundle", "id": bundle_id}],
         "status": "pass",
         "reasons": [],
-        "links_created": {"project_ids": manifest.get("targets", []) if isinstance(manifest.get("targets"), list) else [], "tags": tags or []},
-        "bundle": meta,
+        "links_created": {"project_ids": _project_links(rec["manifest"]), "tags": tags or []},
+        "bundle": rec["meta"],
+        "transfer": transfer,
+        "verification": rec["verification"],
     }
-    (run_dir / "bundle_import_receipt.v1.json").write_text(json.dumps(receipt, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    _write_json(run_dir / "bundle_import_receipt.v1.json", receipt)
+    ledger.append(vault, [{"kind": "import", "run_id": run_id, "bundle_id": bundle_id, "status": "pass", "source": str(zpath),
+                           "receipt": str(run_dir / "bundle_import_receipt.v1.json")}])
 
     print(f"Imported bundle: {bundle_id}")
-    print(f"Stored at: {store_dir}")
+    print(f"Stored at: {rec['meta']['vault_store_dir']}")
+    rate = transfer["bytes_per_sec"]
+    print(f"Transfer: {transfer['bytes']} bytes" + (f" ({rate} bytes/sec)" if rate else ""))
+    print(f"Blobs: {transfer['blobs_created']} new, {transfer['blobs_reused']} shared ({transfer['bytes_written']} bytes written)")
+    if rec["verification"] is not None:
+        v = rec["verification"]
+        print(f"Verified: {v['checked']} files against manifest")
     print(f"Receipt: {run_dir / 'bundle_import_receipt.v1.json'}")
     return True
 
-def _list_bundle_dirs(vault: Path) -> list[Path]:
-    base = vault / "memory" / "bundles"
-    if not base.exists():
-        return []
-    return [p for p in base.rglob("*") if p.is_dir() and (p / "bundle_manifest.v1.json").exists()]
+def _expand_zip_sources(source: str) -> list[Path]:
+    p = Path(os.path.expanduser(source))
+    if p.is_dir():
+        return sorted(z.resolve() for z in p.glob("*.zip") if z.is_file())
+    return sorted(Path(z).resolve() for z in glob.glob(os.path.expanduser(source)) if z.endswith(".zip"))
+
+def _import_waves(zips: list[Path]) -> list[list[Path]]:
+    """Group zips so a delta is imported after a parent that ships in the same batch."""
+    parent_of: dict[Path, Optional[str]] = {}
+    zip_of: dict[str, Path] = {}
+    for z in zips:
+        try:
+            manifest = _load_manifest_from_zip(z)
+            parent_of[z] = (delta_mod.spec(manifest) or {}).get("parent_bundle_id")
+            zip_of[manifest["bundle_id"]] = z
+        except (OSError, ValueError, KeyError, TypeError, zipfile.BadZipFile):
+            parent_of[z] = None  # fails again, with its reason, when imported
+
+    def depth(z: Path, seen: frozenset = frozenset()) -> int:
+        parent = zip_of.get(parent_of[z] or "")
+        if parent is None or parent in seen:
+            return 0
+        return 1 + depth(parent, seen | {z})
+
+    waves: dict[int, list[Path]] = {}
+    for z in zips:
+        waves.setdefault(depth(z), []).append(z)
+    return [waves[k] for k in sorted(waves)]
+
+def bundle_import_many(source: str, vault_override: Optional[str] = None, tags: Optional[list[str]] = None, jobs: int = 0, verify_contents: bool = True) -> int:
+    zips = _expand_zip_sources(source)
+    if not zips:
+        raise FileNotFoundError(f"No bundle zips matched: {source}")
+    vault = _vault_root(vault_override)
+    _ensure_dirs(vault)
+    workers = jobs if jobs > 0 else min(32, (os.cpu_count() or 1) + 4)
+
+    def one(zpath: Path) -> dict[str, Any]:
+        t0 = time.monotonic()
+        try:
+            # parallelism is across bundles here; hash each bundle's members serially
+            rec = _import_zip(vault, zpath, tags or [], jobs=1, verify_contents=verify_contents)
+        except Exception as e:
+            return {"source": str(zpath), "status": "fail", "reasons": [str(e)], "seconds": round(time.monotonic() - t0, 6)}
+        return {
+            "source": str(zpath),
+            "status": "pass",
+            "reasons": [],
+            "bundle_id": rec["bundle_id"],
+            "bundle": rec["meta"],
+            "transfer": rec["transfer"],
+            "verification": rec["verification"],
+            "links_created": {"project_ids": _project_links(rec["manifest"]), "tags": tags or []},
+            "seconds": round(time.monotonic() - t0, 6),
+        }
+
+    t0 = time.monotonic()
+    entries = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for wave in _import_waves(zips):
+            entries += pool.map(one, wave)
+    elapsed = time.monotonic() - t0
+
+    passed = [e for e in entries if e["status"] == "pass"]
+    failed = [e for e in entries if e["status"] != "pass"]
+    status = "pass" if not failed else ("fail" if not passed else "partial")
+    total_bytes = sum(e["transfer"]["bytes"] for e in passed)
+
+    run_id = _run_id()
+    run_dir = vault / "runs" / run_id
+    run_dir.mkdir(parents=True, exist_ok=True)
+    receipt = {
+        "schema_version": 1,
+        "import_id": f"cos_import_{run_id}",
+        "imported_at": _now_iso(),
+        "source": {"kind": "batch", "ref": source},
+        "objects": [{"kind": "bundle", "id": e["bundle_id"]} for e in passed],
+        "status": status,
+        "reasons": [f"{e['source']}: {r}" for e in failed for r in e["reasons"]],
+        "jobs": workers,
+        "summary": {
+            "total": len(entries),
+            "passed": len(passed),
+            "failed": len(failed),
+            "bytes": total_bytes,
+            "seconds": round(elapsed, 6),
+            "bytes_per_sec": int(total_bytes / elapsed) if elapsed > 0 else None,
+        },
+        "entries": entries,
+    }
+    receipt_path = run_dir / "bundle_import_batch_receipt.v1.json"
+    _write_json(receipt_path, receipt)
+    ledger.append(vault, [{"kind": "import", "run_id": run_id, "bundle_id": e.get("bundle_id"), "status": e["status"],
+                           "source": e["source"], "receipt": str(receipt_path)} for e in entries])
+
+    for e in entries:
+        if e["status"] == "pass":
+            print(f"- pass  {e['bundle_id']}  ({e['source']})")
+        else:
+            print(f"- FAIL  {e['source']}: {'; '.join(e['reasons'])}")
+    print(f"Imported {len(passed)}/{len(entries)} bundles with {workers} workers in {elapsed:.2f}s")
+    print(f"Receipt: {receipt_path}")
+    return _exit_code(status)
+
+def _entry_scripts(manifest: dict[str, Any]) -> list[str]:
+    """Paths the extracted bundle must carry at its root: entrypoints and the verification script."""
+    apply = manifest.get("apply", {})
+    paths = [apply.get("default_entrypoint")]
+    paths += [e.get("path") for e in apply.get("entrypoints") or [] if isinstance(e, dict)]
+    paths.append((apply.get("verification") or {}).get("path"))
+    return sorted({p for p in paths if isinstance(p, str) and p})
+
+def bundle_pack(
+    src_dir: str,
+    out_dir: Optional[str] = None,
+    manifest_path: Optional[str] = None,
+    bundle_id: Optional[str] = None,
+    version: Optional[str] = None,
+    archive_name: Optional[str] = None,
+    jobs: int = 0,
+    vault_override: Optional[str] = None,
+    delta_from: Optional[str] = None,
+) -> bool:
+    """Pack a payload tree into a ship bundle: payload archive, manifest, and importable bundle zip.
+
+    With delta_from, the archive only carries files that differ from that
+    imported bundle's listing, and the manifest names it as the parent.
+    """
+    t0 = time.monotonic()
+    root = Path(os.path.expanduser(src_dir)).resolve()
+    if not root.is_dir():
+        raise FileNotFoundError(f"Not a directory: {root}")
+    tpl_path = Path(os.path.expanduser(manifest_path)).resolve() if manifest_path else root / MANIFEST_NAME
+    if not tpl_path.exists():
+        raise FileNotFoundError(f"Manifest template not found: {tpl_path} (pass --manifest)")
+    template = json.loads(tpl_path.read_text(encoding="utf-8"))
+    if bundle_id:
+        template["bundle_id"] = bundle_id
+    if version:
+        template["bundle_version"] = version
+    _validate_manifest_min(template)
+    bid = template["bundle_id"]
+
+    out = Path(os.path.expanduser(out_dir)).resolve() if out_dir else root.parent / "dist"
+    out.mkdir(parents=True, exist_ok=True)
+    entries = pack.scan_tree(root, skip=out)
+    by_path = {rel: (p, st) for rel, p, st in entries}
+    scripts = _entry_scripts(template)
+    missing = [s for s in scripts if s not in by_path]
+    if missing:
+        raise FileNotFoundError(f"Entrypoint/verification script not in {root}: {', '.join(missing)}")
+
+    # hash (parallel; unchanged files come from the stat-keyed cache)
+    vault = _vault_root(vault_override)
+    hashes = HashCache.for_vault(vault)
+    files = pack.hash_files(entries, hashes, jobs)
+    hashes.save()
+
+    shipped, deletions = files, []
+    if delta_from:
+        if delta_from == bid:
+            raise ValueError(f"A bundle can't be a delta of itself: {bid}")
+        with locks.vault_lock(vault), locks.bundle_lock(vault, delta_from):
+            parent_manifest = memo.read_json(_find_bundle_dir(vault, delta_from) / MANIFEST_NAME)
+        parent_files = {p: f["sha256"] for p, f in _manifest_file_hashes(parent_manifest).items()}
+        if not parent_files:
+            raise ValueError(f"Delta parent {delta_from} lists no contents.files to diff against")
+        shipped, deletions = delta_mod.diff(parent_files, files)
+
+    # payload archive, rebuilt only when its inputs changed
+    tpl_archive = (template.get("contents") or {}).get("archive") or {}
+    archive = out / (archive_name or tpl_archive.get("filename") or f"{bid}.payload.zip")
+    digest = pack.inputs_digest(shipped)
+    stamp = pack.reusable(archive, digest)
+    if stamp is not None:
+        archive_sha, archive_bytes = stamp["archive_sha256"], stamp["bytes"]
+    else:
+        archive_sha, archive_bytes = pack.write_zip(archive, [(f["path"], by_path[f["path"]][0], f["mode"]) for f in shipped])
+        pack.write_stamp(archive, digest, archive_sha, archive_bytes)
+
+    manifest = json.loads(json.dumps(template))
+    manifest["contents"] = {
+        **(template.get("contents") or {}),
+        "files": [{"path": f["path"], "sha256": f["sha256"], "bytes": f["bytes"]} for f in files],
+        "archive": {"filename": archive.name, "sha256": archive_sha, "bytes": archive_bytes},
+    }
+    manifest["contents"].pop("delta", None)
+    if delta_from:
+        manifest["contents"]["delta"] = {"parent_bundle_id": delta_from, "deletions": deletions}
+        declared = lineage.node_record(manifest, "")
+        if delta_from not in declared["parents"] + declared["supersedes"]:
+            manifest.setdefault("lineage", {})["parents"] = sorted(set(declared["parents"]) | {delta_from})
+    manifest["created_at"] = pack.created_at(template, entries)
+    manifest["source"] = {**(template.get("source") or {}), "producer": "cos bundle pack"}
+    manifest_bytes = (json.dumps(manifest, indent=2, sort_keys=True) + "\n").encode("utf-8")
+    sidecar = out / MANIFEST_NAME
+    if not sidecar.exists() or sidecar.read_bytes() != manifest_bytes:
+        sidecar.write_bytes(manifest_bytes)
+
+    # importable bundle: manifest + entry scripts at the root + the embedded payload archive
+    bundle_zip = out / f"{bid}.zip"
+    modes = {f["path"]: f["mode"] for f in files}
+    members: list[tuple[str, Any, int]] = [(MANIFEST_NAME, manifest_bytes, 0o644)]
+    members += [(s, by_path[s][0], modes[s]) for s in scripts]
+    members.append((archive.name, archive, 0o644))
+    outer_digest = hashlib.sha256(manifest_bytes + digest.encode() + archive_sha.encode()).hexdigest()
+    outer_stamp = pack.reusable(bundle_zip, outer_digest)
+    if outer_stamp is not None:
+        bundle_sha, bundle_bytes = outer_stamp["archive_sha256"], outer_stamp["bytes"]
+    else:
+        bundle_sha, bundle_bytes = pack.write_zip(bundle_zip, members)
+        pack.write_stamp(bundle_zip, outer_digest, bundle_sha, bundle_bytes)
+
+    elapsed = time.monotonic() - t0
+    print(f"Packed bundle: {bid}")
+    print(f"Files: {len(files)} ({sum(f['bytes'] for f in files)} bytes)")
+    if delta_from:
+        print(f"Delta from {delta_from}: {len(shipped)} changed ({sum(f['bytes'] for f in shipped)} bytes), {len(deletions)} deleted")
+    print(f"Archive: {archive} ({archive_bytes} bytes, sha256 {archive_sha})" + (" [unchanged]" if stamp is not None else ""))
+    print(f"Manifest: {sidecar}")
+    print(f"Bundle: {bundle_zip} ({bundle_bytes} bytes, sha256 {bundle_sha})" + (" [unchanged]" if outer_stamp is not None else ""))
+    print(f"Seconds: {elapsed:.3f}")
+    return True
+
+def _load_index(vault: Path) -> dict[str, Any]:
+    # Vaults created before the index existed get one built on first use.
+    if not vault_index.index_exists(vault) and (vault / "memory" / "bundles").exists():
+        return vault_index.rebuild_index(vault)
+    return vault_index.load_index(vault)
 
 def bundle_list(vault_override: Optional[str] = None) -> bool:
     vault = _vault_root(vault_override)
-    dirs = _list_bundle_dirs(vault)
-    if not dirs:
+    with locks.vault_lock(vault):
+        bundles = _load_index(vault)["bundles"]
+    if not bundles:
         print("No bundles found.")
         return True
-    # sort by mtime of manifest
-    items = []
-    for d in dirs:
-        m = d / "bundle_manifest.v1.json"
-        items.append((m.stat().st_mtime, d))
-    items.sort(reverse=True)
-    for _, d in items[:200]:
-        manifest = json.loads((d / "bundle_manifest.v1.json").read_text(encoding="utf-8"))
-        print(f"- {manifest.get('bundle_id')}  ({d})")
+    # newest import first
+    items = sorted(bundles.items(), key=lambda kv: kv[1].get("imported_at", ""), reverse=True)
+    for bundle_id, entry in items[:200]:
+        print(f"- {bundle_id}  ({entry.get('store_dir')})")
+    return True
+
+def bundle_reindex(vault_override: Optional[str] = None) -> bool:
+    vault = _vault_root(vault_override)
+    _ensure_dirs(vault)
+    with locks.vault_lock(vault, exclusive=True):
+        idx = vault_index.rebuild_index(vault)
+        lin = lineage.rebuild(vault)
+    print(f"Indexed bundles: {len(idx['bundles'])}")
+    print(f"Lineage: {len(lin['families'])} families" + (f", {len(lin['cycles'])} cycles" if lin["cycles"] else ""))
+    print(f"Index: {vault / 'index' / vault_index.INDEX_FILENAME}")
     return True
 
 def _find_bundle_dir(vault: Path, bundle_id: str) -> Path:
-    for d in _list_bundle_dirs(vault):
-        m = json.loads((d / "bundle_manifest.v1.json").read_text(encoding="utf-8"))
-        if m.get("bundle_id") == bundle_id:
-            return d
-    raise FileNotFoundError(f"Bundle not found in vault: {bundle_id}")
+    entry = _load_index(vault)["bundles"].get(bundle_id)
+    if entry is None:
+        raise FileNotFoundError(f"Bundle not found in vault: {bundle_id}")
+    d = Path(entry["store_dir"])
+    if not (d / "bundle_manifest.v1.json").exists():
+        raise FileNotFoundError(f"Indexed bundle missing on disk: {d} (run: cos bundle reindex)")
+    return d
 
 def bundle_show(bundle_id: str, vault_override: Optional[str] = None) -> bool:
     vault = _vault_root(vault_override)
-    d = _find_bundle_dir(vault, bundle_id)
-    print((d / "bundle_manifest.v1.json").read_text(encoding="utf-8"))
+    with locks.vault_lock(vault), locks.bundle_lock(vault, bundle_id):
+        d = _find_bundle_dir(vault, bundle_id)
+        print(memo.read_text(d / "bundle_manifest.v1.json"))
     return True
 
-def bundle_plan(bundle_id: str, target: str, vault_override: Optional[str] = None) -> bool:
+def _load_lineage(vault: Path) -> dict[str, Any]:
+    _load_index(vault)
+    return lineage.load(vault)
+
+def bundle_lineage(bundle_id: str, vault_override: Optional[str] = None, as_json: bool = False) -> bool:
     vault = _vault_root(vault_override)
-    d = _find_bundle_dir(vault, bundle_id)
-    manifest = json.loads((d / "bundle_manifest.v1.json").read_text(encoding="utf-8"))
+    with locks.vault_lock(vault):
+        idx = _load_lineage(vault)
+    n = idx["nodes"].get(bundle_id)
+    if n is None:
+        raise FileNotFoundError(f"Bundle not found in lineage index: {bundle_id}")
+    fam = idx["families"].get(n["family"]) if n["family"] else None
+    out = {
+        "bundle_id": bundle_id,
+        **n,
+        "family_head": fam["head"] if fam else None,
+        "ancestors": lineage.ancestors(idx, bundle_id),
+        "descendants": lineage.descendants(idx, bundle_id),
+        "cycles": [c for c in idx["cycles"] if bundle_id in c],
+    }
+    if as_json:
+        print(json.dumps(out, indent=2, sort_keys=True))
+        return True
+    print(f"Bundle: {bundle_id}" + ("" if n["imported"] else " (referenced, not imported)"))
+    if n["family"]:
+        print(f"Family: {n['family']} (latest: {out['family_head']})")
+    for key in ("parents", "children", "supersedes", "superseded_by", "ancestors", "descendants"):
+        print(f"{key}: {', '.join(out[key]) if out[key] else '-'}")
+    for c in out["cycles"]:
+        print(f"WARNING: lineage cycle: {' -> '.join(c)}")
+    return True
+
+def bundle_latest(family: str, vault_override: Optional[str] = None, as_json: bool = False) -> bool:
+    vault = _vault_root(vault_override)
+    with locks.vault_lock(vault):
+        idx = _load_lineage(vault)
+    if family not in idx["families"] and family in idx["nodes"] and idx["nodes"][family]["family"]:
+        # a bundle id was given: answer for its family
+        family = idx["nodes"][family]["family"]
+    head = lineage.latest(idx, family)
+    if head is None:
+        raise FileNotFoundError(f"Bundle family not found: {family}")
+    if as_json:
+        f = idx["families"][family]
+        print(json.dumps({"family": family, "latest": head, "version": idx["nodes"][head]["version"], "members": f["members"]}, indent=2, sort_keys=True))
+    else:
+        print(head)
+    return True
+
+PLAN_STATUSES = ("added", "changed", "unchanged", "conflict")
+
+def _plan_files(manifest: dict[str, Any], tgt: Path, hashes: HashCache) -> list[dict[str, Any]]:
+    """Per-file status of the manifest's contents.files against a target tree.
+
+    added: not in target; changed/unchanged: sha256 differs/matches;
+    conflict: target has a directory at the path, or a file where a parent
+    directory is needed.
+    """
+    rows = []
+    for path, f in sorted(_manifest_file_hashes(manifest).items()):
+        rel = _safe_member_path(path)
+        t = tgt / rel
+        row = {"path": rel, "bytes": f.get("bytes"), "sha256": f["sha256"], "target_sha256": None}
+        try:
+            st = t.stat()
+        except FileNotFoundError:
+            row["status"] = "added"
+        except NotADirectoryError:
+            row["status"] = "conflict"
+        else:
+            if not stat.S_ISREG(st.st_mode):
+                row["status"] = "conflict"
+            else:
+                row["target_sha256"] = hashes.sha256(t, st)
+                row["status"] = "unchanged" if row["target_sha256"] == f["sha256"] else "changed"
+        rows.append(row)
+    return rows
+
+DELETION_STATUSES = ("removed", "kept")
+
+def _plan_deletions(store_dir: Path, tgt: Path, hashes: HashCache) -> Optional[list[dict[str, Any]]]:
+    """Rows for the parent files a delta bundle deletes, or None for a full bundle.
+
+    removed: the target still holds the parent's content; kept: it was changed
+    locally and stays unless forced. Paths already gone from the target are not listed.
+    """
+    doc = _load_files_doc(store_dir)
+    if doc is None or doc.get("deleted") is None:
+        return None
+    rows = []
+    for f in doc["deleted"]:
+        t = tgt / f["path"]
+        try:
+            st = t.stat()
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+        if not stat.S_ISREG(st.st_mode):
+            continue
+        sha = hashes.sha256(t, st)
+        rows.append({"path": f["path"], "bytes": f.get("bytes"), "sha256": None, "target_sha256": sha,
+                     "status": "removed" if sha == f["sha256"] else "kept"})
+    return rows
 
+def _apply_deletions(rows: list[dict[str, Any]], tgt: Path, force: bool, lf) -> dict[str, Any]:
+    removed, kept = 0, []
+    for r in rows:
+        if r["status"] == "kept" and not force:
+            kept.append(r["path"])
+            lf.write(f"kept (changed locally): {r['path']}\n")
+            continue
+        t = tgt / r["path"]
+        t.unlink(missing_ok=True)
+        removed += 1
+        lf.write(f"removed: {r['path']}\n")
+        # drop directories the deletion left empty, up to the target root
+        d = t.parent
+        try:
+            while d != tgt and not any(d.iterdir()):
+                d.rmdir()
+                d = d.parent
+        except OSError:
+            pass
+    return {"removed": removed, "kept": kept}
+
+def bundle_plan(bundle_id: str, target: str, vault_override: Optional[str] = None, as_json: bool = False) -> bool:
+    vault = _vault_root(vault_override)
     tgt = Path(os.path.expanduser(target)).resolve()
+    # readers share every lock: plans never block each other, only imports/applies of the same bundle/target
+    with locks.vault_lock(vault), locks.bundle_lock(vault, bundle_id), locks.target_lock(vault, tgt):
+        return _bundle_plan(vault, bundle_id, tgt, as_json)
+
+def _bundle_plan(vault: Path, bundle_id: str, tgt: Path, as_json: bool) -> bool:
+    d = _find_bundle_dir(vault, bundle_id)
+    manifest = memo.read_json(d / "bundle_manifest.v1.json")
+
     exists = tgt.exists()
     is_git = (tgt / ".git").exists()
+    apply = manifest.get("apply", {})
+
+    hashes = HashCache.for_vault(vault)
+    rows = _plan_files(manifest, tgt, hashes) if exists else [
+        {"path": p, "bytes": f.get("bytes"), "sha256": f["sha256"], "target_sha256": None, "status": "added"}
+        for p, f in sorted(_manifest_file_hashes(manifest).items())
+    ]
+    deletions = _plan_deletions(d, tgt, hashes)
+    hashes.save()
+    statuses = PLAN_STATUSES + (DELETION_STATUSES if deletions is not None else ())
+    rows += deletions or []
+    summary = {k: sum(1 for r in rows if r["status"] == k) for k in statuses}
+    parent = (delta_mod.spec(manifest) or {}).get("parent_bundle_id")
+
+    if as_json:
+        print(json.dumps({
+            "schema_version": 1,
+            "bundle_id": bundle_id,
+            "target": str(tgt),
+            "target_exists": exists,
+            "target_is_git": is_git,
+            "delta_parent": parent,
+            "entrypoint": apply.get("default_entrypoint"),
+            "verification": apply.get("verification", {}).get("path"),
+            "summary": summary,
+            "files": rows,
+        }, indent=2, sort_keys=True))
+        return True
+
     print("== cos bundle plan ==")
     print(f"bundle: {bundle_id}")
     print(f"target: {tgt}")
     print(f"target_exists: {exists}")
     print(f"target_is_git: {is_git}")
-    apply = manifest.get("apply", {})
+    if parent:
+        print(f"delta_parent: {parent}")
     print(f"entrypoint: {apply.get('default_entrypoint')}")
     print(f"verification: {apply.get('verification', {}).get('path')}")
-    print("NOTE: v0.1 plan is informational only (no diff).")
+    if not rows:
+        print("NOTE: manifest lists no contents.files; nothing to diff.")
+        return True
+    print("files: " + ", ".join(f"{k}={summary[k]}" for k in statuses))
+    for r in rows:
+        if r["status"] != "unchanged":
+            print(f"  {r['status']:<9} {r['path']}")
     return True
 
-def bundle_apply(bundle_id: str, target: str, mode: str = "GUIDED", force: bool = False, vault_override: Optional[str] = None) -> bool:
-    vault = _vault_root(vault_override)
-    d = _find_bundle_dir(vault, bundle_id)
-    manifest = json.loads((d / "bundle_manifest.v1.json").read_text(encoding="utf-8"))
-    zip_path = d / "bundle.zip"
+def _load_files_doc(store_dir: Path) -> Optional[dict[str, Any]]:
+    p = store_dir / blobs.FILES_FILENAME
+    if not p.exists():
+        return None
+    return memo.read_json(p)
+
+def _load_file_list(store_dir: Path) -> Optional[list[dict[str, Any]]]:
+    doc = _load_files_doc(store_dir)
+    return doc["files"] if doc is not None else None
+
+def _stored_rows(store_dir: Path) -> Optional[list[dict[str, Any]]]:
+    # blob rows for every path the bundle applies: the stored tree (delta or expanded archive), else its zip members
+    doc = _load_files_doc(store_dir)
+    if doc is None:
+        return None
+    return doc["tree"] if doc.get("tree") is not None else doc["files"]
+
+def _extract_bundle(vault: Path, store_dir: Path, dest: Path) -> None:
+    doc = _load_files_doc(store_dir)
+    if doc is not None and doc.get("tree") is not None:
+        delta_mod.materialize(vault, doc, memo.read_json(store_dir / "bundle_manifest.v1.json"), dest)
+        return
+    if doc is not None:
+        blobs.materialize(vault, doc["files"], dest)
+        return
+    # bundles imported before the blob store keep a full bundle.zip
+    zip_path = store_dir / "bundle.zip"
     if not zip_path.exists():
-        raise FileNotFoundError(f"Stored bundle.zip missing: {zip_path}")
+        raise FileNotFoundError(f"Stored bundle content missing: {store_dir}")
+    with zipfile.ZipFile(zip_path, "r") as z:
+        z.extractall(dest)
 
-    tgt = Path(os.path.expanduser(target)).resolve()
-    tgt.mkdir(parents=True, exist_ok=True)
+def _load_import_meta(store_dir: Path) -> dict[str, Any]:
+    p = store_dir / "import_meta.v1.json"
+    if not p.exists():
+        return {}
+    return json.loads(p.read_text(encoding="utf-8"))
+
+def _extracted_tree(vault: Path, store_dir: Path, cache_max_mb: Optional[int]) -> tuple[Path, str, Optional[Path]]:
+    """Return (tree, cache_status, tmp_to_cleanup) for an extracted copy of the bundle.
 
-    # Extract to temp dir
+    Trees are cached under <vault>/cache/extracted keyed by the bundle zip sha256;
+    cache_status is hit | miss | off.
+    """
+    max_bytes = extract_cache.max_bytes_from_env(cache_max_mb)
+    key = _load_import_meta(store_dir).get("zip", {}).get("sha256")
+    if max_bytes > 0 and key:
+        tree, hit = extract_cache.acquire(vault, key, lambda dest: _extract_bundle(vault, store_dir, dest), max_bytes)
+        return tree, ("hit" if hit else "miss"), None
     tmp = Path(tempfile.mkdtemp(prefix="cos_bundle_"))
     try:
-        with zipfile.ZipFile(zip_path, "r") as z:
-            z.extractall(tmp)
+        _extract_bundle(vault, store_dir, tmp)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return tmp, "off", tmp
+
+def _is_overlay_bundle(manifest: dict[str, Any]) -> bool:
+    targets = manifest.get("targets")
+    return isinstance(targets, list) and any(isinstance(t, dict) and t.get("apply_mode") == "overlay" for t in targets)
+
+def _write_file_atomic(src: Path, dst: Path, mode: int) -> None:
+    # temp file next to dst + rename: readers never see a half-written file
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst.with_name(f".{dst.name}.cos-{os.getpid()}.tmp")
+    try:
+        fsutil.clone_file(src, tmp)
+        os.chmod(tmp, mode)
+        os.replace(tmp, dst)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+def _native_plan(vault: Path, store_dir: Path, manifest: dict[str, Any], tgt: Path, force: bool, hashes: HashCache) -> list[dict[str, Any]]:
+    """Plan rows for an engine-native overlay; refuses conflicts and, without force, overwrites."""
+    if not _is_overlay_bundle(manifest):
+        raise ValueError("native apply requires a bundle with a targets[].apply_mode 'overlay' entry")
+    rows = _plan_files(manifest, tgt, hashes)
+    if not rows:
+        raise ValueError("native apply requires manifest contents.files")
+    conflicts = [r["path"] for r in rows if r["status"] == "conflict"]
+    if conflicts:
+        raise ValueError(f"native apply: {len(conflicts)} conflicting path(s) in target, e.g. {conflicts[0]}")
+    changed = [r["path"] for r in rows if r["status"] == "changed"]
+    if changed and not force:
+        raise ValueError(f"native apply would overwrite {len(changed)} changed file(s), e.g. {changed[0]}; re-run with --force")
+    return rows
+
+def _native_sources(vault: Path, store_dir: Path, manifest: dict[str, Any], rows: list[dict[str, Any]], tree: Optional[Path]) -> dict[str, tuple[Path, int]]:
+    """path -> (content file, mode) for every row to write, each checked against its manifest sha256.
+
+    Blob-stored bundles resolve through delta.payload_rows, so a payload inside
+    an embedded contents.archive is expanded; zip-stored bundles read the
+    extracted tree. Raises ValueError naming every unresolvable path before
+    anything is written.
+    """
+    todo = [r for r in rows if r["status"] != "unchanged"]
+    doc = _load_files_doc(store_dir)
+    if doc is not None:
+        stored = {f["path"]: f for f in delta_mod.payload_rows(vault, doc, manifest)}
+        found = {p: (blobs.blob_path(vault, f["sha256"]), f["sha256"], f.get("mode") or 0o644) for p, f in stored.items()}
+    else:
+        found = {}
+        for r in todo:
+            src = tree / r["path"]
+            if src.is_file():
+                found[r["path"]] = (src, fsutil.sha256_file(src)[0], src.stat().st_mode & 0o777)
+    out: dict[str, tuple[Path, int]] = {}
+    missing = []
+    for r in todo:
+        src = found.get(r["path"])
+        if src is None or src[1] != r["sha256"]:
+            missing.append(r["path"])
+        else:
+            out[r["path"]] = (src[0], src[2])
+    if missing:
+        raise ValueError(f"bundle does not carry content matching the manifest sha256 for {len(missing)} path(s), "
+                         f"e.g. {missing[0]}; nothing was written (use script apply)")
+    return out
+
+def _native_overlay(vault: Path, store_dir: Path, manifest: dict[str, Any], rows: list[dict[str, Any]], tgt: Path, hashes: HashCache, tree: Optional[Path], lf) -> dict[str, Any]:
+    """Write only added/changed files into the target. Returns written/skipped counts and bytes.
+
+    Every source is resolved and checked first, so a bundle that cannot be
+    applied natively fails before the target is touched.
+    """
+    sources = _native_sources(vault, store_dir, manifest, rows, tree)
+    delta = {"written": 0, "skipped": 0, "bytes_written": 0, "bytes_skipped": 0}
+    try:
+        for r in rows:
+            if r["status"] == "unchanged":
+                delta["skipped"] += 1
+                delta["bytes_skipped"] += int(r.get("bytes") or 0)
+                continue
+            src, mode = sources[r["path"]]
+            dst = tgt / r["path"]
+            _write_file_atomic(src, dst, mode)
+            hashes.record(dst, r["sha256"])
+            delta["written"] += 1
+            delta["bytes_written"] += int(r.get("bytes") or 0)
+            lf.write(f"{r['status']}: {r['path']}\n")
+    finally:
+        hashes.save()
+    return delta
+
+def _verify_stored_contents(vault: Path, store_dir: Path, manifest: dict[str, Any], jobs: int = 0) -> dict[str, Any]:
+    """Re-check stored content against the manifest: blobs for blob-stored bundles, zip members otherwise."""
+    files = _stored_rows(store_dir)
+    if files is None:
+        return verify.verify_zip(store_dir / "bundle.zip", manifest, jobs)
+    by_path = {f["path"]: blobs.blob_path(vault, f["sha256"]) for f in files}
+    return verify.verify_blobs(by_path.get, manifest, jobs)
+
+def _rusage(ru: Any, seconds: float) -> dict[str, Any]:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = ru.ru_maxrss // 1024 if sys.platform == "darwin" else ru.ru_maxrss
+    return {"seconds": round(seconds, 6), "cpu_user_s": round(ru.ru_utime, 6), "cpu_sys_s": round(ru.ru_stime, 6), "max_rss_kb": int(rss)}
+
+def _run_logged(cmd: list[str], cwd: Path, lf, timeout: Optional[float]) -> tuple[Optional[int], dict[str, Any]]:
+    """Run cmd with output appended to lf. Returns (exit code or None on timeout, resource usage).
+
+    The child gets its own process group so a timeout also stops anything it spawned.
+    Usage comes from wait4 for this child alone, so it stays exact when several
+    applies run concurrently (process-wide RUSAGE_CHILDREN would mix them).
+    """
+    t0 = time.monotonic()
+    proc = subprocess.Popen(cmd, cwd=str(cwd), stdout=lf, stderr=subprocess.STDOUT, start_new_session=True)
+    fired = threading.Event()
+
+    def kill() -> None:
+        fired.set()
+        try:
+            os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+    timer = threading.Timer(timeout, kill) if timeout is not None else None
+    if timer is not None:
+        timer.start()
+    try:
+        _, status, ru = os.wait4(proc.pid, 0)
+    finally:
+        if timer is not None:
+            timer.cancel()
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    usage = _rusage(ru, time.monotonic() - t0)
+    if fired.is_set():
+        lf.write(f"\nTIMEOUT after {timeout}s\n")
+        return None, usage
+    return proc.returncode, usage
+
+def _tree_stats(tree: Path) -> tuple[int, int]:
+    files = total = 0
+    for root, _, names in os.walk(tree):
+        for n in names:
+            files += 1
+            total += os.lstat(os.path.join(root, n)).st_size
+    return files, total
+
+def _staged_paths(store_dir: Path, manifest: dict[str, Any]) -> list[str]:
+    """Everything an apply of this bundle may write or delete in the target."""
+    paths = [_safe_member_path(p) for p in _manifest_file_hashes(manifest)]
+    doc = _load_files_doc(store_dir) or {}
+    paths += [f["path"] for f in doc.get("deleted") or []]
+    if not paths:
+        raise ValueError("staged apply requires manifest contents.files (the paths to snapshot)")
+    return paths
+
+def _apply_to_target(
+    vault: Path,
+    store_dir: Path,
+    manifest: dict[str, Any],
+    bundle_id: str,
+    tgt: Path,
+    log_dir: Path,
+    tree: Optional[Path],
+    hashes: HashCache,
+    mode: str,
+    force: bool,
+    native: bool,
+    timeout: Optional[float],
+    rows: Optional[list[dict[str, Any]]] = None,
+    snapshot_dir: Optional[Path] = None,
+) -> dict[str, Any]:
+    """Apply + verify one target; returns the per-target part of the apply receipt.
+
+    With snapshot_dir (staged apply) the paths the bundle touches are
+    snapshotted first and put back if apply or verify fails.
+    """
+    if snapshot_dir is None:
+        return _apply_and_verify(vault, store_dir, manifest, bundle_id, tgt, log_dir, tree, hashes, mode, force, native, timeout, rows)
+    t0 = time.monotonic()
+    tgt.mkdir(parents=True, exist_ok=True)
+    # native apply replaces files by rename, so hardlinks are safe; scripts may rewrite files in place
+    snap = staging.snapshot(tgt, _staged_paths(store_dir, manifest), snapshot_dir, link=native)
+    try:
+        result = _apply_and_verify(vault, store_dir, manifest, bundle_id, tgt, log_dir, tree, hashes, mode, force, native, timeout, rows)
+    except BaseException:
+        staging.rollback(tgt, snap)
+        staging.discard(snap)
+        raise
+    staged = {k: v for k, v in snap.items() if k not in ("dir", "entries", "new_dirs")}
+    staged["rolled_back"] = False
+    phases = {"snapshot": {"seconds": snap["seconds"]}, **result["phases"]}
+    if result["status"] != "pass":
+        rb = staging.rollback(tgt, snap)
+        staged.update(rolled_back=True, restored=rb["restored"], removed=rb["removed"])
+        phases["rollback"] = {"seconds": rb["seconds"]}
+    staging.discard(snap)
+    return {**result, "staged": staged, "phases": phases, "duration_s": round(time.monotonic() - t0, 6)}
+
+def _apply_and_verify(
+    vault: Path,
+    store_dir: Path,
+    manifest: dict[str, Any],
+    bundle_id: str,
+    tgt: Path,
+    log_dir: Path,
+    tree: Optional[Path],
+    hashes: HashCache,
+    mode: str,
+    force: bool,
+    native: bool,
+    timeout: Optional[float],
+    rows: Optional[list[dict[str, Any]]] = None,
+) -> dict[str, Any]:
+    t0 = time.monotonic()
+    tgt.mkdir(parents=True, exist_ok=True)
+    log_dir.mkdir(parents=True, exist_ok=True)
+    apply_log = log_dir / "bundle_apply.log"
+
+    delta = None
+    deletions = None
+    error = None
+    timed_out = False
+    phases: dict[str, Any] = {}
+    with apply_log.open("w", encoding="utf-8") as lf:
+        lf.write(f"mode={mode}\n")
+        lf.write(f"bundle_id={bundle_id}\n")
+        lf.write(f"target={tgt}\n")
+        if native:
+            lf.write("strategy=native\n\n")
+            lf.flush()
+            if rows is None:
+                tp = time.monotonic()
+                rows = _native_plan(vault, store_dir, manifest, tgt, force, hashes)
+                phases["plan"] = {"seconds": round(time.monotonic() - tp, 6)}
+            tp, cpu = time.monotonic(), time.thread_time()
+            apply_exit: Optional[int] = 0
+            try:
+                delta = _native_overlay(vault, store_dir, manifest, rows, tgt, hashes, tree, lf)
+                lf.write(f"\nwritten={delta['written']} skipped={delta['skipped']} bytes_written={delta['bytes_written']}\n")
+            except ValueError as e:
+                # recorded as a failed apply (receipt + ledger), like a failing apply script
+                error = str(e)
+                lf.write(f"\nERROR: {error}\n")
+                apply_exit = 1
+            # in-process: this thread's CPU time stands in for the child's
+            phases["apply"] = {"seconds": round(time.monotonic() - tp, 6), "cpu_user_s": round(time.thread_time() - cpu, 6), "cpu_sys_s": 0.0, "max_rss_kb": None}
+        else:
+            entry = manifest["apply"]["default_entrypoint"]
+            cmd = ["bash", str(tree / entry), "--target", str(tgt)]
+            if force:
+                cmd.append("--force")
+            lf.write("cmd=" + " ".join(cmd) + "\n\n")
+            lf.flush()
+            # Execute apply
+            apply_exit, phases["apply"] = _run_logged(cmd, tree, lf, timeout)
+            timed_out = apply_exit is None
+        if apply_exit == 0:
+            # a delta also removes what it deleted from its parent
+            drows = _plan_deletions(store_dir, tgt, hashes)
+            if drows is not None:
+                deletions = _apply_deletions(drows, tgt, force, lf)
+                hashes.save()
+
+    # Verify
+    verify_path = manifest.get("apply", {}).get("verification", {}).get("path", "")
+    verify_exit = None
+    verify_log = None
+    if verify_path and not timed_out:
+        verify_log = log_dir / "bundle_verify.log"
+        vcmd = ["bash", verify_path]
+        with verify_log.open("w", encoding="utf-8") as lf:
+            lf.write("cmd=" + " ".join(vcmd) + "\n\n")
+            lf.flush()
+            remaining = None if timeout is None else max(1.0, timeout - (time.monotonic() - t0))
+            verify_exit, phases["verify"] = _run_logged(vcmd, tgt, lf, remaining)
+            timed_out = verify_exit is None
+
+    status = "pass" if (apply_exit == 0 and not timed_out and (verify_exit in (None, 0))) else "fail"
+    return {
+        "target": str(tgt),
+        "strategy": "native" if native else "script",
+        "apply_exit": apply_exit,
+        "timed_out": timed_out,
+        "verify": {"path": verify_path or None, "exit": verify_exit, "log": str(verify_log) if verify_log else None},
+        "logs": {"apply": str(apply_log)},
+        "delta": delta,
+        "deletions": deletions,
+        "phases": phases,
+        "duration_s": round(time.monotonic() - t0, 6),
+        "status": status,
+        **({"error": error} if error else {}),
+    }
+
+def _apply_record(run_id: str, bundle_id: str, result: dict[str, Any], receipt_path: Path, shared_phases: Optional[dict[str, Any]] = None) -> dict[str, Any]:
+    phases = {**(shared_phases or {}), **result.get("phases", {})}
+    cpu = [p.get("cpu_user_s", 0) + p.get("cpu_sys_s", 0) for p in phases.values() if "cpu_user_s" in p]
+    rss = [p["max_rss_kb"] for p in phases.values() if p.get("max_rss_kb") is not None]
+    return {
+        "kind": "apply",
+        "run_id": run_id,
+        "bundle_id": bundle_id,
+        "target": result["target"],
+        "status": result["status"],
+        "strategy": result.get("strategy"),
+        "duration_s": result.get("duration_s"),
+        "phases": {k: p["seconds"] for k, p in phases.items()},
+        "cpu_s": round(sum(cpu), 6) if cpu else None,
+        "max_rss_kb": max(rss) if rss else None,
+        "rolled_back": (result.get("staged") or {}).get("rolled_back"),
+        "receipt": str(receipt_path),
+    }
+
+def _content_verification_failed(vault: Path, bundle_id: str, targets: list[Path], mode: str, force: bool, err: Exception) -> bool:
+    run_id = _run_id()
+    run_dir = vault / "runs" / run_id
+    run_dir.mkdir(parents=True, exist_ok=True)
+    receipt = {
+        "schema_version": 1,
+        "apply_id": f"cos_apply_{run_id}",
+        "applied_at": _now_iso(),
+        "bundle_id": bundle_id,
+        "target": str(targets[0]) if len(targets) == 1 else None,
+        "targets": [str(t) for t in targets],
+        "mode": mode,
+        "force": bool(force),
+        "content_verification": {"status": "fail", "error": str(err)},
+        "status": "fail",
+    }
+    _write_json(run_dir / "bundle_apply_receipt.v1.json", receipt)
+    ledger.append(vault, [_apply_record(run_id, bundle_id, {"target": str(t), "status": "fail"}, run_dir / "bundle_apply_receipt.v1.json")
+                          for t in targets])
+    print(f"Content verification failed: {err}")
+    print("Apply status: fail")
+    print(f"Receipt: {run_dir / 'bundle_apply_receipt.v1.json'}")
+    return False
+
+def _prepare_apply(vault: Path, store_dir: Path, native: bool, cache_max_mb: Optional[int]) -> tuple[Optional[Path], str, Optional[Path], dict[str, Any]]:
+    """Extract (or reuse the cached extraction); native apply of blob-stored bundles reads blobs directly.
+
+    Returns (tree, cache_status, tmp_to_cleanup, extract phase stats).
+    """
+    t0 = time.monotonic()
+    if native and _load_file_list(store_dir) is not None:
+        return None, "off", None, {"seconds": 0.0, "cache": "off", "files": 0, "bytes": 0}
+    tree, cache_status, cleanup = _extracted_tree(vault, store_dir, cache_max_mb)
+    seconds = time.monotonic() - t0
+    files, nbytes = _tree_stats(tree)
+    return tree, cache_status, cleanup, {"seconds": round(seconds, 6), "cache": cache_status, "files": files, "bytes": nbytes}
+
+def bundle_apply(bundle_id: str, target: str, mode: str = "GUIDED", force: bool = False, vault_override: Optional[str] = None, cache_max_mb: Optional[int] = None, native: bool = False, verify_contents: bool = False, timeout: Optional[float] = None, staged: bool = False) -> int:
+    vault = _vault_root(vault_override)
+    tgt = Path(os.path.expanduser(target)).resolve()
+    t_start = time.monotonic()
+    with locks.vault_lock(vault), locks.bundle_lock(vault, bundle_id), locks.target_lock(vault, tgt, exclusive=True):
+        shared: dict[str, Any] = {"lock": {"seconds": round(time.monotonic() - t_start, 6)}}
+        return _bundle_apply(vault, bundle_id, tgt, mode, force, cache_max_mb, native, verify_contents, timeout, staged, t_start, shared)
 
+def _bundle_apply(vault: Path, bundle_id: str, tgt: Path, mode: str, force: bool, cache_max_mb: Optional[int], native: bool, verify_contents: bool, timeout: Optional[float], staged: bool, t_start: float, shared: dict[str, Any]) -> int:
+    d = _find_bundle_dir(vault, bundle_id)
+    manifest = memo.read_json(d / "bundle_manifest.v1.json")
+    tgt.mkdir(parents=True, exist_ok=True)
+
+    content_verification = None
+    if verify_contents:
+        try:
+            content_verification = _verify_stored_contents(vault, d, manifest)
+        except verify.ContentMismatch as e:
+            return _content_verification_failed(vault, bundle_id, [tgt], mode, force, e)
+        shared["content_verification"] = {"seconds": content_verification["seconds"]}
+
+    hashes = HashCache.for_vault(vault)
+    rows = None
+    if native:
+        tp = time.monotonic()
+        rows = _native_plan(vault, d, manifest, tgt, force, hashes)
+        shared["plan"] = {"seconds": round(time.monotonic() - tp, 6)}
+
+    tree, cache_status, cleanup, shared["extract"] = _prepare_apply(vault, d, native, cache_max_mb)
+    try:
         entry = manifest["apply"]["default_entrypoint"]
-        entry_path = tmp / entry
-        if not entry_path.exists():
+        if not native and not (tree / entry).exists():
             raise FileNotFoundError(f"Entrypoint not found in bundle: {entry}")
 
         # Prepare run dir
         run_id = _run_id()
         run_dir = vault / "runs" / run_id
-        log_dir = run_dir / "logs"
-        log_dir.mkdir(parents=True, exist_ok=True)
         run_dir.mkdir(parents=True, exist_ok=True)
-        apply_log = log_dir / "bundle_apply.log"
 
-        cmd = ["bash", str(entry_path), "--target", str(tgt)]
-        if force:
-            cmd.append("--force")
+        result = _apply_to_target(vault, d, manifest, bundle_id, tgt, run_dir / "logs", tree, hashes, mode, force, native, timeout, rows=rows,
+                                  snapshot_dir=run_dir / "snapshot" if staged else None)
+        status = result["status"]
 
-        # Execute apply
-        with apply_log.open("w", encoding="utf-8") as lf:
-            lf.write(f"mode={mode}\n")
-            lf.write(f"bundle_id={bundle_id}\n")
-            lf.write(f"target={tgt}\n")
-            lf.write("cmd=" + " ".join(cmd) + "\n\n")
-            proc = subprocess.run(cmd, cwd=str(tmp), stdout=lf, stderr=subprocess.STDOUT)
-            apply_exit = proc.returncode
-
-        # Verify
-        verify_path = manifest.get("apply", {}).get("verification", {}).get("path", "")
-        verify_exit = None
-        verify_log = None
-        if verify_path:
-            verify_log = log_dir / "bundle_verify.log"
-            vcmd = ["bash", verify_path]
-            with verify_log.open("w", encoding="utf-8") as lf:
-                lf.write("cmd=" + " ".join(vcmd) + "\n\n")
-                proc2 = subprocess.run(vcmd, cwd=str(tgt), stdout=lf, stderr=subprocess.STDOUT)
-                verify_exit = proc2.returncode
-
-        status = "pass" if (apply_exit == 0 and (verify_exit in (None, 0))) else "fail"
+        receipt = {
+            "schema_version": 1,
+            "apply_id": f"cos_apply_{run_id}",
+            "applied_at": _now_iso(),
+            "bundle_id": bundle_id,
+            "mode": mode,
+            "force": bool(force),
+            **result,
+            "phases": {**shared, **result["phases"]},
+            "total_seconds": round(time.monotonic() - t_start, 6),
+            "extract": {"cache": cache_status, "dir": str(tree) if tree is not None else None},
+            "content_verification": content_verification,
+        }
+        _write_json(run_dir / "bundle_apply_receipt.v1.json", receipt)
+        ledger.append(vault, [_apply_record(run_id, bundle_id, result, run_dir / "bundle_apply_receipt.v1.json", shared)])
+        if result["delta"] is not None:
+            delta = result["delta"]
+            print(f"Files: {delta['written']} written, {delta['skipped']} unchanged ({delta['bytes_written']} bytes written)")
+        if result["deletions"] and (result["deletions"]["removed"] or result["deletions"]["kept"]):
+            dl = result["deletions"]
+            print(f"Deleted: {dl['removed']} file(s) the parent shipped" + (f"; kept {len(dl['kept'])} changed locally (use --force)" if dl["kept"] else ""))
+        if result.get("error"):
+            print(f"Native apply failed: {result['error']}")
+        if result["timed_out"]:
+            print(f"Timed out after {timeout}s")
+        if result.get("staged", {}).get("rolled_back"):
+            st = result["staged"]
+            print(f"Rolled back: {st['restored']} file(s) restored, {st['removed']} removed")
+        print(f"Apply status: {status}")
+        print(f"Receipt: {run_dir / 'bundle_apply_receipt.v1.json'}")
+        return _exit_code(status)
+    finally:
+        if cleanup is not None:
+            shutil.rmtree(cleanup, ignore_errors=True)
+
+def _read_targets_file(path: str) -> list[str]:
+    out = []
+    for line in Path(os.path.expanduser(path)).read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            out.append(line)
+    return out
+
+def _target_log_slug(i: int, tgt: Path) -> str:
+    name = "".join(c if c.isalnum() or c in "-_." else "_" for c in tgt.name) or "root"
+    return f"{i:03d}_{name}"
 
+def bundle_apply_many(
+    bundle_id: str,
+    targets: list[str],
+    targets_file: Optional[str] = None,
+    mode: str = "GUIDED",
+    force: bool = False,
+    vault_override: Optional[str] = None,
+    cache_max_mb: Optional[int] = None,
+    native: bool = False,
+    verify_contents: bool = False,
+    jobs: int = 0,
+    timeout: Optional[float] = None,
+    staged: bool = False,
+) -> int:
+    """Apply one bundle to many targets concurrently, one log dir per target and a summary receipt."""
+    raw = list(targets) + (_read_targets_file(targets_file) if targets_file else [])
+    tgts: list[Path] = []
+    for t in raw:
+        p = Path(os.path.expanduser(t)).resolve()
+        if p not in tgts:
+            tgts.append(p)
+    if not tgts:
+        raise ValueError("No targets given (use --target and/or --targets-file)")
+
+    vault = _vault_root(vault_override)
+    t_start = time.monotonic()
+    with locks.vault_lock(vault), locks.bundle_lock(vault, bundle_id):
+        shared: dict[str, Any] = {"lock": {"seconds": round(time.monotonic() - t_start, 6)}}
+        return _bundle_apply_many(vault, bundle_id, tgts, mode, force, cache_max_mb, native, verify_contents, jobs, timeout, staged, t_start, shared)
+
+def _bundle_apply_many(vault: Path, bundle_id: str, tgts: list[Path], mode: str, force: bool, cache_max_mb: Optional[int], native: bool, verify_contents: bool, jobs: int, timeout: Optional[float], staged: bool, t_start: float, shared: dict[str, Any]) -> int:
+    d = _find_bundle_dir(vault, bundle_id)
+    manifest = memo.read_json(d / "bundle_manifest.v1.json")
+
+    content_verification = None
+    if verify_contents:
+        try:
+            content_verification = _verify_stored_contents(vault, d, manifest)
+        except verify.ContentMismatch as e:
+            return _content_verification_failed(vault, bundle_id, tgts, mode, force, e)
+        shared["content_verification"] = {"seconds": content_verification["seconds"]}
+
+    hashes = HashCache.for_vault(vault)
+    workers = jobs if jobs > 0 else min(8, len(tgts))
+    tree, cache_status, cleanup, shared["extract"] = _prepare_apply(vault, d, native, cache_max_mb)
+    try:
+        entry = manifest["apply"]["default_entrypoint"]
+        if not native and not (tree / entry).exists():
+            raise FileNotFoundError(f"Entrypoint not found in bundle: {entry}")
+
+        run_id = _run_id()
+        run_dir = vault / "runs" / run_id
+        run_dir.mkdir(parents=True, exist_ok=True)
+
+        def one(item: tuple[int, Path]) -> dict[str, Any]:
+            i, tgt = item
+            slug = _target_log_slug(i, tgt)
+            log_dir = run_dir / "logs" / slug
+            t0 = time.monotonic()
+            try:
+                # targets are locked one by one: a busy target waits without holding up the others
+                with locks.target_lock(vault, tgt, exclusive=True) as waited:
+                    result = _apply_to_target(vault, d, manifest, bundle_id, tgt, log_dir, tree, hashes, mode, force, native, timeout,
+                                              snapshot_dir=run_dir / "snapshot" / slug if staged else None)
+                result["phases"] = {"lock": {"seconds": round(waited, 6)}, **result["phases"]}
+                return result
+            except Exception as e:
+                return {"target": str(tgt), "status": "fail", "error": str(e), "duration_s": round(time.monotonic() - t0, 6)}
+
+        t0 = time.monotonic()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(one, enumerate(tgts)))
+        elapsed = time.monotonic() - t0
+
+        passed = sum(1 for r in results if r["status"] == "pass")
+        status = "pass" if passed == len(results) else ("fail" if passed == 0 else "partial")
+        durations = sorted(r["duration_s"] for r in results)
         receipt = {
             "schema_version": 1,
             "apply_id": f"cos_apply_{run_id}",
             "applied_at": _now_iso(),
             "bundle_id": bundle_id,
-            "target": str(tgt),
             "mode": mode,
             "force": bool(force),
-            "apply_exit": apply_exit,
-            "verify": {"path": verify_path or None, "exit": verify_exit, "log": str(verify_log) if verify_log else None},
-            "logs": {"apply": str(apply_log)},
+            "strategy": "native" if native else "script",
+            "jobs": workers,
+            "timeout_s": timeout,
+            "staged": staged,
+            "extract": {"cache": cache_status, "dir": str(tree) if tree is not None else None},
+            "content_verification": content_verification,
+            "phases": shared,
+            "total_seconds": round(time.monotonic() - t_start, 6),
+            "summary": {
+                "total": len(results),
+                "passed": passed,
+                "failed": len(results) - passed,
+                "timed_out": sum(1 for r in results if r.get("timed_out")),
+                "rolled_back": sum(1 for r in results if (r.get("staged") or {}).get("rolled_back")),
+                "seconds": round(elapsed, 6),
+                "duration_min_s": durations[0],
+                "duration_max_s": durations[-1],
+            },
+            "targets": results,
             "status": status,
         }
-        (run_dir / "bundle_apply_receipt.v1.json").write_text(json.dumps(receipt, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        receipt_path = run_dir / "bundle_apply_fanout_receipt.v1.json"
+        _write_json(receipt_path, receipt)
+        ledger.append(vault, [_apply_record(run_id, bundle_id, r, receipt_path, shared) for r in results])
+        for r in results:
+            extra = " (timeout)" if r.get("timed_out") else (f": {r['error']}" if r.get("error") else "")
+            if (r.get("staged") or {}).get("rolled_back"):
+                extra += " (rolled back)"
+            print(f"- {r['status']:<4}  {r['target']}  {r['duration_s']:.2f}s{extra}")
+        print(f"Applied to {passed}/{len(results)} targets with {workers} workers in {elapsed:.2f}s")
         print(f"Apply status: {status}")
-        print(f"Receipt: {run_dir / 'bundle_apply_receipt.v1.json'}")
-        return status == "pass"
+        print(f"Receipt: {receipt_path}")
+        return _exit_code(status)
     finally:
-        shutil.rmtree(tmp, ignore_errors=True)
+        if cleanup is not None:
+            shutil.rmtree(cleanup, ignore_errors=True)
+
+def _parse_when(s: str) -> float:
+    """Epoch seconds for an ISO date/time (UTC unless given) or a relative age like 30d, 12h, 45m."""
+    s = s.strip()
+    units = {"d": 86400, "h": 3600, "m": 60, "s": 1}
+    if s[-1:] in units and s[:-1].isdigit():
+        return time.time() - int(s[:-1]) * units[s[-1]]
+    try:
+        dt = datetime.fromisoformat(s.replace("Z", "+00:00"))
+    except ValueError:
+        raise ValueError(f"Unrecognized time: {s} (use e.g. 2026-01-31, 2026-01-31T12:00:00Z or 30d/12h/45m)")
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+def _print_runs(recs: list[dict[str, Any]]) -> None:
+    for r in recs:
+        where = r.get("target") or r.get("source") or r.get("remote") or ""
+        print(f"- {r['at']}  {r['kind']:<6}  {r['status']:<4}  {r.get('bundle_id') or '-'}  {where}  ({r['run_id']})")
+
+def runs_list(vault_override: Optional[str] = None, limit: int = 20, as_json: bool = False) -> bool:
+    return runs_query(vault_override=vault_override, limit=limit, as_json=as_json)
+
+def runs_query(
+    vault_override: Optional[str] = None,
+    bundle_id: Optional[str] = None,
+    status: Optional[str] = None,
+    kind: Optional[str] = None,
+    target: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    limit: Optional[int] = None,
+    as_json: bool = False,
+) -> bool:
+    vault = _vault_root(vault_override)
+    tgt = str(Path(os.path.expanduser(target)).resolve()) if target else None
+    recs = ledger.query(
+        vault,
+        bundle_id=bundle_id,
+        status=status,
+        kind=kind,
+        target=tgt,
+        since=_parse_when(since) if since else None,
+        until=_parse_when(until) if until else None,
+        limit=limit,
+    )
+    if as_json:
+        print(json.dumps(recs, indent=2, sort_keys=True))
+    elif not recs:
+        print("No runs found.")
+    else:
+        _print_runs(recs)
+    return True
+
+def _percentile(sorted_vals: list[float], q: float) -> float:
+    # nearest-rank
+    k = max(0, min(len(sorted_vals) - 1, int(round(q / 100 * len(sorted_vals) + 0.5)) - 1))
+    return sorted_vals[k]
+
+def _dist(vals: list[float]) -> Optional[dict[str, float]]:
+    vals = sorted(v for v in vals if v is not None)
+    if not vals:
+        return None
+    return {"n": len(vals), "p50": _percentile(vals, 50), "p90": _percentile(vals, 90), "p99": _percentile(vals, 99), "max": vals[-1]}
+
+def runs_stats(
+    vault_override: Optional[str] = None,
+    bundle_id: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    as_json: bool = False,
+) -> bool:
+    """Per-bundle apply percentiles (wall time per phase, child CPU, max RSS) from the ledger."""
+    vault = _vault_root(vault_override)
+    recs = ledger.query(
+        vault,
+        bundle_id=bundle_id,
+        kind="apply",
+        since=_parse_when(since) if since else None,
+        until=_parse_when(until) if until else None,
+    )
+    by_bundle: dict[str, list[dict[str, Any]]] = {}
+    for r in recs:
+        by_bundle.setdefault(r.get("bundle_id") or "-", []).append(r)
+
+    stats = {}
+    for bid, rs in sorted(by_bundle.items()):
+        phase_names = sorted({k for r in rs for k in (r.get("phases") or {})})
+        stats[bid] = {
+            "runs": len(rs),
+            "failed": sum(1 for r in rs if r["status"] != "pass"),
+            "duration_s": _dist([r.get("duration_s") for r in rs]),
+            "phases": {k: _dist([(r.get("phases") or {}).get(k) for r in rs]) for k in phase_names},
+            "cpu_s": _dist([r.get("cpu_s") for r in rs]),
+            "max_rss_kb": _dist([r.get("max_rss_kb") for r in rs]),
+        }
+    if as_json:
+        print(json.dumps(stats, indent=2, sort_keys=True))
+        return True
+    if not stats:
+        print("No apply runs found.")
+        return True
+    for bid, st in stats.items():
+        print(f"{bid}: {st['runs']} applies, {st['failed']} failed")
+        rows = [("total", st["duration_s"])] + list(st["phases"].items()) + [("cpu_s", st["cpu_s"])]
+        for name, dist in rows:
+            if dist:
+                print(f"  {name:<22} p50 {dist['p50']:.3f}s  p90 {dist['p90']:.3f}s  p99 {dist['p99']:.3f}s  max {dist['max']:.3f}s")
+        if st["max_rss_kb"]:
+            d = st["max_rss_kb"]
+            print(f"  {'max_rss_kb':<22} p50 {d['p50']}  p90 {d['p90']}  p99 {d['p99']}  max {d['max']}")
+    return True
+
+def runs_reindex(vault_override: Optional[str] = None) -> bool:
+    vault = _vault_root(vault_override)
+    idx = ledger.rebuild_index(vault)
+    print(f"Ledger segments: {len(idx['segments'])}, records: {sum(s['count'] for s in idx['segments'])}")
+    print(f"Index: {ledger.ledger_root(vault) / ledger.INDEX_FILENAME}")
+    return True
+
+def _fmt_bytes(n: float) -> str:
+    if n < 1024:
+        return f"{int(n)} B"
+    for unit in ("KiB", "MiB", "GiB"):
+        n /= 1024
+        if n < 1024 or unit == "GiB":
+            break
+    return f"{n:.1f} {unit}"
+
+def vault_gc(
+    vault_override: Optional[str] = None,
+    keep_runs: int = 10,
+    superseded_days: float = 30,
+    compact_days: float = 7,
+    delete: bool = False,
+    as_json: bool = False,
+) -> bool:
+    """Report (and with delete=True, carry out) retention-driven cleanup of the vault."""
+    if keep_runs < 1:
+        raise ValueError("--keep-runs must be at least 1")
+    vault = _vault_root(vault_override)
+    # deleting needs the vault to itself; a dry run only reads
+    with locks.vault_lock(vault, exclusive=delete):
+        return _vault_gc(vault, keep_runs, superseded_days, compact_days, delete, as_json)
+
+def _vault_gc(vault: Path, keep_runs: int, superseded_days: float, compact_days: float, delete: bool, as_json: bool) -> bool:
+    p = vault_gc_mod.plan(vault, keep_runs=keep_runs, superseded_days=superseded_days, compact_days=compact_days)
+    if as_json and not delete:
+        print(json.dumps(p, indent=2, sort_keys=True))
+        return True
+
+    labels = {
+        "runs": "run dirs to delete",
+        "logs": "run logs to compact",
+        "bundles": "bundle stores to delete",
+        "blobs": "unreferenced objects to delete",
+        "extract_cache": "extracted-tree cache entries to delete",
+    }
+    if not as_json:
+        print("Vault GC " + ("(deleting)" if delete else "(dry run; pass --delete to apply)"))
+        for key, items in p["sections"].items():
+            print(f"- {labels[key]}: {len(items)} ({_fmt_bytes(p['bytes'][key])})")
+            if key == "bundles":
+                for item in items:
+                    print(f"    {item.get('bundle_id')}: {item['reason']}")
+        print(f"Reclaimable: up to {_fmt_bytes(sum(p['bytes'].values()))} (log compaction reclaims less than its listed size)")
+    if not delete:
+        return True
+
+    done = vault_gc_mod.execute(vault, p)
+    run_id = _run_id()
+    run_dir = vault / "runs" / run_id
+    run_dir.mkdir(parents=True, exist_ok=True)
+    receipt = {
+        "schema_version": 1,
+        "gc_id": f"cos_gc_{run_id}",
+        "collected_at": _now_iso(),
+        **p,
+        "reclaimed": done,
+        "status": "pass",
+    }
+    receipt_path = run_dir / "vault_gc_receipt.v1.json"
+    _write_json(receipt_path, receipt)
+    ledger.append(vault, [{"kind": "gc", "run_id": run_id, "bundle_id": None, "status": "pass", "receipt": str(receipt_path)}])
+    if as_json:
+        print(json.dumps(receipt, indent=2, sort_keys=True))
+        return True
+    print(f"Reclaimed: {_fmt_bytes(sum(done.values()))}")
+    print(f"Receipt: {receipt_path}")
+    return True
+
+def vault_replicate(
+    direction: str,
+    remote: str,
+    bundle_ids: Optional[list[str]] = None,
+    vault_override: Optional[str] = None,
+    remote_cmd: str = replication.DEFAULT_REMOTE_CMD,
+    as_json: bool = False,
+) -> int:
+    """Push bundles to (or pull them from) another vault: a directory, or ssh://host/path / host:path."""
+    if direction not in ("push", "pull"):
+        raise ValueError(f"unknown replication direction: {direction}")
+    vault = _vault_root(vault_override)
+    vault.mkdir(parents=True, exist_ok=True)
+    t0 = time.monotonic()
+    local = replication.LocalPeer(vault)
+    try:
+        peer = replication.open_peer(remote, remote_cmd)
+    except Exception:
+        local.close()
+        raise
+    try:
+        src, dst = (local, peer) if direction == "push" else (peer, local)
+        if not as_json:
+            print(f"Vault {direction}: {src.label} -> {dst.label}")
+        results = replication.replicate(src, dst, bundle_ids, log=(lambda _: None) if as_json else print)
+    finally:
+        peer.close()
+        local.close()
+
+    run_id = _run_id()
+    run_dir = vault / "runs" / run_id
+    run_dir.mkdir(parents=True, exist_ok=True)
+    passed = sum(1 for r in results if r["status"] == "pass")
+    status = "pass" if passed == len(results) else ("fail" if passed == 0 else "partial")
+    totals = {k: sum(r[k] for r in results) for k in ("objects_sent", "bytes_sent", "bytes_matched", "bytes_resumed")}
+    receipt = {
+        "schema_version": 1,
+        "replication_id": f"cos_{direction}_{run_id}",
+        "direction": direction,
+        "local_vault": str(vault),
+        "remote": remote,
+        "replicated_at": _now_iso(),
+        "bundles": results,
+        "totals": totals,
+        "seconds": round(time.monotonic() - t0, 6),
+        "status": status,
+    }
+    receipt_path = run_dir / "vault_replication_receipt.v1.json"
+    _write_json(receipt_path, receipt)
+    ledger.append(vault, [{"kind": direction, "run_id": run_id, "bundle_id": r["bundle_id"], "status": r["status"], "remote": remote,
+                           "bytes_sent": r["bytes_sent"], "receipt": str(receipt_path)} for r in results])
+    if as_json:
+        print(json.dumps(receipt, indent=2, sort_keys=True))
+        return _exit_code(status)
+    if not results:
+        print("Up to date: nothing to transfer")
+    else:
+        print(f"Transferred: {totals['objects_sent']} object(s), {_fmt_bytes(totals['bytes_sent'])}"
+              + (f"; {_fmt_bytes(totals['bytes_matched'])} reused by rolling checksum" if totals["bytes_matched"] else "")
+              + (f"; {_fmt_bytes(totals['bytes_resumed'])} resumed from an earlier run" if totals["bytes_resumed"] else ""))
+    print(f"Receipt: {receipt_path}")
+    return _exit_code(status)
+
+def vault_serve_stdio(vault_override: Optional[str] = None) -> bool:
+    """The remote half of push/pull over ssh: answer replication requests on stdin/stdout."""
+    vault = _vault_root(vault_override)
+    vault.mkdir(parents=True, exist_ok=True)
+    return replication.serve_stdio(vault)
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+META_FILENAME = "cache_meta.v1.json"
+DEFAULT_MAX_MB = 2048
+
+def cache_root(vault: Path) -> Path:
+    return vault / "cache" / "extracted"
+
+def max_bytes_from_env(override_mb: Optional[int] = None) -> int:
+    if override_mb is not None:
+        return max(0, override_mb) * 1024 * 1024
+    env = os.environ.get("CREATIVE_OS_EXTRACT_CACHE_MB", "").strip()
+    mb = int(env) if env else DEFAULT_MAX_MB
+    return max(0, mb) * 1024 * 1024
+
+def _snapshot(tree: Path) -> list[dict[str, Any]]:
+    out = []
+    for p in sorted(tree.rglob("*")):
+        if p.is_file() and not p.is_symlink():
+            st = p.stat()
+            out.append({"path": p.relative_to(tree).as_posix(), "bytes": st.st_size, "mtime_ns": st.st_mtime_ns})
+    return out
+
+def _intact(entry: Path, meta: dict[str, Any]) -> bool:
+    # stat-level check: anything edited, truncated or removed since extraction shows up here
+    tree = entry / "tree"
+    for f in meta.get("files", []):
+        try:
+            st = (tree / f["path"]).stat()
+        except FileNotFoundError:
+            return False
+        if st.st_size != f["bytes"] or st.st_mtime_ns != f["mtime_ns"]:
+            return False
+    return True
+
+def _read_meta(entry: Path) -> Optional[dict[str, Any]]:
+    try:
+        return json.loads((entry / META_FILENAME).read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return None
+
+def acquire(vault: Path, key: str, populate: Callable[[Path], None], max_bytes: int) -> tuple[Path, bool]:
+    """Return (tree_dir, hit) for the extracted bundle identified by key (zip sha256).
+
+    On a hit the cached tree is reused after an integrity check and marked as most
+    recently used. On a miss populate(dest) fills a fresh tree, which is published
+    with an atomic rename; then least-recently-used entries are evicted until the
+    cache fits in max_bytes.
+    """
+    root = cache_root(vault)
+    entry = root / key
+    meta = _read_meta(entry)
+    if meta is not None and _intact(entry, meta):
+        os.utime(entry / META_FILENAME)
+        return entry / "tree", True
+    if entry.exists():
+        shutil.rmtree(entry, ignore_errors=True)
+
+    staging = root / f".{key}.{os.getpid()}.{os.urandom(3).hex()}"
+    (staging / "tree").mkdir(parents=True)
+    try:
+        populate(staging / "tree")
+        files = _snapshot(staging / "tree")
+        meta = {
+            "schema_version": 1,
+            "key": key,
+            "created_at": time.time(),
+            "bytes": sum(f["bytes"] for f in files),
+            "files": files,
+        }
+        (staging / META_FILENAME).write_text(json.dumps(meta, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        try:
+            os.rename(staging, entry)
+        except OSError:
+            # another apply published the same key first; theirs is equivalent
+            shutil.rmtree(staging, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    evict(vault, max_bytes, keep=key)
+    return entry / "tree", False
+
+def evict(vault: Path, max_bytes: int, keep: Optional[str] = None) -> list[str]:
+    """Drop least-recently-used entries until the cache fits in max_bytes."""
+    root = cache_root(vault)
+    if not root.exists():
+        return []
+    entries = []
+    for e in root.iterdir():
+        if e.name.startswith("."):
+            continue
+        m = e / META_FILENAME
+        meta = _read_meta(e)
+        if meta is None:
+            shutil.rmtree(e, ignore_errors=True)
+            continue
+        entries.append((m.stat().st_mtime, int(meta.get("bytes", 0)), e))
+    total = sum(b for _, b, _ in entries)
+    removed = []
+    for _, b, e in sorted(entries):
+        if total <= max_bytes:
+            break
+        if e.name == keep:
+            continue
+        shutil.rmtree(e, ignore_errors=True)
+        total -= b
+        removed.append(e.name)
+    return removed
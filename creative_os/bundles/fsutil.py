@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import sys
+from pathlib import Path
+
+COPY_CHUNK = 1024 * 1024
+
+# linux/fs.h: _IOW(0x94, 9, int)
+_FICLONE = 0x40049409
+
+def _reflink(src: Path, dst: Path) -> bool:
+    """Copy-on-write clone of src to dst. False when the platform/filesystem can't."""
+    if sys.platform.startswith("linux"):
+        import fcntl
+        try:
+            with src.open("rb") as fs, dst.open("wb") as fd:
+                fcntl.ioctl(fd.fileno(), _FICLONE, fs.fileno())
+            return True
+        except OSError:
+            dst.unlink(missing_ok=True)
+            return False
+    if sys.platform == "darwin":
+        import ctypes
+        try:
+            libc = ctypes.CDLL("libc.dylib", use_errno=True)
+            return libc.clonefile(os.fsencode(src), os.fsencode(dst), 0) == 0
+        except (OSError, AttributeError):
+            return False
+    return False
+
+def same_filesystem(src: Path, dst_dir: Path) -> bool:
+    try:
+        return src.stat().st_dev == dst_dir.stat().st_dev
+    except FileNotFoundError:
+        return False
+
+def sha256_file(path: Path) -> tuple[str, int]:
+    h = hashlib.sha256()
+    n = 0
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(COPY_CHUNK), b""):
+            h.update(chunk)
+            n += len(chunk)
+    return h.hexdigest(), n
+
+def clone_file(src: Path, dst: Path) -> str:
+    """Copy src to dst without hashing: reflink when possible, else a plain copy.
+
+    Never hardlinks, so dst can be modified without touching src.
+    """
+    dst.unlink(missing_ok=True)
+    if same_filesystem(src, dst.parent) and _reflink(src, dst):
+        return "reflink"
+    with src.open("rb") as fs, dst.open("wb") as fd:
+        for chunk in iter(lambda: fs.read(COPY_CHUNK), b""):
+            fd.write(chunk)
+    return "copy"
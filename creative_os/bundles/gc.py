@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import tarfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Optional
+
+from creative_os.bundles import blobs
+from creative_os.bundles import extract_cache
+from creative_os.bundles import index as vault_index
+from creative_os.bundles import ledger
+from creative_os.bundles import lineage
+
+LOGS_ARCHIVE = "logs.tar.gz"
+# unreferenced blobs/temp files younger than this may belong to an import in flight
+GRACE_SECONDS = 3600
+
+def tree_bytes(p: Path) -> int:
+    if p.is_file():
+        return p.stat().st_size
+    total = 0
+    for root, _, files in os.walk(p):
+        for f in files:
+            try:
+                total += os.lstat(os.path.join(root, f)).st_size
+            except FileNotFoundError:
+                pass
+    return total
+
+def _run_time(run_id: str) -> Optional[float]:
+    try:
+        return datetime.strptime(run_id.split("_", 1)[0], "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc).timestamp()
+    except ValueError:
+        return None
+
+def _iso_time(s: str) -> Optional[float]:
+    try:
+        return datetime.fromisoformat(s.replace("Z", "+00:00")).timestamp()
+    except (ValueError, AttributeError):
+        return None
+
+def _receipt_bundle_ids(run_dir: Path) -> set[str]:
+    # runs written before the ledger existed: read their receipt once
+    out: set[str] = set()
+    for p in run_dir.glob("*receipt*.json"):
+        try:
+            r = json.loads(p.read_text(encoding="utf-8"))
+        except ValueError:
+            continue
+        if isinstance(r.get("bundle_id"), str):
+            out.add(r["bundle_id"])
+        for o in r.get("objects") or []:
+            if isinstance(o, dict) and isinstance(o.get("id"), str):
+                out.add(o["id"])
+    return out
+
+def _run_bundles(vault: Path, run_dirs: list[Path]) -> dict[str, set[str]]:
+    by_run: dict[str, set[str]] = {}
+    for rec in ledger.query(vault):
+        if rec.get("run_id") and rec.get("bundle_id"):
+            by_run.setdefault(rec["run_id"], set()).add(rec["bundle_id"])
+    for d in run_dirs:
+        if d.name not in by_run:
+            by_run[d.name] = _receipt_bundle_ids(d)
+    return by_run
+
+def _plan_runs(vault: Path, keep_runs: int, compact_days: float, now: float) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    runs_root = vault / "runs"
+    run_dirs = sorted(d for d in runs_root.iterdir() if d.is_dir()) if runs_root.exists() else []
+    by_run = _run_bundles(vault, run_dirs)
+
+    # newest first per bundle; a run survives if any bundle it touched still keeps it
+    groups: dict[str, list[tuple[float, str]]] = {}
+    for d in run_dirs:
+        t = _run_time(d.name) or d.stat().st_mtime
+        for b in by_run.get(d.name) or {""}:
+            groups.setdefault(b, []).append((t, d.name))
+    keep: set[str] = set()
+    for runs in groups.values():
+        keep.update(name for _, name in sorted(runs, reverse=True)[:keep_runs])
+
+    delete, compact = [], []
+    for d in run_dirs:
+        if d.name not in keep:
+            delete.append({"path": str(d), "bytes": tree_bytes(d), "reason": f"beyond last {keep_runs} runs per bundle",
+                           "bundle_ids": sorted(by_run.get(d.name) or [])})
+            continue
+        t = _run_time(d.name) or d.stat().st_mtime
+        logs = d / "logs"
+        if logs.is_dir() and now - t > compact_days * 86400:
+            compact.append({"path": str(logs), "bytes": tree_bytes(logs), "reason": f"logs older than {compact_days:g} days"})
+    return delete, compact
+
+def _superseded_since(lin: dict[str, Any], bid: str, manifest: dict[str, Any], imported: float) -> Optional[tuple[float, list[str]]]:
+    """(when bid was superseded, by whom), or None if nothing supersedes it.
+
+    Supersession is usually declared by the newer bundle (its lineage.supersedes),
+    so it is read from the lineage index, which has both directions; the clock
+    starts when the first superseding bundle was imported. A superseded_by
+    naming only bundles not in the vault (or missing from the index) counts
+    from this bundle's own import.
+    """
+    nodes = lin.get("nodes") or {}
+    by = set((nodes.get(bid) or {}).get("superseded_by") or []) | set(lineage.node_record(manifest, "")["superseded_by"])
+    if not by:
+        return None
+    times = [_iso_time((nodes.get(s) or {}).get("imported_at") or "") for s in by if (nodes.get(s) or {}).get("imported")]
+    times = [t for t in times if t is not None]
+    return (min(times) if times else imported), sorted(by)
+
+def _plan_bundles(vault: Path, superseded_days: float, now: float) -> tuple[list[dict[str, Any]], list[Path]]:
+    """(bundle stores to drop, store dirs that stay)."""
+    indexed = {e["store_dir"]: bid for bid, e in vault_index.load_index(vault)["bundles"].items()}
+    lin = lineage.load(vault)
+    delete, remaining = [], []
+    for d in vault_index.scan_store_dirs(vault):
+        manifest = json.loads((d / "bundle_manifest.v1.json").read_text(encoding="utf-8"))
+        bid = indexed.get(str(d))
+        if bid is None:
+            delete.append({"path": str(d), "bytes": tree_bytes(d), "bundle_id": manifest.get("bundle_id"),
+                           "indexed": False, "reason": "shadowed by a newer import of the same bundle_id"})
+            continue
+        try:
+            meta = json.loads((d / "import_meta.v1.json").read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            meta = {}
+        imported = _iso_time(meta.get("imported_at", "")) or d.stat().st_mtime
+        superseded = _superseded_since(lin, bid, manifest, imported)
+        if superseded is not None and now - superseded[0] > superseded_days * 86400:
+            delete.append({"path": str(d), "bytes": tree_bytes(d), "bundle_id": bid, "indexed": True, "superseded_by": superseded[1],
+                           "reason": f"superseded over {superseded_days:g} days ago"})
+            continue
+        remaining.append(d)
+    return delete, remaining
+
+def _plan_objects(vault: Path, remaining: list[Path], now: float) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    referenced: set[str] = set()
+    zip_keys: set[str] = set()
+    for d in remaining:
+        p = d / blobs.FILES_FILENAME
+        if p.exists():
+            doc = json.loads(p.read_text(encoding="utf-8"))
+            # a delta's tree references its parent's blobs: they outlive the parent's store dir
+            referenced.update(f["sha256"] for f in doc["files"] + (doc.get("tree") or []))
+        try:
+            key = json.loads((d / "import_meta.v1.json").read_text(encoding="utf-8")).get("zip", {}).get("sha256")
+        except FileNotFoundError:
+            key = None
+        if key:
+            zip_keys.add(key)
+
+    blob_items = []
+    root = blobs.objects_root(vault)
+    if root.exists():
+        for p in root.glob("*/*"):
+            if p.name in referenced:
+                continue
+            st = p.stat()
+            if now - st.st_mtime > GRACE_SECONDS:
+                blob_items.append({"path": str(p), "bytes": st.st_size, "reason": "unreferenced blob"})
+    tmp_dir = vault / "objects" / "tmp"
+    if tmp_dir.exists():
+        for p in tmp_dir.iterdir():
+            st = p.stat()
+            if now - st.st_mtime > GRACE_SECONDS:
+                blob_items.append({"path": str(p), "bytes": st.st_size, "reason": "stale temp file"})
+
+    cache_items = []
+    croot = extract_cache.cache_root(vault)
+    if croot.exists():
+        for e in croot.iterdir():
+            if not e.name.startswith(".") and e.name not in zip_keys:
+                cache_items.append({"path": str(e), "bytes": tree_bytes(e), "reason": "extracted tree of a removed bundle"})
+    return blob_items, cache_items
+
+def plan(vault: Path, keep_runs: int = 10, superseded_days: float = 30, compact_days: float = 7, now: Optional[float] = None) -> dict[str, Any]:
+    """What gc would remove or compact. Nothing is touched."""
+    now = time.time() if now is None else now
+    runs_delete, logs_compact = _plan_runs(vault, keep_runs, compact_days, now)
+    bundles_delete, remaining = _plan_bundles(vault, superseded_days, now)
+    blobs_delete, cache_delete = _plan_objects(vault, remaining, now)
+    sections = {
+        "runs": runs_delete,
+        "logs": logs_compact,
+        "bundles": bundles_delete,
+        "blobs": blobs_delete,
+        "extract_cache": cache_delete,
+    }
+    return {
+        "schema_version": 1,
+        "policy": {"keep_runs": keep_runs, "superseded_days": superseded_days, "compact_days": compact_days},
+        "sections": sections,
+        "bytes": {k: sum(i["bytes"] for i in v) for k, v in sections.items()},
+    }
+
+def _compact_logs(logs: Path) -> int:
+    """Replace a run's logs/ with logs.tar.gz. Returns bytes reclaimed."""
+    before = tree_bytes(logs)
+    archive = logs.parent / LOGS_ARCHIVE
+    tmp = logs.parent / f".{LOGS_ARCHIVE}.{os.getpid()}.tmp"
+    with tarfile.open(tmp, "w:gz") as tf:
+        tf.add(logs, arcname="logs")
+    if archive.exists():
+        # compacted before and new logs appeared since: keep both archives
+        archive = logs.parent / f"logs.{int(time.time())}.tar.gz"
+    os.replace(tmp, archive)
+    shutil.rmtree(logs)
+    return before - archive.stat().st_size
+
+def execute(vault: Path, p: dict[str, Any]) -> dict[str, int]:
+    """Carry out a plan. Returns bytes reclaimed per section."""
+    s = p["sections"]
+    done = {k: 0 for k in s}
+    for item in s["runs"]:
+        shutil.rmtree(item["path"], ignore_errors=True)
+        done["runs"] += item["bytes"]
+    for item in s["logs"]:
+        if Path(item["path"]).is_dir():
+            done["logs"] += _compact_logs(Path(item["path"]))
+    # unindex first so no apply picks up a store that is being removed
+    dropped = [i["bundle_id"] for i in s["bundles"] if i["indexed"]]
+    vault_index.remove_from_index(vault, dropped)
+    lineage.remove(vault, dropped)
+    for item in s["bundles"]:
+        shutil.rmtree(item["path"], ignore_errors=True)
+        done["bundles"] += item["bytes"]
+    for item in s["blobs"]:
+        try:
+            Path(item["path"]).unlink()
+            done["blobs"] += item["bytes"]
+        except FileNotFoundError:
+            pass
+    for item in s["extract_cache"]:
+        shutil.rmtree(item["path"], ignore_errors=True)
+        done["extract_cache"] += item["bytes"]
+    return done
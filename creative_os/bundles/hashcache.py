@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from creative_os.bundles import fsutil, locks
+
+CACHE_FILENAME = "hash_cache.v1.json"
+# a file modified this close to the lookup may change again without its stat changing: don't cache its hash
+RACY_NS = 2_000_000_000
+# past this many entries, save keeps the 90% most recently used
+MAX_ENTRIES = 200_000
+
+def _today() -> int:
+    return int(time.time() // 86400)
+
+def _used(entry: list[Any]) -> int:
+    # day last used; entries written before it was tracked count as oldest
+    return entry[4] if len(entry) > 4 else 0
+
+def _read_entries(path: Path) -> dict[str, list[Any]]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+    entries = data.get("entries") if isinstance(data, dict) and data.get("schema_version") == 1 else None
+    return entries if isinstance(entries, dict) else {}
+
+def _file_stamp(path: Path) -> Optional[tuple[int, int, int]]:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return (st.st_size, st.st_mtime_ns, st.st_ino)
+
+class HashCache:
+    """sha256 of files on disk, memoized by (path, size, mtime_ns, inode).
+
+    A file is only re-hashed when one of those changes, so re-planning or
+    re-packing a large, mostly unchanged tree costs one stat per file. Files
+    modified within RACY_NS of the lookup are hashed but not cached: an edit
+    in the same mtime tick that keeps the size would otherwise look unchanged.
+
+    Saving merges into the file under an exclusive lock, so concurrent plans
+    and applies keep each other's entries. Each entry carries the day it was
+    last used; past MAX_ENTRIES the least recently used are dropped, which is
+    how entries for deleted or abandoned targets go away.
+    """
+
+    # one instance per cache file per process, reused while the file is unchanged on disk
+    _shared: dict[str, "HashCache"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, path: Path, lock_path: Optional[Path] = None):
+        self.path = path
+        self.lock_path = lock_path or path.with_name(f".{path.name}.lock")
+        self._lock = threading.Lock()
+        # keys added or touched since the last save: the only ones save writes over the file's
+        self._updated: set[str] = set()
+        self._file_stamp = _file_stamp(path)
+        self._entries: dict[str, list[Any]] = _read_entries(path)
+
+    @property
+    def _dirty(self) -> bool:
+        return bool(self._updated)
+
+    @classmethod
+    def for_vault(cls, vault: Path) -> "HashCache":
+        path = vault / "index" / CACHE_FILENAME
+        with cls._shared_lock:
+            hc = cls._shared.get(str(path))
+            if hc is None or (not hc._dirty and hc._file_stamp != _file_stamp(path)):
+                hc = cls._shared[str(path)] = cls(path, locks.locks_root(vault) / "hash_cache.lock")
+            return hc
+
+    def sha256(self, p: Path, st: Optional[os.stat_result] = None) -> str:
+        st = st or p.stat()
+        key = str(p)
+        stamp = [st.st_size, st.st_mtime_ns, st.st_ino]
+        today = _today()
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit is not None and hit[:3] == stamp:
+                if _used(hit) != today:
+                    self._entries[key] = hit[:4] + [today]
+                    self._updated.add(key)
+                return hit[3]
+        sha, _ = fsutil.sha256_file(p)
+        if st.st_mtime_ns > time.time_ns() - RACY_NS:
+            return sha
+        with self._lock:
+            self._entries[key] = stamp + [sha, today]
+            self._updated.add(key)
+        return sha
+
+    def record(self, p: Path, sha256: str) -> None:
+        """Remember the hash of a file this process just wrote (unless it is too fresh to trust its stat)."""
+        st = p.stat()
+        if st.st_mtime_ns > time.time_ns() - RACY_NS:
+            return
+        with self._lock:
+            self._entries[str(p)] = [st.st_size, st.st_mtime_ns, st.st_ino, sha256, _today()]
+            self._updated.add(str(p))
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._updated:
+                return
+            with locks.hold(self.lock_path, f"hash cache {self.path}", exclusive=True):
+                # another process may have saved since we loaded: keep its entries, ours win where both have one
+                merged = _read_entries(self.path) if _file_stamp(self.path) != self._file_stamp else dict(self._entries)
+                for key in self._updated:
+                    merged[key] = self._entries[key]
+                if len(merged) > MAX_ENTRIES:
+                    keep = sorted(merged, key=lambda k: _used(merged[k]), reverse=True)[:int(MAX_ENTRIES * 0.9)]
+                    merged = {k: merged[k] for k in keep}
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+                tmp.write_text(json.dumps({"schema_version": 1, "entries": merged}, sort_keys=True) + "\n", encoding="utf-8")
+                os.replace(tmp, self.path)
+                self._file_stamp = _file_stamp(self.path)
+            self._entries = merged
+            self._updated.clear()
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+from creative_os.bundles import locks, memo
+
+INDEX_FILENAME = "bundle_index.v1.json"
+
+def index_write_lock(vault: Path, timeout: Optional[float] = None):
+    """Exclusive flock around every load -> modify -> write of the index.
+
+    The vault lock is only shared while importing distinct bundles, so without
+    this two processes could each write back an index missing the other's entry.
+    """
+    return locks.hold(locks.locks_root(vault) / "index.lock", f"vault index {vault}", exclusive=True, timeout=timeout)
+
+def _index_path(vault: Path) -> Path:
+    return vault / "index" / INDEX_FILENAME
+
+def _empty_index() -> dict[str, Any]:
+    return {"schema_version": 1, "bundles": {}}
+
+def write_json_atomic(path: Path, data: dict[str, Any]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with tmp.open("w", encoding="utf-8") as f:
+        f.write(json.dumps(data, indent=2, sort_keys=True) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def index_exists(vault: Path) -> bool:
+    return _index_path(vault).exists()
+
+def load_index(vault: Path) -> dict[str, Any]:
+    p = _index_path(vault)
+    if not p.exists():
+        return _empty_index()
+    try:
+        idx = memo.read_json(p)
+    except Exception as e:
+        raise ValueError(f"Failed to parse vault index {p}: {e} (run: cos bundle reindex)")
+    if idx.get("schema_version") != 1 or not isinstance(idx.get("bundles"), dict):
+        raise ValueError(f"Unsupported vault index {p} (run: cos bundle reindex)")
+    return idx
+
+def index_entry(meta: dict[str, Any]) -> dict[str, Any]:
+    """Index row for one bundle, derived from its import_meta.v1.json."""
+    return {
+        "store_dir": meta.get("vault_store_dir", ""),
+        "manifest_sha256": meta.get("manifest_sha256", ""),
+        "imported_at": meta.get("imported_at", ""),
+        "tags": list(meta.get("tags") or []),
+    }
+
+def update_index(vault: Path, bundle_id: str, entry: dict[str, Any]) -> None:
+    """Insert/replace one bundle entry: read-modify-write under the index lock, swapped in atomically."""
+    with index_write_lock(vault):
+        idx = load_index(vault)
+        # copy, don't mutate: loaded indexes are shared through memo
+        idx = {**idx, "bundles": {**idx["bundles"], bundle_id: entry}}
+        write_json_atomic(_index_path(vault), idx)
+
+def remove_from_index(vault: Path, bundle_ids: list[str]) -> None:
+    with index_write_lock(vault):
+        idx = load_index(vault)
+        drop = set(bundle_ids)
+        idx = {**idx, "bundles": {b: e for b, e in idx["bundles"].items() if b not in drop}}
+        write_json_atomic(_index_path(vault), idx)
+
+def lookup(vault: Path, bundle_id: str) -> Optional[dict[str, Any]]:
+    return load_index(vault)["bundles"].get(bundle_id)
+
+def scan_store_dirs(vault: Path) -> list[Path]:
+    # memory/bundles/<YYYY>/<MM>/<bundle_id>/bundle_manifest.v1.json
+    base = vault / "memory" / "bundles"
+    if not base.exists():
+        return []
+    return sorted(p.parent for p in base.glob("*/*/*/bundle_manifest.v1.json"))
+
+def rebuild_index(vault: Path) -> dict[str, Any]:
+    """Rebuild the index from the bundle store on disk.
+
+    When the same bundle_id was stored more than once, the most recent import wins.
+    """
+    with index_write_lock(vault):
+        return _rebuild_index(vault)
+
+def _rebuild_index(vault: Path) -> dict[str, Any]:
+    idx = _empty_index()
+    for d in scan_store_dirs(vault):
+        meta_path = d / "import_meta.v1.json"
+        if meta_path.exists():
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        else:
+            manifest = json.loads((d / "bundle_manifest.v1.json").read_text(encoding="utf-8"))
+            meta = {"bundle_id": manifest.get("bundle_id")}
+        bundle_id = meta.get("bundle_id")
+        if not isinstance(bundle_id, str) or not bundle_id:
+            continue
+        meta["vault_store_dir"] = str(d)
+        entry = index_entry(meta)
+        prev = idx["bundles"].get(bundle_id)
+        if prev is None or entry["imported_at"] >= prev["imported_at"]:
+            idx["bundles"][bundle_id] = entry
+    write_json_atomic(_index_path(vault), idx)
+    return idx
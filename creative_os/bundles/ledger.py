@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import fcntl
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+INDEX_FILENAME = "ledger_index.v1.json"
+SEGMENT_MAX_BYTES = 4 * 1024 * 1024
+
+_ledger_lock = threading.Lock()
+
+def ledger_root(vault: Path) -> Path:
+    return vault / "ledger"
+
+def _segments_dir(vault: Path) -> Path:
+    return ledger_root(vault) / "segments"
+
+def _segment_name(n: int) -> str:
+    return f"{n:06d}.jsonl"
+
+def _empty_index() -> dict[str, Any]:
+    return {"schema_version": 1, "next_seq": 1, "segments": []}
+
+def _segment_entry(name: str) -> dict[str, Any]:
+    return {"name": name, "first_seq": None, "last_seq": None, "first_ts": None, "last_ts": None,
+            "count": 0, "bytes": 0, "bundle_ids": []}
+
+def _note(seg: dict[str, Any], rec: dict[str, Any], nbytes: int) -> None:
+    if seg["first_seq"] is None:
+        seg["first_seq"] = rec["seq"]
+        seg["first_ts"] = rec["ts"]
+    seg["last_seq"] = rec["seq"]
+    seg["last_ts"] = rec["ts"]
+    seg["count"] += 1
+    seg["bytes"] += nbytes
+    bid = rec.get("bundle_id")
+    if bid and bid not in seg["bundle_ids"]:
+        seg["bundle_ids"].append(bid)
+
+def _scan_segment(path: Path) -> tuple[dict[str, Any], int]:
+    """Rebuild one segment's index entry from its lines. Returns (entry, max seq)."""
+    seg = _segment_entry(path.name)
+    max_seq = 0
+    with path.open("rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # torn final write; ignored until truncated by the next append
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                seg["bytes"] += len(line)
+                continue
+            _note(seg, rec, len(line))
+            max_seq = max(max_seq, int(rec.get("seq", 0)))
+    return seg, max_seq
+
+@contextmanager
+def _locked(vault: Path) -> Iterator[None]:
+    """Exclusive lock held by every writer of the segments or the index, across threads and processes."""
+    root = ledger_root(vault)
+    root.mkdir(parents=True, exist_ok=True)
+    with _ledger_lock, (root / ".lock").open("a") as lockf:
+        fcntl.flock(lockf.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lockf.fileno(), fcntl.LOCK_UN)
+
+def _scan_index(vault: Path) -> dict[str, Any]:
+    idx = _empty_index()
+    sdir = _segments_dir(vault)
+    if sdir.exists():
+        for p in sorted(sdir.glob("*.jsonl")):
+            seg, max_seq = _scan_segment(p)
+            idx["segments"].append(seg)
+            idx["next_seq"] = max(idx["next_seq"], max_seq + 1)
+    return idx
+
+def rebuild_index(vault: Path) -> dict[str, Any]:
+    with _locked(vault):
+        idx = _scan_index(vault)
+        _write_index(vault, idx)
+    return idx
+
+def _write_index(vault: Path, idx: dict[str, Any]) -> None:
+    path = ledger_root(vault) / INDEX_FILENAME
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_text(json.dumps(idx, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    os.replace(tmp, path)
+
+def _read_index(vault: Path) -> Optional[dict[str, Any]]:
+    """The stored segment index, or None if it is missing, unreadable or behind the segments."""
+    try:
+        idx = json.loads((ledger_root(vault) / INDEX_FILENAME).read_text(encoding="utf-8"))
+        if idx.get("schema_version") != 1:
+            raise ValueError("unknown ledger index schema")
+    except (FileNotFoundError, ValueError):
+        return None
+    if idx["segments"]:
+        last = idx["segments"][-1]
+        try:
+            size = (_segments_dir(vault) / last["name"]).stat().st_size
+        except FileNotFoundError:
+            return None
+        if size != last["bytes"]:
+            return None
+    return idx
+
+def load_index(vault: Path) -> dict[str, Any]:
+    """The segment index, rescanned from the segments if the stored one is stale.
+
+    A rescan here stays in memory: the file is only written under the ledger
+    lock, by append and rebuild_index.
+    """
+    idx = _read_index(vault)
+    return idx if idx is not None else _scan_index(vault)
+
+def append(vault: Path, records: list[dict[str, Any]]) -> list[int]:
+    """Append records to the ledger and return their sequence numbers.
+
+    Each record gets seq, ts (epoch seconds) and at (ISO time). Writers are
+    serialized with a lock file so concurrent cos processes can share a vault.
+    """
+    if not records:
+        return []
+    _segments_dir(vault).mkdir(parents=True, exist_ok=True)
+    with _locked(vault):
+        idx = _read_index(vault)
+        if idx is None:
+            idx = _scan_index(vault)
+        if not idx["segments"] or idx["segments"][-1]["bytes"] >= SEGMENT_MAX_BYTES:
+            idx["segments"].append(_segment_entry(_segment_name(len(idx["segments"]) + 1)))
+        seg = idx["segments"][-1]
+        path = _segments_dir(vault) / seg["name"]
+        now = datetime.now(timezone.utc)
+        seqs = []
+        lines = []
+        for r in records:
+            rec = {**r, "seq": idx["next_seq"], "ts": round(now.timestamp(), 6),
+                   "at": now.replace(microsecond=0).isoformat().replace("+00:00", "Z")}
+            idx["next_seq"] += 1
+            line = (json.dumps(rec, sort_keys=True) + "\n").encode("utf-8")
+            _note(seg, rec, len(line))
+            seqs.append(rec["seq"])
+            lines.append(line)
+        with path.open("ab") as f:
+            f.truncate(seg["bytes"] - sum(len(x) for x in lines))
+            f.write(b"".join(lines))
+            f.flush()
+            os.fsync(f.fileno())
+        _write_index(vault, idx)
+    return seqs
+
+def query(
+    vault: Path,
+    bundle_id: Optional[str] = None,
+    status: Optional[str] = None,
+    kind: Optional[str] = None,
+    target: Optional[str] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    limit: Optional[int] = None,
+) -> list[dict[str, Any]]:
+    """Matching records, newest first.
+
+    Segments whose time range or bundle set cannot match are skipped using the
+    index alone; only candidate segments are read.
+    """
+    idx = load_index(vault)
+    out: list[dict[str, Any]] = []
+    for seg in reversed(idx["segments"]):
+        if seg["count"] == 0:
+            continue
+        if since is not None and seg["last_ts"] < since:
+            break  # segments are in time order
+        if until is not None and seg["first_ts"] > until:
+            continue
+        if bundle_id is not None and bundle_id not in seg["bundle_ids"]:
+            continue
+        for rec in reversed(list(_read_segment(vault, seg))):
+            if bundle_id is not None and rec.get("bundle_id") != bundle_id:
+                continue
+            if status is not None and rec.get("status") != status:
+                continue
+            if kind is not None and rec.get("kind") != kind:
+                continue
+            if target is not None and rec.get("target") != target:
+                continue
+            if since is not None and rec["ts"] < since:
+                continue
+            if until is not None and rec["ts"] > until:
+                continue
+            out.append(rec)
+            if limit is not None and len(out) >= limit:
+                return out
+    return out
+
+def _read_segment(vault: Path, seg: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    with (_segments_dir(vault) / seg["name"]).open("rb") as f:
+        data = f.read(seg["bytes"])
+    for line in data.splitlines():
+        try:
+            yield json.loads(line)
+        except ValueError:
+            continue
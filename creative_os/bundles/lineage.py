@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import json
+import re
+from pathlib import Path
+from typing import Any, Optional
+
+from creative_os.bundles import index as vault_index
+from creative_os.bundles import locks, memo
+
+LINEAGE_FILENAME = "lineage.v1.json"
+# a trailing "-v2", "_v2", "-1.2.0", "_1.2", "-v2.0.1-rc.1"; a bare "-2" or "_2025" is too likely part of the name
+_VERSION_SUFFIX = re.compile(r"[-_](v\d+(\.\d+)*|v?\d+(\.\d+)+)([-+][0-9A-Za-z.-]+)?$")
+
+def _write_lock(vault: Path):
+    """Exclusive flock around every load -> modify -> write of lineage.v1.json, across processes."""
+    return locks.hold(locks.locks_root(vault) / "lineage.lock", f"vault lineage {vault}", exclusive=True)
+
+def _lineage_path(vault: Path) -> Path:
+    return vault / "index" / LINEAGE_FILENAME
+
+def family_of(manifest: dict[str, Any]) -> str:
+    """bundle_family if declared, else bundle_id with its version suffix removed.
+
+    With bundle_version 0.1.0:
+      cos_bundle_creative-os_bundle-support_0.1.0_ship0 -> cos_bundle_creative-os_bundle-support
+    Without, only a trailing version is cut:
+      demo-0.2.0 -> demo, tool_v2 -> tool, x_2025_report -> x_2025_report
+    """
+    fam = manifest.get("bundle_family")
+    if isinstance(fam, str) and fam:
+        return fam
+    bid = manifest["bundle_id"]
+    version = manifest.get("bundle_version")
+    if isinstance(version, str) and version:
+        for sep in ("_", "-"):
+            i = bid.find(sep + version)
+            if i > 0:
+                return bid[:i]
+    m = _VERSION_SUFFIX.search(bid)
+    return bid[:m.start()] if m and m.start() > 0 else bid
+
+def _ids(v: Any) -> list[str]:
+    if isinstance(v, str):
+        return [v] if v else []
+    if isinstance(v, list):
+        return [x for x in v if isinstance(x, str) and x]
+    return []
+
+def node_record(manifest: dict[str, Any], imported_at: str) -> dict[str, Any]:
+    """What one manifest declares about its place in the graph."""
+    lin = manifest.get("lineage") or {}
+    return {
+        "family": family_of(manifest),
+        "version": manifest.get("bundle_version") or "",
+        "imported_at": imported_at,
+        "parents": sorted(set(_ids(lin.get("parents")))),
+        "supersedes": sorted(set(_ids(lin.get("supersedes")))),
+        "superseded_by": sorted(set(_ids(lin.get("superseded_by")))),
+    }
+
+def _version_key(v: str) -> tuple:
+    return tuple((0, int(p), "") if p.isdigit() else (1, 0, p) for p in re.split(r"[.\-+_]", v))
+
+def _derive(declared: dict[str, dict[str, Any]]) -> dict[str, Any]:
+    """Full index from the per-bundle declarations: both edge directions, family heads, cycles.
+
+    Edges point from older to newer: parent -> child and superseded -> superseding.
+    Either side of a supersedes relation may declare it.
+    """
+    nodes: dict[str, dict[str, Any]] = {}
+
+    def node(bid: str) -> dict[str, Any]:
+        if bid not in nodes:
+            d = declared.get(bid)
+            nodes[bid] = {
+                "imported": d is not None,
+                "family": d["family"] if d else None,
+                "version": d["version"] if d else None,
+                "imported_at": d["imported_at"] if d else None,
+                "parents": set(), "children": set(), "supersedes": set(), "superseded_by": set(),
+            }
+        return nodes[bid]
+
+    for bid, d in declared.items():
+        n = node(bid)
+        for p in d["parents"]:
+            n["parents"].add(p)
+            node(p)["children"].add(bid)
+        for old in d["supersedes"]:
+            n["supersedes"].add(old)
+            node(old)["superseded_by"].add(bid)
+        for new in d["superseded_by"]:
+            n["superseded_by"].add(new)
+            node(new)["supersedes"].add(bid)
+
+    families: dict[str, dict[str, Any]] = {}
+    for bid, n in nodes.items():
+        if n["family"]:
+            families.setdefault(n["family"], {"members": []})["members"].append(bid)
+    for fam, f in families.items():
+        members = sorted(f["members"])
+        f["members"] = members
+        # head: an imported member no imported member supersedes; ties go to the highest version, then newest import
+        heads = [b for b in members if not any(nodes[s]["imported"] for s in nodes[b]["superseded_by"])]
+        pool = heads or members
+        f["head"] = max(pool, key=lambda b: (_version_key(nodes[b]["version"] or ""), nodes[b]["imported_at"] or "", b))
+
+    out_nodes = {bid: {k: (sorted(v) if isinstance(v, set) else v) for k, v in n.items()} for bid, n in sorted(nodes.items())}
+    return {"schema_version": 1, "nodes": out_nodes, "families": dict(sorted(families.items())),
+            "declared": dict(sorted(declared.items())), "cycles": find_cycles(out_nodes)}
+
+def _newer(n: dict[str, Any]) -> list[str]:
+    return n["children"] + n["superseded_by"]
+
+def _older(n: dict[str, Any]) -> list[str]:
+    return n["parents"] + n["supersedes"]
+
+def find_cycles(nodes: dict[str, dict[str, Any]]) -> list[list[str]]:
+    """One representative path per cycle in the older -> newer graph (iterative DFS)."""
+    WHITE, GREY, BLACK = 0, 1, 2
+    color = {b: WHITE for b in nodes}
+    cycles = []
+    for root in nodes:
+        if color[root] != WHITE:
+            continue
+        stack = [(root, iter(_newer(nodes[root])))]
+        path = [root]
+        color[root] = GREY
+        while stack:
+            bid, it = stack[-1]
+            nxt = next(it, None)
+            if nxt is None:
+                color[bid] = BLACK
+                stack.pop()
+                path.pop()
+            elif color[nxt] == GREY:
+                cycles.append(path[path.index(nxt):] + [nxt])
+            elif color[nxt] == WHITE:
+                color[nxt] = GREY
+                stack.append((nxt, iter(_newer(nodes[nxt]))))
+                path.append(nxt)
+    return cycles
+
+def _read(vault: Path) -> Optional[dict[str, Any]]:
+    try:
+        idx = memo.read_json(_lineage_path(vault))
+        if idx.get("schema_version") == 1:
+            return idx
+    except (FileNotFoundError, ValueError):
+        pass
+    return None
+
+def load(vault: Path) -> dict[str, Any]:
+    idx = _read(vault)
+    if idx is not None:
+        return idx
+    with _write_lock(vault):
+        # another process may have rebuilt it while we waited
+        return _read(vault) or _rebuild(vault)
+
+def rebuild(vault: Path) -> dict[str, Any]:
+    """Rebuild from the stored manifests of every indexed bundle."""
+    with _write_lock(vault):
+        return _rebuild(vault)
+
+def _rebuild(vault: Path) -> dict[str, Any]:
+    declared = {}
+    for bid, entry in vault_index.load_index(vault)["bundles"].items():
+        try:
+            manifest = json.loads((Path(entry["store_dir"]) / "bundle_manifest.v1.json").read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            continue
+        declared[bid] = node_record(manifest, entry.get("imported_at", ""))
+    idx = _derive(declared)
+    vault_index.write_json_atomic(_lineage_path(vault), idx)
+    return idx
+
+def check_add(vault: Path, bundle_id: str, record: dict[str, Any]) -> None:
+    """Raise ValueError if adding this declaration would close a lineage cycle."""
+    declared = dict(load(vault).get("declared", {}))
+    declared[bundle_id] = record
+    _cycle_through(_derive(declared), bundle_id)
+
+def _cycle_through(idx: dict[str, Any], bundle_id: str) -> None:
+    for cyc in idx["cycles"]:
+        if bundle_id in cyc:
+            raise ValueError(f"Lineage cycle: {' -> '.join(cyc)}")
+
+def add(vault: Path, bundle_id: str, record: dict[str, Any]) -> dict[str, Any]:
+    """Record a declaration; raises ValueError, writing nothing, if it closes a cycle.
+
+    check_add runs before an import stores anything, but another import may
+    land in between, so the check is repeated here under the lock.
+    """
+    with _write_lock(vault):
+        declared = dict((_read(vault) or _rebuild(vault)).get("declared", {}))
+        declared[bundle_id] = record
+        idx = _derive(declared)
+        _cycle_through(idx, bundle_id)
+        vault_index.write_json_atomic(_lineage_path(vault), idx)
+    return idx
+
+def remove(vault: Path, bundle_ids: list[str]) -> None:
+    with _write_lock(vault):
+        declared = dict((_read(vault) or _rebuild(vault)).get("declared", {}))
+        for b in bundle_ids:
+            declared.pop(b, None)
+        vault_index.write_json_atomic(_lineage_path(vault), _derive(declared))
+
+def _walk(idx: dict[str, Any], bundle_id: str, step) -> list[str]:
+    nodes = idx["nodes"]
+    seen: set[str] = set()
+    order = []
+    frontier = list(step(nodes[bundle_id]))
+    while frontier:
+        b = frontier.pop()
+        if b in seen or b == bundle_id:
+            continue
+        seen.add(b)
+        order.append(b)
+        frontier.extend(step(nodes[b]))
+    return order
+
+def ancestors(idx: dict[str, Any], bundle_id: str) -> list[str]:
+    return _walk(idx, bundle_id, _older)
+
+def descendants(idx: dict[str, Any], bundle_id: str) -> list[str]:
+    return _walk(idx, bundle_id, _newer)
+
+def latest(idx: dict[str, Any], family: str) -> Optional[str]:
+    f = idx["families"].get(family)
+    return f["head"] if f else None
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+LOCKS_DIRNAME = "locks"
+DEFAULT_TIMEOUT_S = 300.0
+
+class LockTimeout(TimeoutError):
+    pass
+
+def timeout_from_env(override: Optional[float] = None) -> float:
+    if override is not None:
+        return float(override)
+    raw = os.environ.get("CREATIVE_OS_LOCK_TIMEOUT", "").strip()
+    try:
+        return float(raw) if raw else DEFAULT_TIMEOUT_S
+    except ValueError:
+        raise ValueError(f"CREATIVE_OS_LOCK_TIMEOUT must be a number of seconds, got: {raw}")
+
+def locks_root(vault: Path) -> Path:
+    return vault / LOCKS_DIRNAME
+
+def _lock_file(vault: Path, kind: str, name: str = "") -> Path:
+    # lock files are never removed: unlinking one under a waiter would split the lock in two
+    if not name:
+        return locks_root(vault) / f"{kind}.lock"
+    return locks_root(vault) / f"{kind}-{hashlib.sha256(name.encode('utf-8')).hexdigest()[:16]}.lock"
+
+@contextmanager
+def hold(path: Path, what: str, exclusive: bool = False, timeout: Optional[float] = None) -> Iterator[float]:
+    """flock path shared or exclusive, waiting up to timeout seconds. Yields the seconds waited.
+
+    flock locks belong to the open file, so threads of one process exclude
+    each other too. A thread must not take the same lock again while holding it.
+    """
+    limit = timeout_from_env(timeout)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        op = (fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH) | fcntl.LOCK_NB
+        t0 = time.monotonic()
+        delay = 0.005
+        while True:
+            try:
+                fcntl.flock(fd, op)
+                break
+            except BlockingIOError:
+                left = limit - (time.monotonic() - t0)
+                if left <= 0:
+                    mode = "an exclusive" if exclusive else "a shared"
+                    raise LockTimeout(f"Timed out after {limit:g}s waiting for {mode} lock on {what}; another cos command holds it "
+                                      f"(raise CREATIVE_OS_LOCK_TIMEOUT to wait longer)")
+                time.sleep(min(delay, left))
+                delay = min(delay * 2, 0.1)
+        yield time.monotonic() - t0
+    finally:
+        os.close(fd)
+
+def vault_lock(vault: Path, exclusive: bool = False, timeout: Optional[float] = None):
+    """Shared by every command; exclusive for whole-vault rewrites (gc, reindex)."""
+    return hold(_lock_file(vault, "vault"), f"vault {vault}", exclusive, timeout)
+
+def bundle_lock(vault: Path, bundle_id: str, exclusive: bool = False, timeout: Optional[float] = None):
+    """Exclusive while a bundle_id is being stored; shared while it is read or applied."""
+    return hold(_lock_file(vault, "bundle", bundle_id), f"bundle {bundle_id}", exclusive, timeout)
+
+def target_lock(vault: Path, target: Path, exclusive: bool = False, timeout: Optional[float] = None):
+    """Exclusive while applying to a target directory; shared while planning against it.
+
+    Kept in the vault, so it orders commands that use the same vault.
+    """
+    return hold(_lock_file(vault, "target", str(target)), f"target {target}", exclusive, timeout)
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+MAX_ENTRIES = 4096
+
+# path -> ((size, mtime_ns, ino), value); shared by every caller in the process
+_entries: "OrderedDict[tuple[str, str], tuple[tuple[int, int, int], Any]]" = OrderedDict()
+_lock = threading.Lock()
+
+def _stamp(path: Path) -> tuple[int, int, int]:
+    st = os.stat(path)
+    return (st.st_size, st.st_mtime_ns, st.st_ino)
+
+def _get(kind: str, path: Path, load) -> Any:
+    key = (kind, str(path))
+    stamp = _stamp(path)
+    with _lock:
+        hit = _entries.get(key)
+        if hit is not None and hit[0] == stamp:
+            _entries.move_to_end(key)
+            return hit[1]
+    value = load(path)
+    with _lock:
+        _entries[key] = (stamp, value)
+        _entries.move_to_end(key)
+        while len(_entries) > MAX_ENTRIES:
+            _entries.popitem(last=False)
+    return value
+
+def read_text(path: Path) -> str:
+    """Path.read_text, reused while the file's size, mtime and inode are unchanged."""
+    return _get("text", path, lambda p: p.read_text(encoding="utf-8"))
+
+def read_json(path: Path) -> Any:
+    """Parsed JSON, reused while the file is unchanged. Callers must not mutate the result."""
+    return _get("json", path, lambda p: json.loads(p.read_text(encoding="utf-8")))
+
+def clear() -> None:
+    with _lock:
+        _entries.clear()
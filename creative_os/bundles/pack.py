@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import stat
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Optional
+
+from creative_os.bundles import fsutil
+from creative_os.bundles.hashcache import HashCache
+
+MANIFEST_NAME = "bundle_manifest.v1.json"
+STAMP_SUFFIX = ".pack.v1.json"
+# DOS epoch: the earliest timestamp a zip entry can hold
+ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+EXCLUDE_DIRS = {".git", "__pycache__", ".cos_apply_logs"}
+EXCLUDE_FILES = {".DS_Store"}
+
+def scan_tree(root: Path, skip: Optional[Path] = None) -> list[tuple[str, Path, os.stat_result]]:
+    """(posix relpath, path, stat) for every packable file under root, sorted by relpath."""
+    out = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        d = Path(dirpath)
+        dirnames[:] = sorted(n for n in dirnames if n not in EXCLUDE_DIRS and (skip is None or (d / n).resolve() != skip))
+        for n in filenames:
+            if n in EXCLUDE_FILES or n.endswith(".pyc") or (d == root and n == MANIFEST_NAME):
+                continue
+            p = d / n
+            st = p.lstat()
+            if stat.S_ISLNK(st.st_mode):
+                raise ValueError(f"Symlinks can't be packed: {p}")
+            if not stat.S_ISREG(st.st_mode):
+                continue
+            out.append((p.relative_to(root).as_posix(), p, st))
+    out.sort(key=lambda t: t[0])
+    return out
+
+def zip_mode(st_mode: int) -> int:
+    # normalize permissions so the archive doesn't depend on the packer's umask
+    return 0o755 if st_mode & 0o111 else 0o644
+
+def hash_files(entries: list[tuple[str, Path, os.stat_result]], hashes: HashCache, jobs: int = 0) -> list[dict[str, Any]]:
+    """contents.files rows, hashing in parallel; unchanged files are answered by the hash cache."""
+    workers = jobs if jobs > 0 else min(32, (os.cpu_count() or 1) + 4)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        shas = list(pool.map(lambda e: hashes.sha256(e[1], e[2]), entries))
+    return [{"path": rel, "sha256": sha, "bytes": st.st_size, "mode": zip_mode(st.st_mode)}
+            for (rel, _, st), sha in zip(entries, shas)]
+
+def _zinfo(name: str, mode: int) -> zipfile.ZipInfo:
+    zi = zipfile.ZipInfo(name, date_time=ZIP_EPOCH)
+    zi.create_system = 3  # unix, so external_attr carries the mode
+    zi.external_attr = (stat.S_IFREG | mode) << 16
+    # an embedded archive is already compressed: store it as is
+    zi.compress_type = zipfile.ZIP_STORED if name.endswith(".zip") else zipfile.ZIP_DEFLATED
+    return zi
+
+def write_zip(dest: Path, members: list[tuple[str, Any, int]]) -> tuple[str, int]:
+    """Deterministic zip of (name, source path or bytes, mode) in the given order. Returns (sha256, bytes).
+
+    Fixed timestamps, normalized modes, no extra fields: the same inputs always
+    give the same bytes. Written next to dest and renamed into place.
+    """
+    tmp = dest.with_name(f".{dest.name}.{os.getpid()}.tmp")
+    try:
+        with zipfile.ZipFile(tmp, "w", compresslevel=9) as z:
+            for name, src, mode in members:
+                if isinstance(src, bytes):
+                    z.writestr(_zinfo(name, mode), src)
+                    continue
+                with src.open("rb") as fs, z.open(_zinfo(name, mode), "w", force_zip64=src.stat().st_size > 0x7FFFFFFF) as fd:
+                    for chunk in iter(lambda: fs.read(fsutil.COPY_CHUNK), b""):
+                        fd.write(chunk)
+        os.replace(tmp, dest)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return fsutil.sha256_file(dest)
+
+def inputs_digest(files: list[dict[str, Any]]) -> str:
+    h = hashlib.sha256()
+    for f in files:
+        h.update(f"{f['path']}\0{f['sha256']}\0{f['mode']:o}\n".encode("utf-8"))
+    return h.hexdigest()
+
+def reusable(archive: Path, digest: str) -> Optional[dict[str, Any]]:
+    """The previous archive's stamp when it was built from the same inputs and is untouched since."""
+    try:
+        stamp = json.loads(archive.with_name(archive.name + STAMP_SUFFIX).read_text(encoding="utf-8"))
+        st = archive.stat()
+    except (FileNotFoundError, ValueError):
+        return None
+    if stamp.get("inputs_sha256") != digest or stamp.get("stat") != [st.st_size, st.st_mtime_ns, st.st_ino]:
+        return None
+    return stamp
+
+def write_stamp(archive: Path, digest: str, sha: str, n: int) -> None:
+    st = archive.stat()
+    stamp = {"schema_version": 1, "inputs_sha256": digest, "archive_sha256": sha, "bytes": n,
+             "stat": [st.st_size, st.st_mtime_ns, st.st_ino]}
+    archive.with_name(archive.name + STAMP_SUFFIX).write_text(json.dumps(stamp, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+def created_at(template: dict[str, Any], entries: list[tuple[str, Path, os.stat_result]]) -> str:
+    """Template value, else SOURCE_DATE_EPOCH, else the newest input mtime: stable for an unchanged tree."""
+    if isinstance(template.get("created_at"), str) and template["created_at"]:
+        return template["created_at"]
+    env = os.environ.get("SOURCE_DATE_EPOCH", "").strip()
+    ts = int(env) if env.isdigit() else max((int(st.st_mtime) for _, _, st in entries), default=0)
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import errno
+import os
+import shutil
+import stat
+import time
+from pathlib import Path
+from typing import Any
+
+from creative_os.bundles import fsutil
+
+def _keep(src: Path, dst: Path, link: bool) -> str:
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if link:
+        try:
+            os.link(src, dst)
+            return "hardlink"
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+                raise
+    return fsutil.clone_file(src, dst)
+
+def snapshot(tgt: Path, paths: list[str], dest: Path, link: bool) -> dict[str, Any]:
+    """Keep the current state of each path under tgt before an apply touches it.
+
+    Existing files are hardlinked into dest when link is set (only safe when
+    the apply replaces files by rename), else reflinked or copied. Paths that
+    don't exist yet are recorded so rollback can remove them, along with any
+    directories the apply creates for them.
+    """
+    t0 = time.monotonic()
+    entries = []
+    counts = {"hardlink": 0, "reflink": 0, "copy": 0}
+    dirs = set()
+    for rel in sorted(set(paths)):
+        t = tgt / rel
+        try:
+            st = t.lstat()
+        except (FileNotFoundError, NotADirectoryError):
+            entries.append({"path": rel, "existed": False})
+            d = t.parent
+            while d != tgt and not d.exists():
+                dirs.add(str(d.relative_to(tgt)))
+                d = d.parent
+            continue
+        if not stat.S_ISREG(st.st_mode):
+            raise ValueError(f"staged apply: {rel} in target is not a regular file; resolve it first")
+        method = _keep(t, dest / "files" / rel, link)
+        counts[method] += 1
+        entries.append({"path": rel, "existed": True, "mode": stat.S_IMODE(st.st_mode)})
+    return {
+        "dir": str(dest),
+        "entries": entries,
+        "new_dirs": sorted(dirs, key=lambda d: d.count("/"), reverse=True),
+        "files": sum(1 for e in entries if e["existed"]),
+        "absent": sum(1 for e in entries if not e["existed"]),
+        **counts,
+        "seconds": round(time.monotonic() - t0, 6),
+    }
+
+def rollback(tgt: Path, snap: dict[str, Any]) -> dict[str, Any]:
+    """Put every snapshotted path back as it was: one rename or unlink per path touched."""
+    t0 = time.monotonic()
+    kept = Path(snap["dir"]) / "files"
+    restored = removed = 0
+    for e in snap["entries"]:
+        t = tgt / e["path"]
+        if e["existed"]:
+            src = kept / e["path"]
+            t.parent.mkdir(parents=True, exist_ok=True)
+            if t.is_dir() and not t.is_symlink():
+                shutil.rmtree(t)
+            try:
+                os.replace(src, t)
+            except OSError as err:
+                if err.errno != errno.EXDEV:
+                    raise
+                fsutil.clone_file(src, t)
+            os.chmod(t, e["mode"])
+            restored += 1
+        elif t.is_file() or t.is_symlink():
+            t.unlink()
+            removed += 1
+    for d in snap["new_dirs"]:
+        try:
+            (tgt / d).rmdir()
+        except OSError:
+            pass  # not empty: something else was written there
+    return {"restored": restored, "removed": removed, "seconds": round(time.monotonic() - t0, 6)}
+
+def discard(snap: dict[str, Any]) -> None:
+    shutil.rmtree(snap["dir"], ignore_errors=True)
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+import zipfile
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Iterable, Optional, TypeVar
+
+from creative_os.bundles import fsutil
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+MANIFEST_NAME = "bundle_manifest.v1.json"
+
+class ContentMismatch(ValueError):
+    pass
+
+class _Cancelled(Exception):
+    pass
+
+def default_jobs() -> int:
+    return min(32, (os.cpu_count() or 1) + 4)
+
+def run_fail_fast(items: Iterable[T], fn: Callable[[T, threading.Event], R], jobs: int = 0) -> list[R]:
+    """Run fn over items on a thread pool; the first exception cancels the rest and is re-raised.
+
+    fn receives a stop event it should poll in long loops. Results keep input order.
+    """
+    items = list(items)
+    stop = threading.Event()
+    with ThreadPoolExecutor(max_workers=jobs if jobs > 0 else default_jobs()) as pool:
+        futures = [pool.submit(fn, it, stop) for it in items]
+        done, pending = wait(futures, return_when=FIRST_EXCEPTION)
+        failed = [f for f in futures if f.done() and not f.cancelled() and f.exception() is not None
+                  and not isinstance(f.exception(), _Cancelled)]
+        if failed:
+            stop.set()
+            for f in pending:
+                f.cancel()
+            raise failed[0].exception()
+    return [f.result() for f in futures]
+
+def hash_stream(src: BinaryIO, stop: threading.Event, sink: Optional[BinaryIO] = None) -> tuple[str, int]:
+    h = hashlib.sha256()
+    n = 0
+    for chunk in iter(lambda: src.read(fsutil.COPY_CHUNK), b""):
+        if stop.is_set():
+            raise _Cancelled()
+        h.update(chunk)
+        n += len(chunk)
+        if sink is not None:
+            sink.write(chunk)
+    return h.hexdigest(), n
+
+def listed_files(manifest: dict[str, Any]) -> dict[str, dict[str, Any]]:
+    """contents.files entries by path, minus the manifest's own (self-referential) entry."""
+    files = manifest.get("contents", {}).get("files", [])
+    if not isinstance(files, list):
+        return {}
+    return {f["path"]: f for f in files
+            if isinstance(f, dict) and isinstance(f.get("path"), str) and f.get("sha256") and f["path"] != MANIFEST_NAME}
+
+def check(path: str, expected: dict[str, Any], sha: str, n: int) -> None:
+    if "bytes" in expected and int(expected["bytes"]) != n:
+        raise ContentMismatch(f"{path}: size mismatch: manifest {expected['bytes']} bytes, bundle {n} bytes")
+    if sha != expected["sha256"]:
+        raise ContentMismatch(f"{path}: sha256 mismatch: manifest {expected['sha256']}, bundle {sha}")
+
+class StopReader:
+    """File-like wrapper that aborts a long read once another worker has failed."""
+
+    def __init__(self, src: BinaryIO, stop: threading.Event):
+        self._src = src
+        self._stop = stop
+
+    def read(self, n: int = -1) -> bytes:
+        if self._stop.is_set():
+            raise _Cancelled()
+        return self._src.read(n)
+
+def zip_expectations(members: dict[str, zipfile.ZipInfo], manifest: dict[str, Any]) -> tuple[dict[str, dict[str, Any]], list[str]]:
+    """Expected sha256/bytes per zip member, checked up front against the central directory.
+
+    Listed files that are absent from the zip are only accepted (and returned as
+    skipped) when the manifest's contents.archive is embedded in the zip, since
+    those files ship inside it, or when the bundle is a delta, since they come
+    from its parent. An embedded archive is checked against
+    contents.archive.sha256.
+    """
+    listed = listed_files(manifest)
+    archive = manifest.get("contents", {}).get("archive") or {}
+    archive_name = archive.get("filename") if isinstance(archive, dict) else None
+    archive_embedded = bool(archive_name) and archive_name in members
+    is_delta = manifest.get("contents", {}).get("delta") is not None
+
+    expected: dict[str, dict[str, Any]] = {}
+    skipped = []
+    for path, entry in sorted(listed.items()):
+        info = members.get(path)
+        if info is None:
+            if not (archive_embedded or is_delta):
+                raise ContentMismatch(f"{path}: listed in manifest but missing from bundle zip")
+            skipped.append(path)
+            continue
+        if "bytes" in entry and int(entry["bytes"]) != info.file_size:
+            raise ContentMismatch(f"{path}: size mismatch: manifest {entry['bytes']} bytes, bundle {info.file_size} bytes")
+        expected[path] = entry
+    if archive_embedded and archive.get("sha256"):
+        expected[archive_name] = {"sha256": archive["sha256"], "bytes": archive.get("bytes", members[archive_name].file_size)}
+    return expected, skipped
+
+class ZipReaders:
+    """One ZipFile handle per worker thread (handles are not thread-safe to share)."""
+
+    def __init__(self, zpath: Path):
+        self._zpath = zpath
+        self._local = threading.local()
+        self._handles: list[zipfile.ZipFile] = []
+        self._lock = threading.Lock()
+
+    def get(self) -> zipfile.ZipFile:
+        z = getattr(self._local, "z", None)
+        if z is None:
+            z = zipfile.ZipFile(self._zpath, "r")
+            self._local.z = z
+            with self._lock:
+                self._handles.append(z)
+        return z
+
+    def close(self) -> None:
+        for h in self._handles:
+            h.close()
+
+def verify_zip(zpath: Path, manifest: dict[str, Any], jobs: int = 0) -> dict[str, Any]:
+    """Stream every manifest-listed zip member through sha256 in parallel, without extracting.
+
+    Raises ContentMismatch on the first mismatch.
+    """
+    t0 = time.monotonic()
+    with zipfile.ZipFile(zpath, "r") as z:
+        members = {i.filename: i for i in z.infolist() if not i.is_dir()}
+    expected, skipped = zip_expectations(members, manifest)
+    readers = ZipReaders(zpath)
+
+    def one(item: tuple[str, dict[str, Any]], stop: threading.Event) -> dict[str, Any]:
+        path, entry = item
+        t = time.monotonic()
+        with readers.get().open(path) as src:
+            sha, n = hash_stream(src, stop)
+        check(path, entry, sha, n)
+        return {"path": path, "bytes": n, "seconds": round(time.monotonic() - t, 6)}
+
+    try:
+        results = run_fail_fast(sorted(expected.items()), one, jobs)
+    finally:
+        readers.close()
+    return report(results, skipped, t0)
+
+def verify_blobs(blob_for: Callable[[str], Optional[Path]], manifest: dict[str, Any], jobs: int = 0) -> dict[str, Any]:
+    """Re-hash the stored blobs behind each manifest-listed path in parallel."""
+    t0 = time.monotonic()
+    skipped = []
+    work = []
+    for path, expected in sorted(listed_files(manifest).items()):
+        p = blob_for(path)
+        if p is None:
+            skipped.append(path)
+            continue
+        work.append((path, expected, p))
+
+    def one(item: tuple[str, dict[str, Any], Path], stop: threading.Event) -> dict[str, Any]:
+        path, expected, p = item
+        t = time.monotonic()
+        with p.open("rb") as src:
+            sha, n = hash_stream(src, stop)
+        check(path, expected, sha, n)
+        return {"path": path, "bytes": n, "seconds": round(time.monotonic() - t, 6)}
+
+    return report(run_fail_fast(work, one, jobs), skipped, t0)
+
+def report(results: list[dict[str, Any]], skipped: list[str], t0: float) -> dict[str, Any]:
+    elapsed = time.monotonic() - t0
+    total = sum(r["bytes"] for r in results)
+    return {
+        "status": "pass",
+        "checked": len(results),
+        "skipped": skipped,
+        "bytes": total,
+        "seconds": round(elapsed, 6),
+        "bytes_per_sec": int(total / elapsed) if elapsed > 0 else None,
+        "files": results,
+    }
@@ -11,16 +11,42 @@ import argparse
 import os
 import sys
 
-from creative_os.bundles.engine import (
-    bundle_import,
-    bundle_list,
-    bundle_show,
-    bundle_plan,
-    bundle_apply,
-)
-
-def main(argv: list[str] | None = None) -> int:
+from creative_os.cli import daemon
+
+def _bundle_apply(a: argparse.Namespace):
+    from creative_os.bundles.engine import bundle_apply, bundle_apply_many
+
+    targets = a.target or []
+    if len(targets) == 1 and not a.targets_file:
+        return bundle_apply(a.bundle_id, targets[0], mode=a.mode, force=a.force, vault_override=a.vault or None, cache_max_mb=a.cache_max_mb, native=a.native, verify_contents=a.verify_contents, timeout=a.timeout, staged=a.staged)
+    return bundle_apply_many(a.bundle_id, targets, targets_file=a.targets_file, mode=a.mode, force=a.force, vault_override=a.vault or None, cache_max_mb=a.cache_max_mb, native=a.native, verify_contents=a.verify_contents, jobs=a.jobs, timeout=a.timeout, staged=a.staged)
+
+def main(argv: list[str] | None = None, use_daemon: bool = True) -> int:
     argv = argv if argv is not None else sys.argv[1:]
+    if use_daemon:
+        rc = daemon.try_daemon(argv)
+        if rc is not None:
+            return rc
+
+    # imported here so calls answered by a running `cos serve` never load the engine
+    from creative_os.bundles.engine import (
+        bundle_import,
+        bundle_import_many,
+        bundle_list,
+        bundle_show,
+        bundle_plan,
+        bundle_pack,
+        bundle_reindex,
+        bundle_lineage,
+        bundle_latest,
+        runs_list,
+        runs_query,
+        runs_stats,
+        runs_reindex,
+        vault_gc,
+        vault_replicate,
+        vault_serve_stdio,
+    )
 
     p = argparse.ArgumentParser(prog="cos", description="Creative OS CLI (v0.1)")
     sub = p.add_subparsers(dest="cmd", required=True)
@@ -32,35 +58,150 @@ def main(argv: list[str] | None = None) -> int:
     p_import.add_argument("zip_path", help="Path to bundle zip (must contain bundle_manifest.v1.json at root)")
     p_import.add_argument("--vault", default="", help="Vault root (default: env CREATIVE_OS_VAULT or ~/CreativeOSVault)")
     p_import.add_argument("--tag", action="append", default=[], help="Optional tags to attach to this bundle import")
-    p_import.set_defaults(fn=lambda a: bundle_import(a.zip_path, vault_override=a.vault or None, tags=a.tag))
+    p_import.add_argument("--jobs", "-j", type=int, default=0, help="Hashing threads (default: based on CPU count)")
+    p_import.add_argument("--no-verify-contents", action="store_true", help="Trust manifest hashes: skip checking zip members against contents.files")
+    p_import.set_defaults(fn=lambda a: bundle_import(a.zip_path, vault_override=a.vault or None, tags=a.tag, jobs=a.jobs, verify_contents=not a.no_verify_contents))
+
+    p_import_many = bsub.add_parser("import-many", help="Import every bundle zip in a directory or glob, concurrently")
+    p_import_many.add_argument("source", help="Directory of zips or a glob pattern (quote it), e.g. 'drops/*.zip'")
+    p_import_many.add_argument("--jobs", "-j", type=int, default=0, help="Worker count (default: based on CPU count)")
+    p_import_many.add_argument("--vault", default="", help="Vault root override")
+    p_import_many.add_argument("--tag", action="append", default=[], help="Optional tags to attach to every imported bundle")
+    p_import_many.add_argument("--no-verify-contents", action="store_true", help="Trust manifest hashes: skip checking zip members against contents.files")
+    p_import_many.set_defaults(fn=lambda a: bundle_import_many(a.source, vault_override=a.vault or None, tags=a.tag, jobs=a.jobs, verify_contents=not a.no_verify_contents))
+
+    p_pack = bsub.add_parser("pack", help="Pack a payload directory into a reproducible ship bundle (archive + manifest + bundle zip)")
+    p_pack.add_argument("src_dir", help="Payload directory; its bundle_manifest.v1.json is the template unless --manifest is given")
+    p_pack.add_argument("--manifest", default="", help="Manifest template (apply, targets, lineage, ...); computed fields are filled in")
+    p_pack.add_argument("--out", default="", help="Output directory (default: <src_dir>/../dist)")
+    p_pack.add_argument("--bundle-id", default="", help="Override bundle_id from the template")
+    p_pack.add_argument("--version", default="", help="Override bundle_version from the template")
+    p_pack.add_argument("--archive-name", default="", help="Payload archive filename (default: template contents.archive.filename or <bundle_id>.payload.zip)")
+    p_pack.add_argument("--jobs", "-j", type=int, default=0, help="Hashing threads (default: based on CPU count)")
+    p_pack.add_argument("--delta-from", default="", help="Imported parent bundle_id: ship only files that differ from it, plus a deletions list")
+    p_pack.add_argument("--vault", default="", help="Vault root override (its hash cache is reused)")
+    p_pack.set_defaults(fn=lambda a: bundle_pack(a.src_dir, out_dir=a.out or None, manifest_path=a.manifest or None, bundle_id=a.bundle_id or None, version=a.version or None, archive_name=a.archive_name or None, jobs=a.jobs, vault_override=a.vault or None, delta_from=a.delta_from or None))
 
     p_list = bsub.add_parser("list", help="List imported bundles")
     p_list.add_argument("--vault", default="", help="Vault root override")
     p_list.set_defaults(fn=lambda a: bundle_list(vault_override=a.vault or None))
 
+    p_reindex = bsub.add_parser("reindex", help="Rebuild the vault bundle index from disk")
+    p_reindex.add_argument("--vault", default="", help="Vault root override")
+    p_reindex.set_defaults(fn=lambda a: bundle_reindex(vault_override=a.vault or None))
+
     p_show = bsub.add_parser("show", help="Show bundle manifest and metadata")
     p_show.add_argument("bundle_id", help="Bundle ID")
     p_show.add_argument("--vault", default="", help="Vault root override")
     p_show.set_defaults(fn=lambda a: bundle_show(a.bundle_id, vault_override=a.vault or None))
 
+    p_lineage = bsub.add_parser("lineage", help="Show a bundle's parents, successors, ancestors and descendants")
+    p_lineage.add_argument("bundle_id", help="Bundle ID")
+    p_lineage.add_argument("--json", action="store_true", help="Print as JSON")
+    p_lineage.add_argument("--vault", default="", help="Vault root override")
+    p_lineage.set_defaults(fn=lambda a: bundle_lineage(a.bundle_id, vault_override=a.vault or None, as_json=a.json))
+
+    p_latest = bsub.add_parser("latest", help="Print the latest bundle of a family (not superseded; highest version)")
+    p_latest.add_argument("family", help="Bundle family (bundle_family, or bundle_id without its version suffix)")
+    p_latest.add_argument("--json", action="store_true", help="Print as JSON")
+    p_latest.add_argument("--vault", default="", help="Vault root override")
+    p_latest.set_defaults(fn=lambda a: bundle_latest(a.family, vault_override=a.vault or None, as_json=a.json))
+
     p_plan = bsub.add_parser("plan", help="Plan applying an imported bundle to a target directory (dry run)")
     p_plan.add_argument("bundle_id", help="Bundle ID")
     p_plan.add_argument("--target", required=True, help="Target directory (repo root)")
+    p_plan.add_argument("--json", action="store_true", help="Print the plan as JSON")
     p_plan.add_argument("--vault", default="", help="Vault root override")
-    p_plan.set_defaults(fn=lambda a: bundle_plan(a.bundle_id, a.target, vault_override=a.vault or None))
+    p_plan.set_defaults(fn=lambda a: bundle_plan(a.bundle_id, a.target, vault_override=a.vault or None, as_json=a.json))
 
     p_apply = bsub.add_parser("apply", help="Apply an imported bundle to a target directory")
     p_apply.add_argument("bundle_id", help="Bundle ID")
-    p_apply.add_argument("--target", required=True, help="Target directory (repo root)")
+    p_apply.add_argument("--target", action="append", help="Target directory (repo root); repeat to apply to several targets concurrently")
+    p_apply.add_argument("--targets-file", default="", help="File listing target directories, one per line (# comments allowed)")
+    p_apply.add_argument("--jobs", "-j", type=int, default=0, help="Concurrent targets when applying to several (default: min(8, targets))")
+    p_apply.add_argument("--timeout", type=float, default=None, help="Per-target time limit in seconds for apply+verify scripts")
     p_apply.add_argument("--mode", default="GUIDED", choices=["SAFE","GUIDED","ALL"], help="Execution gate (local-only). v0.1 uses this only for logging.")
     p_apply.add_argument("--force", action="store_true", help="Pass --force to bundle apply script (if supported)")
+    p_apply.add_argument("--native", action="store_true", help="Engine-native overlay: write only files whose hash differs from the target (overlay bundles)")
+    p_apply.add_argument("--staged", action="store_true", help="Snapshot the files the manifest lists first; restore them if apply or verify fails")
+    p_apply.add_argument("--verify-contents", action="store_true", help="Re-hash stored bundle content against the manifest before applying")
+    p_apply.add_argument("--cache-max-mb", type=int, default=None, help="Extracted-bundle cache size cap in MB; 0 disables the cache (default: env CREATIVE_OS_EXTRACT_CACHE_MB or 2048)")
     p_apply.add_argument("--vault", default="", help="Vault root override")
-    p_apply.set_defaults(fn=lambda a: bundle_apply(a.bundle_id, a.target, mode=a.mode, force=a.force, vault_override=a.vault or None))
+    p_apply.set_defaults(fn=_bundle_apply)
+
+    p_runs = sub.add_parser("runs", help="Query the vault run ledger (imports, applies)")
+    rsub = p_runs.add_subparsers(dest="runs_cmd", required=True)
+
+    p_rlist = rsub.add_parser("list", help="Most recent runs, newest first")
+    p_rlist.add_argument("--limit", "-n", type=int, default=20, help="Max records (default: 20)")
+    p_rlist.add_argument("--json", action="store_true", help="Print records as JSON")
+    p_rlist.add_argument("--vault", default="", help="Vault root override")
+    p_rlist.set_defaults(fn=lambda a: runs_list(vault_override=a.vault or None, limit=a.limit, as_json=a.json))
+
+    p_rquery = rsub.add_parser("query", help="Filter runs by bundle, status, kind, target and time")
+    p_rquery.add_argument("--bundle", default=None, help="Bundle ID")
+    p_rquery.add_argument("--status", default=None, choices=["pass", "fail"], help="Run status")
+    p_rquery.add_argument("--kind", default=None, choices=["import", "apply", "gc", "push", "pull"], help="Run kind")
+    p_rquery.add_argument("--target", default=None, help="Apply target directory")
+    p_rquery.add_argument("--since", default=None, help="ISO date/time or age (30d, 12h, 45m)")
+    p_rquery.add_argument("--until", default=None, help="ISO date/time or age (30d, 12h, 45m)")
+    p_rquery.add_argument("--limit", "-n", type=int, default=None, help="Max records")
+    p_rquery.add_argument("--json", action="store_true", help="Print records as JSON")
+    p_rquery.add_argument("--vault", default="", help="Vault root override")
+    p_rquery.set_defaults(fn=lambda a: runs_query(vault_override=a.vault or None, bundle_id=a.bundle, status=a.status, kind=a.kind, target=a.target, since=a.since, until=a.until, limit=a.limit, as_json=a.json))
+
+    p_rstats = rsub.add_parser("stats", help="Per-bundle apply percentiles: wall time per phase, child CPU, max RSS")
+    p_rstats.add_argument("--bundle", default=None, help="Bundle ID")
+    p_rstats.add_argument("--since", default=None, help="ISO date/time or age (30d, 12h, 45m)")
+    p_rstats.add_argument("--until", default=None, help="ISO date/time or age (30d, 12h, 45m)")
+    p_rstats.add_argument("--json", action="store_true", help="Print stats as JSON")
+    p_rstats.add_argument("--vault", default="", help="Vault root override")
+    p_rstats.set_defaults(fn=lambda a: runs_stats(vault_override=a.vault or None, bundle_id=a.bundle, since=a.since, until=a.until, as_json=a.json))
+
+    p_rreindex = rsub.add_parser("reindex", help="Rebuild the ledger segment index from the segments")
+    p_rreindex.add_argument("--vault", default="", help="Vault root override")
+    p_rreindex.set_defaults(fn=lambda a: runs_reindex(vault_override=a.vault or None))
+
+    p_vault = sub.add_parser("vault", help="Vault maintenance")
+    vsub = p_vault.add_subparsers(dest="vault_cmd", required=True)
+
+    p_gc = vsub.add_parser("gc", help="Retention-driven cleanup: old runs, superseded bundles, unreferenced objects (dry run by default)")
+    p_gc.add_argument("--keep-runs", type=int, default=10, help="Run dirs to keep per bundle (default: 10)")
+    p_gc.add_argument("--superseded-days", type=float, default=30, help="Drop bundles with lineage.superseded_by set once imported this many days ago (default: 30)")
+    p_gc.add_argument("--compact-days", type=float, default=7, help="Compress logs of kept runs older than this many days into logs.tar.gz (default: 7)")
+    p_gc.add_argument("--delete", action="store_true", help="Actually delete/compact (default: report only)")
+    p_gc.add_argument("--json", action="store_true", help="Print the plan (or receipt) as JSON")
+    p_gc.add_argument("--vault", default="", help="Vault root override")
+    p_gc.set_defaults(fn=lambda a: vault_gc(vault_override=a.vault or None, keep_runs=a.keep_runs, superseded_days=a.superseded_days, compact_days=a.compact_days, delete=a.delete, as_json=a.json))
+
+    for direction, verb in (("push", "Copy bundles this vault has and the remote lacks to the remote vault"),
+                            ("pull", "Copy bundles the remote vault has and this vault lacks into this vault")):
+        p_rep = vsub.add_parser(direction, help=verb + " (missing objects only; resumable)")
+        p_rep.add_argument("remote", help="Remote vault: a directory, ssh://[user@]host[:port]/path or [user@]host:path")
+        p_rep.add_argument("--bundle", action="append", default=None, help="Only this bundle ID (repeatable; default: all)")
+        p_rep.add_argument("--remote-cmd", default="python3 -m creative_os.cli", help="cos command on the ssh host (default: python3 -m creative_os.cli; ssh itself: env COS_SSH)")
+        p_rep.add_argument("--json", action="store_true", help="Print the receipt as JSON")
+        p_rep.add_argument("--vault", default="", help="Vault root override")
+        p_rep.set_defaults(fn=lambda a, d=direction: vault_replicate(d, a.remote, bundle_ids=a.bundle, vault_override=a.vault or None, remote_cmd=a.remote_cmd, as_json=a.json))
+
+    p_sstdio = vsub.add_parser("serve-stdio", help="Answer push/pull requests on stdin/stdout (run by push/pull over ssh)")
+    p_sstdio.add_argument("--vault", default="", help="Vault root override")
+    p_sstdio.set_defaults(fn=lambda a: vault_serve_stdio(vault_override=a.vault or None))
+
+    p_serve = sub.add_parser("serve", help="Run a resident daemon that answers read-only commands from a warm cache (opt-in)")
+    p_serve.add_argument("--idle-timeout", type=float, default=None, help="Exit after this many seconds without requests")
+    p_serve.add_argument("--stop", action="store_true", help="Stop the daemon serving this vault")
+    p_serve.add_argument("--vault", default="", help="Vault root override")
+    p_serve.set_defaults(fn=lambda a: daemon.stop(daemon.vault_for(argv)) if a.stop else daemon.serve(daemon.vault_for(argv), idle_timeout=a.idle_timeout))
 
     args = p.parse_args(argv)
     try:
         res = args.fn(args)
-        return 0 if (res is None or res is True) else int(res)
+        if res is None or res is True:
+            return 0
+        if res is False:
+            return 1
+        return int(res)
     except KeyboardInterrupt:
         return 130
     except Exception as e:
@@ -0,0 +1,194 @@
+"""
+creative_os.cli.daemon
+
+Opt-in resident `cos serve` process. It answers read-only commands over a Unix
+socket from warm in-process caches. The client half only uses the stdlib
+modules needed to talk to the socket, so a served call skips importing the
+bundle engine.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import socket
+import sys
+from pathlib import Path
+from typing import Any, Optional
+
+# commands whose result depends only on vault state; everything else runs in-process
+SERVED = {
+    ("bundle", "list"), ("bundle", "show"), ("bundle", "plan"),
+    ("bundle", "lineage"), ("bundle", "latest"),
+    ("runs", "list"), ("runs", "query"), ("runs", "stats"),
+}
+PATH_OPTIONS = ("--target", "--vault")
+CONNECT_TIMEOUT = 0.5
+MAX_MESSAGE = 64 * 1024 * 1024
+
+def vault_for(argv: list[str]) -> Path:
+    # mirrors engine._vault_root without importing the engine
+    override = None
+    for i, a in enumerate(argv):
+        if a == "--vault" and i + 1 < len(argv):
+            override = argv[i + 1]
+        elif a.startswith("--vault="):
+            override = a.split("=", 1)[1]
+    raw = override or os.environ.get("CREATIVE_OS_VAULT", "").strip() or "~/CreativeOSVault"
+    return Path(os.path.expanduser(raw)).resolve()
+
+def socket_path(vault: Path) -> Path:
+    p = vault / "daemon" / "cos.sock"
+    if len(os.fsencode(p)) < 100:
+        return p
+    # AF_UNIX paths are limited to ~104 bytes; long vault paths use the runtime dir
+    base = Path(os.environ.get("XDG_RUNTIME_DIR") or "/tmp")
+    return base / f"cos-{os.getuid()}-{hashlib.sha256(str(vault).encode()).hexdigest()[:16]}.sock"
+
+def _send(sock: socket.socket, msg: dict[str, Any]) -> None:
+    sock.sendall(json.dumps(msg).encode("utf-8") + b"\n")
+
+def _recv(sock: socket.socket) -> Optional[dict[str, Any]]:
+    buf = bytearray()
+    while not buf.endswith(b"\n"):
+        chunk = sock.recv(65536)
+        if not chunk:
+            return None
+        buf += chunk
+        if len(buf) > MAX_MESSAGE:
+            raise ValueError("daemon message too large")
+    return json.loads(buf)
+
+def _served(argv: list[str]) -> bool:
+    return tuple(argv[:2]) in SERVED
+
+def _connect(vault: Path) -> Optional[socket.socket]:
+    path = socket_path(vault)
+    try:
+        if path.stat().st_uid != os.getuid():
+            return None
+        s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        s.settimeout(CONNECT_TIMEOUT)
+        s.connect(str(path))
+    except OSError:
+        return None
+    s.settimeout(None)
+    return s
+
+def try_daemon(argv: list[str]) -> Optional[int]:
+    """Run argv on a running daemon. None means: run it in-process instead."""
+    if os.environ.get("COS_NO_DAEMON") or not _served(argv):
+        return None
+    vault = vault_for(argv)
+    sock = _connect(vault)
+    if sock is None:
+        return None
+    try:
+        with sock:
+            _send(sock, {"op": "run", "argv": argv, "cwd": os.getcwd(), "vault": str(vault)})
+            resp = _recv(sock)
+    except (OSError, ValueError):
+        return None
+    if not resp or resp.get("fallback"):
+        return None
+    sys.stdout.write(resp.get("stdout", ""))
+    sys.stderr.write(resp.get("stderr", ""))
+    return int(resp.get("exit", 1))
+
+def stop(vault: Path) -> bool:
+    sock = _connect(vault)
+    if sock is None:
+        print(f"No daemon running for vault: {vault}")
+        return False
+    with sock:
+        _send(sock, {"op": "shutdown"})
+        _recv(sock)
+    print(f"Stopped daemon for vault: {vault}")
+    return True
+
+def _absolutize(argv: list[str], cwd: str) -> list[str]:
+    # the daemon has its own cwd; resolve the client's relative paths against the client's
+    out = []
+    expect = False
+    for a in argv:
+        if expect:
+            a = os.path.join(cwd, os.path.expanduser(a))
+            expect = False
+        elif a in PATH_OPTIONS:
+            expect = True
+        else:
+            for opt in PATH_OPTIONS:
+                if a.startswith(opt + "="):
+                    a = opt + "=" + os.path.join(cwd, os.path.expanduser(a.split("=", 1)[1]))
+        out.append(a)
+    return out
+
+def serve(vault: Path, idle_timeout: Optional[float] = None) -> bool:
+    """Serve requests for one vault until stopped. Requests are handled one at a time."""
+    import contextlib
+    import io
+    import socketserver
+    import time
+
+    from creative_os.cli.__main__ import main as cli_main
+
+    path = socket_path(vault)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if _connect(vault) is not None:
+        raise ValueError(f"A daemon is already serving {vault} at {path}")
+    path.unlink(missing_ok=True)
+    state = {"last": time.monotonic(), "served": 0}
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self) -> None:
+            try:
+                req = _recv(self.request)
+            except (OSError, ValueError):
+                return
+            if not req:
+                return
+            if req.get("op") == "shutdown":
+                _send(self.request, {"ok": True})
+                self.server._shutdown_requested = True
+                return
+            argv = req.get("argv") or []
+            if req.get("vault") != str(vault) or not _served(argv):
+                _send(self.request, {"fallback": True})
+                return
+            out, err = io.StringIO(), io.StringIO()
+            with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+                try:
+                    rc = cli_main(_absolutize(argv, req.get("cwd") or "/"), use_daemon=False)
+                except SystemExit as e:  # argparse errors/--help
+                    rc = e.code if isinstance(e.code, int) else 2
+            state["last"] = time.monotonic()
+            state["served"] += 1
+            _send(self.request, {"exit": rc, "stdout": out.getvalue(), "stderr": err.getvalue()})
+
+    class Server(socketserver.UnixStreamServer):
+        _shutdown_requested = False
+
+    old_umask = os.umask(0o077)
+    try:
+        server = Server(str(path), Handler)
+    finally:
+        os.umask(old_umask)
+    server.timeout = 1.0
+    pid_file = vault / "daemon" / "cos.pid"
+    pid_file.parent.mkdir(parents=True, exist_ok=True)
+    pid_file.write_text(f"{os.getpid()}\n", encoding="utf-8")
+    print(f"Serving vault {vault} on {path} (pid {os.getpid()})", flush=True)
+    try:
+        while not server._shutdown_requested:
+            server.handle_request()
+            if idle_timeout and time.monotonic() - state["last"] > idle_timeout:
+                print(f"Idle for {idle_timeout:g}s; exiting", flush=True)
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        path.unlink(missing_ok=True)
+        pid_file.unlink(missing_ok=True)
+    print(f"Served {state['served']} requests", flush=True)
+    return True
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, List, Optional
+import json
 import time
 
 from ..adapter import OperatorShellAdapter
@@ -12,6 +13,10 @@ CONFIG_LIVE = Path("CONFIG/corp_payment_fingerprints.json")
 BUNDLES_DIR = Path("accounting/data/2025/bundles")
 DRY_RUN_MARKER = Path("accounting/data/.local/ui_state/dry_run_done_2025")
 EXPORT_DIR = Path("accounting/data/2025/exports")
+# touched by every successful export; CSVs whose content didn't change keep their old mtime
+EXPORTS_STAMP = Path("accounting/data/.local/cache/exports_2025.stamp")
+# moved after every fsync'd append to the decision journal (accounting/scripts/decision_journal.py)
+DECISION_JOURNAL_TAIL = Path("accounting/data/2025/decision_journal_2025.tail.json")
 
 EXPORT_FILES = [
     EXPORT_DIR / "schedule_c_expenses_2025.csv",
@@ -33,9 +38,28 @@ def _newest_mtime_under(root: Path, patterns: tuple[str, ...]) -> float:
                 pass
     return newest
 
+def _journal_tail() -> Optional[dict[str, Any]]:
+    try:
+        tail = json.loads(DECISION_JOURNAL_TAIL.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return tail if isinstance(tail, dict) and tail.get("schema_version") == 1 else None
+
+def _journal_has_autofill(tail: Optional[dict[str, Any]]) -> bool:
+    # a journal seeds itself from older per-bundle files, so once it holds an autofill record it covers them all
+    return tail is not None and "set_economic_owner" in (tail.get("last") or {})
+
+def _newest_decision_mtime() -> float:
+    tail = _journal_tail()
+    if _journal_has_autofill(tail):
+        return float(tail.get("ts") or 0.0)
+    # no journal, or one without autofill records: per-bundle files may predate it
+    newest = _newest_mtime_under(BUNDLES_DIR, ("decisions/*.json",))
+    return max(newest, float(tail.get("ts") or 0.0)) if tail is not None else newest
+
 def _newest_bundle_change_mtime() -> float:
     return max(
-        _newest_mtime_under(BUNDLES_DIR, ("decisions/*.json",)),
+        _newest_decision_mtime(),
         _newest_mtime_under(BUNDLES_DIR, ("extracted/extracted_metadata.json",)),
     )
 
@@ -48,12 +72,17 @@ def _exports_mtime() -> float:
             mtimes.append(f.stat().st_mtime)
         except FileNotFoundError:
             return 0.0
-    return min(mtimes) if mtimes else 0.0
+    try:
+        return max(min(mtimes), EXPORTS_STAMP.stat().st_mtime)
+    except FileNotFoundError:
+        return min(mtimes) if mtimes else 0.0
 
 def _exports_stale() -> bool:
     return _exports_mtime() < _newest_bundle_change_mtime()
 
 def _autofill_has_run() -> bool:
+    if _journal_has_autofill(_journal_tail()):
+        return True
     if not BUNDLES_DIR.exists():
         return False
     for f in BUNDLES_DIR.rglob("decisions/auto_owner_from_payment.json"):
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import random
+import unittest
+from typing import Any, Optional
+
+from corp_payment_matcher import CorpPaymentMatcher, TokenAutomaton, norm
+
+# --- the linear scan autofill_economic_owner.py used before the matcher, kept as the reference ---
+
+def contains_any(hay: str, needles: list[str]) -> bool:
+    h = hay.lower()
+    return any(n.lower() in h for n in needles if n)
+
+def strong_match_by_last4(payment: dict[str, Any], corp_card: dict[str, Any], policy: dict[str, Any]) -> bool:
+    if not payment.get("card_last4"):
+        return False
+    if norm(payment["card_last4"]) != norm(corp_card.get("last4", "")):
+        return False
+    if policy.get("require_brand_if_present") and payment.get("card_brand") and corp_card.get("brand"):
+        if norm(payment["card_brand"]) != norm(corp_card["brand"]):
+            return False
+    if policy.get("require_billing_zip_if_present") and payment.get("billing_zip") and corp_card.get("billing_zip"):
+        if norm(payment["billing_zip"]) != norm(corp_card["billing_zip"]):
+            return False
+    return True
+
+def match_by_address(payment: dict[str, Any], corp_addr_needles: list[str]) -> bool:
+    addr_blob = " ".join([payment.get("billing_name", ""), payment.get("billing_address", "")]).strip()
+    if not addr_blob:
+        return False
+    return contains_any(addr_blob, corp_addr_needles)
+
+def reference(cfg: dict[str, Any], payment: dict[str, Any]) -> tuple[Optional[str], dict[str, Any]]:
+    corp_addr_needles = cfg.get("corp_billing_address_contains", [])
+    for cc in cfg.get("corp_cards", []):
+        if strong_match_by_last4(payment, cc, cfg.get("match_policy", {})):
+            return "card_last4_match", {"matched_card_label": cc.get("label", ""), "matched_last4": cc.get("last4", "")}
+    if corp_addr_needles and match_by_address(payment, corp_addr_needles):
+        return "billing_address_match", {"matched_address_tokens": corp_addr_needles[:3]}
+    return None, {}
+
+# small value pools so cards collide on last4 and payments hit every branch
+LAST4 = ["", "1234", " 1234", "5678", "0000"]
+BRANDS = ["", "Visa", "VISA ", "Amex", None]
+ZIPS = ["", "94107", "94107 ", "10001", None]
+TOKENS = ["", "Acme", "acme corp", "Suite 5", "cme", "ACME CORP LLC"]
+NAMES = ["", "ACME Corp", "Jane Doe", "acme corporation"]
+ADDRESSES = ["", "1 Main St Suite 500", "PO Box 9", "  "]
+
+def random_config(rng: random.Random) -> dict[str, Any]:
+    cards = []
+    for i in range(rng.randint(0, 5)):
+        cc: dict[str, Any] = {"label": f"card{i}"}
+        for key, pool in (("last4", LAST4), ("brand", BRANDS), ("billing_zip", ZIPS)):
+            if rng.random() >= 0.2:  # else the key is absent
+                cc[key] = rng.choice(pool)
+        cards.append(cc)
+    return {
+        "corp_cards": cards,
+        "corp_billing_address_contains": rng.sample(TOKENS, rng.randint(0, 4)),
+        "match_policy": {"require_brand_if_present": rng.random() < 0.5, "require_billing_zip_if_present": rng.random() < 0.5},
+    }
+
+def random_payment(rng: random.Random) -> dict[str, Any]:
+    # get_payment always fills every key, with "" for missing fields
+    return {
+        "card_last4": rng.choice(LAST4),
+        "card_brand": rng.choice([b for b in BRANDS if b is not None]),
+        "billing_zip": rng.choice([z for z in ZIPS if z is not None]),
+        "billing_name": rng.choice(NAMES),
+        "billing_address": rng.choice(ADDRESSES),
+    }
+
+class MatchesLinearScan(unittest.TestCase):
+    def test_random_configs_and_payments(self) -> None:
+        rng = random.Random(2025)
+        for _ in range(400):
+            cfg = random_config(rng)
+            matcher = CorpPaymentMatcher(cfg)
+            for _ in range(50):
+                payment = random_payment(rng)
+                self.assertEqual(matcher.match(payment), reference(cfg, payment), (cfg, payment))
+
+    def test_first_card_in_config_order_wins(self) -> None:
+        cfg = {
+            "corp_cards": [
+                {"label": "no brand", "last4": "1234"},
+                {"label": "visa", "last4": "1234", "brand": "visa", "billing_zip": "94107"},
+            ],
+            "match_policy": {"require_brand_if_present": True, "require_billing_zip_if_present": True},
+        }
+        payment = {"card_last4": "1234", "card_brand": "VISA", "billing_zip": "94107"}
+        self.assertEqual(CorpPaymentMatcher(cfg).match(payment)[1]["matched_card_label"], "no brand")
+        self.assertEqual(CorpPaymentMatcher(cfg).match(payment), reference(cfg, payment))
+
+    def test_empty_config_matches_nothing(self) -> None:
+        payment = {"card_last4": "1234", "billing_name": "ACME"}
+        self.assertEqual(CorpPaymentMatcher({}).match(payment), (None, {}))
+
+class Automaton(unittest.TestCase):
+    def test_agrees_with_substring_search(self) -> None:
+        rng = random.Random(7)
+        alphabet = "abAB "
+        for _ in range(500):
+            tokens = ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 4))) for _ in range(rng.randint(0, 6))]
+            automaton = TokenAutomaton(tokens)
+            for _ in range(20):
+                text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+                self.assertEqual(automaton.search(text), contains_any(text, tokens), (tokens, text))
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from typing import Any
+
+import decision_journal as dj
+
+def decision(bundle_id: str, value: str, action: str = "set_economic_owner") -> dict[str, Any]:
+    return {"bundle_id": bundle_id, "action": action, "new_value": value, "timestamp": "2025-01-01T00:00:00Z"}
+
+class Journal(unittest.TestCase):
+    def setUp(self) -> None:
+        tmp = Path(tempfile.mkdtemp(prefix="cos-journal-"))
+        self.addCleanup(shutil.rmtree, tmp, True)
+        self.journal = tmp / "journal.jsonl"
+        self.tail = tmp / "journal.tail.json"
+
+    def append(self, *entries: tuple[str, dict[str, Any]]) -> list[int]:
+        return dj.append(list(entries), self.journal, self.tail)
+
+    def records(self) -> list[dict[str, Any]]:
+        return list(dj.records(self.journal, self.tail))
+
+    def test_tail_points_at_last_committed_byte(self) -> None:
+        self.assertEqual(self.append(("owner.json", decision("b1", "c_corp")), ("owner.json", decision("b2", "personal"))), [1, 2])
+        self.assertEqual(self.append(("vendor.json", decision("b1", "x", action="classify_vendor"))), [3])
+        tail = dj.read_tail(self.tail)
+        self.assertEqual(tail["seq"], 3)
+        self.assertEqual(tail["bytes"], self.journal.stat().st_size)
+        self.assertEqual({a: v["seq"] for a, v in tail["last"].items()}, {"set_economic_owner": 2, "classify_vendor": 3})
+
+    def test_torn_write_is_ignored_then_truncated(self) -> None:
+        self.append(("owner.json", decision("b1", "c_corp")))
+        committed = self.journal.stat().st_size
+        # an append that died after writing part of its batch, before the pointer moved
+        with self.journal.open("ab") as f:
+            f.write(b'{"seq": 2, "view": "owner.json", "bundle_id": "b2"}\n{"seq": 3, "vi')
+        self.assertEqual([r["seq"] for r in self.records()], [1])
+
+        self.assertEqual(self.append(("owner.json", decision("b3", "c_corp"))), [2])
+        self.assertEqual([(r["seq"], r["bundle_id"]) for r in self.records()], [(1, "b1"), (2, "b3")])
+        lines = self.journal.read_bytes().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(dj.read_tail(self.tail)["bytes"], self.journal.stat().st_size)
+        self.assertGreater(self.journal.stat().st_size, committed)
+
+    def test_rebuild_tail_matches_appends(self) -> None:
+        self.append(("owner.json", decision("b1", "c_corp")))
+        self.append(("owner.json", decision("b2", "personal")), ("vendor.json", decision("b2", "y", action="classify_vendor")))
+        written = dj.read_tail(self.tail)
+        self.tail.unlink()
+        self.assertEqual(dj.rebuild_tail(self.journal, self.tail), written)
+
+    def test_rebuild_tail_stops_at_torn_line(self) -> None:
+        self.append(("owner.json", decision("b1", "c_corp")))
+        size = self.journal.stat().st_size
+        with self.journal.open("ab") as f:
+            f.write(b'{"seq": 2, "view"')
+        tail = dj.rebuild_tail(self.journal, self.tail)
+        self.assertEqual((tail["seq"], tail["bytes"]), (1, size))
+
+    def test_pointer_ahead_of_journal_is_rebuilt(self) -> None:
+        # e.g. the journal was restored from an older backup
+        self.append(("owner.json", decision("b1", "c_corp")))
+        first = self.journal.read_bytes()
+        self.append(("owner.json", decision("b2", "c_corp")))
+        self.journal.write_bytes(first)
+        self.assertEqual(self.append(("owner.json", decision("b3", "c_corp"))), [2])
+        self.assertEqual([r["bundle_id"] for r in self.records()], ["b1", "b3"])
+
+    def test_latest_keeps_newest_per_bundle_and_view(self) -> None:
+        self.append(("owner.json", decision("b1", "tbd")), ("owner.json", decision("b2", "c_corp")))
+        self.append(("owner.json", decision("b1", "c_corp")), ("vendor.json", decision("b1", "x", action="classify_vendor")))
+        latest = dj.latest("owner.json", self.journal, self.tail)
+        self.assertEqual(set(latest), {("b1", "owner.json"), ("b2", "owner.json")})
+        self.assertEqual(latest[("b1", "owner.json")]["new_value"], "c_corp")
+        self.assertEqual(latest[("b1", "owner.json")]["seq"], 3)
+
+    def test_same_decision_ignores_timestamps_and_bookkeeping(self) -> None:
+        self.append(("owner.json", decision("b1", "c_corp")))
+        (rec,) = self.records()
+        self.assertTrue(dj.same_decision(rec, {**decision("b1", "c_corp"), "timestamp": "2025-06-01T00:00:00Z"}))
+        self.assertFalse(dj.same_decision(rec, decision("b1", "personal")))
+        self.assertEqual(dj.decision_of(rec), decision("b1", "c_corp"))
+
+    def test_seed_imports_existing_files_once_oldest_first(self) -> None:
+        bundles = self.journal.parent / "bundles"
+        for i, bid in enumerate(["b2", "b1"]):
+            d = bundles / bid / "decisions"
+            d.mkdir(parents=True)
+            p = d / "owner.json"
+            p.write_text(json.dumps({"action": "set_economic_owner", "new_value": "c_corp"}))
+            t = 1_700_000_000 + i
+            os.utime(p, (t, t))
+        self.assertEqual(dj.seed(bundles, self.journal, self.tail), 2)
+        self.assertEqual([(r["bundle_id"], r["journal_seeded"]) for r in self.records()], [("b2", True), ("b1", True)])
+        self.assertEqual(dj.read_tail(self.tail)["ts"], 1_700_000_001)
+        self.assertEqual(dj.seed(bundles, self.journal, self.tail), 0)
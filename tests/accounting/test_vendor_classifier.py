@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import pathlib
+import unittest
+from typing import Any, Optional
+
+import bundle_snapshot
+import vendor_classifier as vc
+
+def table(*rows: str) -> str:
+    return "\n".join([
+        "# Vendor table", "", vc.RULES_HEADING, "", "### Test",
+        "| Domain match | Category | Asset candidate | Notes |", "|---|---|---:|---|", *rows,
+        "", "## Other", "| not.a.rule | x | No | ignored |",
+    ])
+
+class ParseTable(unittest.TestCase):
+    def test_shipped_table(self) -> None:
+        rules = vc.parse_table(vc.TABLE_PATH.read_text(encoding="utf-8"))
+        patterns = [r["pattern"] for r in rules]
+        self.assertIn("openai.com", patterns)
+        self.assertIn("godox.*", patterns)
+        # "cursor.sh / cursor.com" is two rules; "microsoft.com (Azure)" drops the note
+        self.assertIn("cursor.sh", patterns)
+        self.assertIn("cursor.com", patterns)
+        self.assertIn("microsoft.com", patterns)
+        self.assertTrue(all(r["asset_candidate_hint"] in vc.HINTS.values() for r in rules))
+
+    def test_only_rules_section_counts(self) -> None:
+        (rule,) = vc.parse_table(table("| Example.COM | cat | Threshold | n |"))
+        self.assertEqual(rule, {"pattern": "example.com", "section": "Test", "category": "cat",
+                                "asset_candidate_hint": "threshold", "notes": "n"})
+
+    def test_bad_rows_are_errors(self) -> None:
+        for row in ("| example.com | cat | Maybe | n |", "| example | cat | No | n |", "| *.example.com | cat | No | n |"):
+            with self.subTest(row=row), self.assertRaises(ValueError):
+                vc.parse_table(table(row))
+        with self.assertRaises(ValueError):
+            vc.parse_table("# nothing here\n")
+
+class Lookup(unittest.TestCase):
+    def setUp(self) -> None:
+        self.trie = vc.DomainTrie(vc.parse_table(table(
+            "| example.com | generic | No | |",
+            "| shop.example.com | specific | Threshold | |",
+            "| example.com | duplicate | Ambiguous | first row wins |",
+            "| godox.* | lighting | Threshold | |",
+            "| godox.de | exact | No | |",
+        )))
+
+    def category(self, domain: str) -> Optional[str]:
+        rule = self.trie.lookup(domain)
+        return rule["category"] if rule else None
+
+    def test_exact_subdomain_and_most_specific(self) -> None:
+        self.assertEqual(self.category("example.com"), "generic")
+        self.assertEqual(self.category("api.example.com"), "generic")
+        self.assertEqual(self.category("shop.example.com"), "specific")
+        self.assertEqual(self.category("eu.shop.example.com"), "specific")
+        self.assertIsNone(self.category("notexample.com"))
+        self.assertIsNone(self.category("example.org"))
+        self.assertIsNone(self.category("com"))
+
+    def test_wildcard_covers_tld_or_public_suffix_only(self) -> None:
+        for domain in ("godox.com", "godox.cn", "store.godox.com", "godox.co.uk", "shop.godox.com.au"):
+            with self.subTest(domain=domain):
+                self.assertEqual(self.category(domain), "lighting")
+        for domain in ("godox.evil.com", "godox.anything.net", "evil.co.uk", "godoxx.com"):
+            with self.subTest(domain=domain):
+                self.assertIsNone(self.category(domain))
+
+    def test_exact_rule_beats_wildcard(self) -> None:
+        self.assertEqual(self.category("godox.de"), "exact")
+        self.assertEqual(self.category("api.godox.de"), "exact")
+
+class DomainExtraction(unittest.TestCase):
+    def test_domain_of(self) -> None:
+        cases = {
+            "billing@OpenAI.com": "openai.com",
+            "Receipts <noreply@mail.adobe.com>": "mail.adobe.com",
+            "https://www.digikey.com/en/orders?id=1": "digikey.com",
+            "http://shop.godox.co.uk:8080/": "shop.godox.co.uk",
+            "www.mouser.com.": "mouser.com",
+            "B&H Photo": "",
+            "localhost": "",
+            None: "",
+        }
+        for value, want in cases.items():
+            with self.subTest(value=value):
+                self.assertEqual(vc.domain_of(value), want)
+
+    def test_vendor_domain_precedence(self) -> None:
+        self.assertEqual(vc.vendor_domain({"vendor_email": "a@adafruit.com", "from": "b@sparkfun.com"}), "adafruit.com")
+        self.assertEqual(vc.vendor_domain({"sources": [{"note": 1}, {"sender": "x@runpod.io"}]}), "runpod.io")
+        self.assertEqual(vc.vendor_domain({"vendor": "profoto.com"}), "profoto.com")
+        self.assertEqual(vc.vendor_domain({"vendor": "Profoto AB profoto.com"}), "")
+
+    def test_classify_batch(self) -> None:
+        trie = vc.DomainTrie(vc.parse_table(vc.TABLE_PATH.read_text(encoding="utf-8")))
+
+        def bundle(bid: str, meta: Optional[dict[str, Any]]) -> bundle_snapshot.Bundle:
+            d = pathlib.Path("/nonexistent") / bid
+            return bundle_snapshot.Bundle(bid, d, d / bundle_snapshot.META_RELPATH, meta)
+
+        out, stats = vc.classify([
+            bundle("b1", {"vendor_email": "billing@openai.com"}),
+            bundle("b2", {"from": "orders@godox.co.uk"}),
+            bundle("b3", {"from": "orders@godox.evil.com"}),
+            bundle("b4", {}),
+            bundle("b5", None),
+        ], trie)
+        self.assertEqual(out["b1"][1]["pattern"], "openai.com")
+        self.assertEqual(out["b2"][1]["pattern"], "godox.*")
+        self.assertEqual(out["b3"], ("godox.evil.com", None))
+        self.assertEqual(out["b4"], ("", None))
+        self.assertNotIn("b5", out)
+        self.assertEqual((stats["matched"], stats["unmatched"], stats["no_domain"], stats["wildcard_matches"]), (2, 1, 1, 1))
@@ -0,0 +1,74 @@
+"""Throwaway vaults and bundle zips for the bundle engine tests."""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import io
+import json
+import shutil
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+# copies payload/ into --target; the body can be extended with extra lines (e.g. "exit 1")
+APPLY_SH = """#!/usr/bin/env bash
+set -e
+T=""
+while [[ $# -gt 0 ]]; do case "$1" in --target) T="$2"; shift 2;; *) shift;; esac; done
+cd payload
+find . -type f | while read -r f; do mkdir -p "$T/$(dirname "$f")"; cp "$f" "$T/$f"; done
+"""
+
+def sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def manifest(bundle_id: str, files: dict[str, bytes], version: str = "0.1.0",
+             supersedes: tuple[str, ...] = (), superseded_by: tuple[str, ...] = ()) -> dict[str, Any]:
+    return {
+        "schema_version": 1,
+        "bundle_id": bundle_id,
+        "bundle_version": version,
+        "apply": {"default_entrypoint": "apply.sh", "verification": {"kind": "script", "path": ""}},
+        "targets": [{"apply_mode": "overlay", "target_type": "repo"}],
+        "lineage": {"parents": [], "supersedes": list(supersedes), "superseded_by": list(superseded_by)},
+        "contents": {"files": [{"path": p, "sha256": sha256(b), "bytes": len(b)} for p, b in sorted(files.items())]},
+    }
+
+def write_bundle(out: Path, man: dict[str, Any], files: dict[str, bytes], apply_tail: str = "") -> Path:
+    """A script-applied bundle zip: manifest, apply.sh, and each file at the root (as listed) and under payload/."""
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("bundle_manifest.v1.json", json.dumps(man))
+        z.writestr("apply.sh", APPLY_SH + apply_tail)
+        for p, b in files.items():
+            z.writestr(p, b)
+            z.writestr("payload/" + p, b)
+    return out
+
+def quiet(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Call an engine entry point with its progress output swallowed."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args, **kwargs)
+
+class VaultTestCase(unittest.TestCase):
+    """A fresh temp dir per test, with the vault at tmp/vault."""
+
+    def setUp(self) -> None:
+        self.tmp = Path(tempfile.mkdtemp(prefix="cos-test-")).resolve()
+        self.addCleanup(shutil.rmtree, self.tmp, True)
+        self.vault = self.tmp / "vault"
+
+    def objects(self) -> dict[str, int]:
+        """sha256 -> size of every blob in the vault."""
+        root = self.vault / "objects" / "sha256"
+        return {p.name: p.stat().st_size for p in root.glob("*/*")} if root.exists() else {}
+
+    def import_bundle(self, bundle_id: str, files: dict[str, bytes], man: Optional[dict[str, Any]] = None,
+                      apply_tail: str = "", **kwargs: Any) -> Path:
+        from creative_os.bundles import engine
+        man = man or manifest(bundle_id, files)
+        z = write_bundle(self.tmp / f"{bundle_id}.zip", man, files, apply_tail)
+        quiet(engine.bundle_import, str(z), vault_override=str(self.vault), **kwargs)
+        return z
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import json
+import os
+import zipfile
+from pathlib import Path
+
+from creative_os.bundles import blobs, engine, verify
+from tests.bundles.fixtures import VaultTestCase, manifest, quiet, sha256
+
+BIG = os.urandom(256 * 1024)
+
+EXTRACT_SH = """#!/usr/bin/env bash
+set -e
+T=""
+while [[ $# -gt 0 ]]; do case "$1" in --target) T="$2"; shift 2;; *) shift;; esac; done
+python3 -c "import glob, sys, zipfile; zipfile.ZipFile(glob.glob('*.payload.zip')[0]).extractall(sys.argv[1])" "$T"
+"""
+
+class PackedBundles(VaultTestCase):
+    """Bundles made by `cos bundle pack`: the payload ships as an embedded archive."""
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.src = self.tmp / "src"
+        (self.src / "sub").mkdir(parents=True)
+        (self.src / "apply.sh").write_text(EXTRACT_SH)
+        (self.src / "big.bin").write_bytes(BIG)
+        tpl = manifest("app", {})
+        del tpl["contents"]
+        (self.src / "bundle_manifest.v1.json").write_text(json.dumps(tpl))
+
+    def pack(self, version: str, note: str) -> tuple[str, Path]:
+        (self.src / "sub" / "note.txt").write_text(note)
+        bid = f"app-{version}"
+        dist = self.tmp / "dist" / version
+        quiet(engine.bundle_pack, str(self.src), out_dir=str(dist), bundle_id=bid, version=version, vault_override=str(self.vault))
+        return bid, dist / f"{bid}.zip"
+
+    def test_unchanged_file_is_stored_once(self) -> None:
+        _, z1 = self.pack("0.1.0", "first\n")
+        quiet(engine.bundle_import, str(z1), vault_override=str(self.vault))
+        before = self.objects()
+        self.assertEqual(before.get(sha256(BIG)), len(BIG))
+
+        bid, z2 = self.pack("0.2.0", "second\n")
+        quiet(engine.bundle_import, str(z2), vault_override=str(self.vault))
+        added = {k: v for k, v in self.objects().items() if k not in before}
+        # the new manifest and note.txt; big.bin and apply.sh are shared with 0.1.0
+        self.assertIn(sha256(b"second\n"), added)
+        self.assertNotIn(sha256(BIG), added)
+        self.assertLess(sum(added.values()), 16 * 1024)
+
+        store = engine._find_bundle_dir(self.vault, bid)
+        doc = json.loads((store / blobs.FILES_FILENAME).read_text())
+        self.assertEqual({f["path"] for f in doc["tree"]}, {"apply.sh", "big.bin", "sub/note.txt"})
+        self.assertNotIn("blob", doc["archive"])
+
+    def test_applies_from_expanded_archive(self) -> None:
+        bid, z = self.pack("0.1.0", "first\n")
+        quiet(engine.bundle_import, str(z), vault_override=str(self.vault))
+        tgt = self.tmp / "target"
+        for native in (False, True):
+            with self.subTest(native=native):
+                rc = quiet(engine.bundle_apply, bid, str(tgt), vault_override=str(self.vault), native=native, force=True)
+                self.assertEqual(rc, engine.EXIT_PASS)
+                self.assertEqual((tgt / "big.bin").read_bytes(), BIG)
+                self.assertEqual((tgt / "sub" / "note.txt").read_text(), "first\n")
+
+    def test_corrupt_archive_member_is_rejected(self) -> None:
+        bid, z = self.pack("0.1.0", "first\n")
+        # swap big.bin inside the archive and re-stamp contents.archive, so only the per-file check can catch it
+        bad = self.tmp / "bad.zip"
+        with zipfile.ZipFile(z) as src, zipfile.ZipFile(bad, "w") as dst:
+            man = json.loads(src.read("bundle_manifest.v1.json"))
+            archive_name = man["contents"]["archive"]["filename"]
+            inner = self.tmp / archive_name
+            with zipfile.ZipFile(src.open(archive_name)) as a, zipfile.ZipFile(inner, "w") as b:
+                for i in a.infolist():
+                    data = a.read(i)
+                    b.writestr(i, bytes(len(data)) if i.filename == "big.bin" else data)
+            raw = inner.read_bytes()
+            man["contents"]["archive"].update(sha256=sha256(raw), bytes=len(raw))
+            for i in src.infolist():
+                if i.filename == archive_name:
+                    dst.writestr(i, raw)
+                elif i.filename == "bundle_manifest.v1.json":
+                    dst.writestr(i, json.dumps(man))
+                else:
+                    dst.writestr(i, src.read(i))
+        with self.assertRaises(verify.ContentMismatch):
+            quiet(engine.bundle_import, str(bad), vault_override=str(self.vault))
+        self.assertNotIn(bid, engine._load_index(self.vault)["bundles"])
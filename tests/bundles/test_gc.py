@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import json
+import shutil
+import time
+from pathlib import Path
+from typing import Any
+
+from creative_os.bundles import engine, gc
+from tests.bundles.fixtures import VaultTestCase, manifest, sha256
+
+DAY = 86400
+
+OLD = {"a.txt": b"only in 1.0.0\n", "shared.txt": b"in both\n"}
+NEW = {"b.txt": b"only in 2.0.0\n", "shared.txt": b"in both\n"}
+
+class Supersession(VaultTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.import_bundle("app_1.0.0", OLD, man=manifest("app_1.0.0", OLD, version="1.0.0"))
+        # only the newer bundle declares the relation
+        self.import_bundle("app_2.0.0", NEW, man=manifest("app_2.0.0", NEW, version="2.0.0", supersedes=("app_1.0.0",)))
+        self.imported = time.time()
+
+    def plan(self, days_later: float) -> dict[str, Any]:
+        return gc.plan(self.vault, superseded_days=30, now=self.imported + days_later * DAY)
+
+    def test_clock_starts_when_the_newer_bundle_arrives(self) -> None:
+        # the old bundle's own import time doesn't matter, only when it was superseded
+        meta = engine._find_bundle_dir(self.vault, "app_1.0.0") / "import_meta.v1.json"
+        meta.write_text(json.dumps({**json.loads(meta.read_text()), "imported_at": "2000-01-01T00:00:00Z"}))
+        self.assertEqual(self.plan(5)["sections"]["bundles"], [])
+        (item,) = self.plan(31)["sections"]["bundles"]
+        self.assertEqual(item["bundle_id"], "app_1.0.0")
+        self.assertEqual(item["superseded_by"], ["app_2.0.0"])
+        self.assertTrue(item["indexed"])
+
+    def test_blobs_only_the_dropped_bundle_used_are_collected(self) -> None:
+        blobs = {i["path"].rsplit("/", 1)[1] for i in self.plan(31)["sections"]["blobs"]}
+        self.assertIn(sha256(OLD["a.txt"]), blobs)
+        self.assertNotIn(sha256(NEW["shared.txt"]), blobs)
+        self.assertNotIn(sha256(NEW["b.txt"]), blobs)
+        # within the grace period nothing is unreferenced yet
+        self.assertEqual(self.plan(5)["sections"]["blobs"], [])
+
+    def test_manifest_superseded_by_counts_from_own_import(self) -> None:
+        files = {"c.txt": b"legacy\n"}
+        self.import_bundle("legacy", files, man=manifest("legacy", files, superseded_by=("not_in_vault",)))
+        ids = {i["bundle_id"] for i in self.plan(31)["sections"]["bundles"]}
+        self.assertEqual(ids, {"app_1.0.0", "legacy"})
+
+    def test_dry_run_plan_touches_nothing(self) -> None:
+        before = self.objects()
+        self.plan(365)
+        self.assertEqual(self.objects(), before)
+        self.assertIn("app_1.0.0", engine._load_index(self.vault)["bundles"])
+
+    def test_execute_removes_store_and_unreferenced_blobs(self) -> None:
+        p = self.plan(31)
+        gc.execute(self.vault, p)
+        self.assertNotIn(sha256(OLD["a.txt"]), self.objects())
+        self.assertIn(sha256(NEW["shared.txt"]), self.objects())
+        (item,) = p["sections"]["bundles"]
+        self.assertFalse(Path(item["path"]).exists())
+        self.assertEqual(set(engine._load_index(self.vault)["bundles"]), {"app_2.0.0"})
+
+    def test_shadowed_store_is_collected_at_once(self) -> None:
+        # an older import of the same bundle_id, in an earlier month's dir, that the index no longer points at
+        live = engine._find_bundle_dir(self.vault, "app_2.0.0")
+        stale = self.vault / "memory" / "bundles" / "2000" / "01" / "app_2.0.0"
+        shutil.copytree(live, stale)
+        (item,) = self.plan(0)["sections"]["bundles"]
+        self.assertEqual((item["path"], item["indexed"]), (str(stale), False))
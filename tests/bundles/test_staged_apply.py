@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any
+
+from creative_os.bundles import engine
+from tests.bundles.fixtures import VaultTestCase, manifest, quiet
+
+FILES = {"a.txt": b"new a\n", "fresh/deep/b.txt": b"new b\n"}
+
+class StagedApply(VaultTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.tgt = self.tmp / "target"
+        self.tgt.mkdir()
+        (self.tgt / "a.txt").write_bytes(b"old a\n")
+        (self.tgt / "a.txt").chmod(0o600)
+        (self.tgt / "keep.txt").write_bytes(b"untouched\n")
+
+    def apply(self, bid: str, **kwargs: Any) -> int:
+        return quiet(engine.bundle_apply, bid, str(self.tgt), vault_override=str(self.vault), staged=True, force=True, **kwargs)
+
+    def run_dir(self) -> Path:
+        (run,) = [d for d in (self.vault / "runs").iterdir() if (d / "bundle_apply_receipt.v1.json").exists()]
+        return run
+
+    def receipt(self) -> dict[str, Any]:
+        return json.loads((self.run_dir() / "bundle_apply_receipt.v1.json").read_text())
+
+    def assert_untouched(self) -> None:
+        self.assertEqual((self.tgt / "a.txt").read_bytes(), b"old a\n")
+        self.assertEqual((self.tgt / "a.txt").stat().st_mode & 0o777, 0o600)
+        self.assertEqual((self.tgt / "keep.txt").read_bytes(), b"untouched\n")
+        self.assertFalse((self.tgt / "fresh").exists())
+
+    def test_failing_script_is_rolled_back(self) -> None:
+        # the script writes everything, then fails
+        self.import_bundle("app", FILES, apply_tail="exit 1\n")
+        self.assertEqual(self.apply("app"), engine.EXIT_FAIL)
+        self.assert_untouched()
+        staged = self.receipt()["staged"]
+        self.assertTrue(staged["rolled_back"])
+        self.assertEqual((staged["restored"], staged["removed"]), (1, 1))
+
+    def test_failing_verify_after_native_apply_is_rolled_back(self) -> None:
+        # native apply snapshots by hardlink; its rename-based writes must leave the snapshot intact
+        check = self.tmp / "verify.sh"
+        check.write_text("exit 1\n")
+        man = manifest("app", FILES)
+        man["apply"]["verification"]["path"] = str(check)
+        self.import_bundle("app", FILES, man=man)
+        self.assertEqual(self.apply("app", native=True), engine.EXIT_FAIL)
+        self.assert_untouched()
+        self.assertEqual(self.receipt()["staged"]["hardlink"], 1)
+
+    def test_passing_apply_keeps_changes_and_drops_snapshot(self) -> None:
+        self.import_bundle("app", FILES)
+        self.assertEqual(self.apply("app"), engine.EXIT_PASS)
+        self.assertEqual((self.tgt / "a.txt").read_bytes(), b"new a\n")
+        self.assertEqual((self.tgt / "fresh" / "deep" / "b.txt").read_bytes(), b"new b\n")
+        self.assertFalse(self.receipt()["staged"]["rolled_back"])
+        self.assertFalse((self.run_dir() / "snapshot").exists())